@@ -15,9 +15,19 @@ DNS.2 = pod-security-webhook.webhook-system
 DNS.3 = pod-security-webhook.webhook-system.svc
 CONF
 
-openssl genrsa -out tls.key 2048
+# ECDSA P-256: the handshake signature costs far less CPU than RSA 2048
+openssl ecparam -name prime256v1 -genkey -noout -out tls.key
 openssl req -new -key tls.key -subj "/CN=pod-security-webhook.webhook-system.svc" -config openssl.cnf -out tls.csr
 openssl x509 -req -in tls.csr -signkey tls.key -out tls.crt -days 3650 -extensions v3_req -extfile openssl.cnf
 
+# The apiserver trusts the old and the new certificate until the pods have
+# picked up the new one, so rotation has no window of failed calls.
+OLD_CRT=$(kubectl get secret pod-security-webhook-tls -n webhook-system -o jsonpath='{.data.tls\.crt}' 2>/dev/null | base64 -d)
+CA_BUNDLE=$( (echo "$OLD_CRT"; cat tls.crt) | sed '/^$/d' | base64 | tr -d '\n')
+for config in validatingwebhookconfiguration/pod-security-webhook mutatingwebhookconfiguration/pod-security-webhook-defaults; do
+  kubectl patch "$config" --type=json -p "[{\"op\":\"replace\",\"path\":\"/webhooks/0/clientConfig/caBundle\",\"value\":\"${CA_BUNDLE}\"}]"
+done
+
+# No pod restart: the secret volume is updated in place (within ~1 minute)
+# and the webhook reloads the certificate (TLS_RELOAD_INTERVAL).
 kubectl create secret tls pod-security-webhook-tls --cert=tls.crt --key=tls.key -n webhook-system --dry-run=client -o yaml | kubectl apply -f -
-kubectl delete pods -n webhook-system -l app=pod-security-webhook
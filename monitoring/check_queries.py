@@ -0,0 +1,249 @@
+"""
+Checks every Grafana panel, alert and recording-rule query in monitoring/
+against the metrics the webhook actually emits.
+
+Usage:
+    python monitoring/check_queries.py
+
+Metric names and label sets are read from the Counter / Gauge / Histogram
+definitions in webhook-backend/src (no import, so no cluster or database is
+needed); recording-rule outputs are added in file order. A query fails when it
+selects an unknown metric, matches or groups by a label the metric does not
+have, or uses a legend label the result cannot carry. Exits 1 on failures.
+"""
+import os
+import re
+import ast
+import sys
+import json
+import glob
+
+import yaml
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(ROOT, "..", "webhook-backend", "src")
+RULES_FILE = os.path.join(ROOT, "recording-rules.yaml")
+
+# Added by Prometheus to every scraped series.
+TARGET_LABELS = {"job", "instance"}
+
+# Series that come from other exporters (kube-state-metrics, Prometheus itself).
+EXTERNAL_METRICS = {
+    "up": set(),
+    "kube_pod_info": {"namespace", "pod", "uid", "node", "host_ip", "pod_ip", "created_by_kind", "created_by_name"},
+    "kube_pod_status_phase": {"namespace", "pod", "uid", "phase"},
+    "kube_pod_container_status_restarts_total": {"namespace", "pod", "uid", "container"},
+}
+
+KEYWORDS = {
+    "by", "without", "on", "ignoring", "group_left", "group_right", "bool",
+    "and", "or", "unless", "offset", "inf", "nan",
+}
+
+SELECTOR_RE = re.compile(r"([a-zA-Z_:][a-zA-Z0-9_:]*)?\s*\{([^{}]*)\}")
+MATCHER_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*(=~|!~|!=|=)\s*"((?:[^"\\]|\\.)*)"')
+GROUPING_RE = re.compile(r"\b(by|without|on|ignoring|group_left|group_right)\s*\(([^()]*)\)")
+IDENT_RE = re.compile(r"(?<![\w:.\"])([a-zA-Z_:][a-zA-Z0-9_:]*)(?![\w:]|\s*\()")
+LEGEND_RE = re.compile(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}")
+
+
+# =====================================================
+# EMITTED METRICS
+# =====================================================
+def _labelnames(call: ast.Call) -> set[str]:
+    node = call.args[2] if len(call.args) > 2 else next(
+        (kw.value for kw in call.keywords if kw.arg == "labelnames"), None
+    )
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return {elt.value for elt in node.elts if isinstance(elt, ast.Constant)}
+    return set()
+
+
+def emitted_metrics(src_dir: str = SRC_DIR) -> dict[str, set[str]]:
+    """
+    Returns {exposed series name: labels} for the metrics defined in src_dir,
+    using the names prometheus_client exposes (_total, _bucket, _sum, ...).
+    """
+    metrics = {}
+    for path in sorted(glob.glob(os.path.join(src_dir, "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        for call in ast.walk(tree):
+            if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Name)):
+                continue
+            kind = call.func.id
+            if kind not in ("Counter", "Gauge", "Histogram", "Summary") or not call.args:
+                continue
+            if not (isinstance(call.args[0], ast.Constant) and isinstance(call.args[0].value, str)):
+                continue
+
+            name = call.args[0].value
+            labels = _labelnames(call) | TARGET_LABELS
+            if kind == "Counter":
+                name = name[:-len("_total")] if name.endswith("_total") else name
+                metrics[name + "_total"] = labels
+                metrics[name + "_created"] = labels
+            elif kind == "Gauge":
+                metrics[name] = labels
+            else:
+                if kind == "Histogram":
+                    metrics[name + "_bucket"] = labels | {"le"}
+                metrics[name + "_sum"] = labels
+                metrics[name + "_count"] = labels
+                metrics[name + "_created"] = labels
+
+    return metrics
+
+
+# =====================================================
+# QUERY ANALYSIS
+# =====================================================
+def check_expr(expr: str, known: dict[str, set[str]], legend: str = "") -> tuple[list[str], set[str]]:
+    """
+    Checks one PromQL expression. Returns (problems, labels of the result).
+    This is a scanner, not a parser: it covers the selectors, matchers,
+    grouping clauses and legends the dashboards in this repo use.
+    """
+    problems = []
+    used: dict[str, set[str]] = {}
+
+    # Grafana variables ($__rate_interval, ${window}) only appear in ranges.
+    text = re.sub(r"\$\{?\w+\}?", "1m", expr)
+
+    groupings = []
+    for keyword, labels in GROUPING_RE.findall(text):
+        groupings.append((keyword, {label.strip() for label in labels.split(",") if label.strip()}))
+    text = GROUPING_RE.sub(" ", text)
+
+    def selector(match: re.Match) -> str:
+        name, body = match.group(1), match.group(2)
+        matchers = MATCHER_RE.findall(body)
+        names = [name] if name else []
+        for label, op, value in matchers:
+            if label == "__name__":
+                pattern = re.compile(value if op in ("=~", "!~") else re.escape(value))
+                found = [metric for metric in known if pattern.fullmatch(metric)]
+                if op in ("=~", "=") and not found:
+                    problems.append(f"no known metric matches __name__{op}\"{value}\"")
+                names += found if op in ("=~", "=") else []
+        for metric in names:
+            if metric not in known:
+                problems.append(f"unknown metric {metric}")
+                continue
+            used[metric] = known[metric]
+            for label, _, _ in matchers:
+                if label != "__name__" and label not in known[metric]:
+                    problems.append(f"{metric} has no label {label!r}")
+        return " "
+
+    text = SELECTOR_RE.sub(selector, text)
+    # String literals outside matchers (label_replace etc.) are not metrics.
+    text = re.sub(r'"(?:[^"\\]|\\.)*"', " ", text)
+    text = re.sub(r"\[[^\]]*\]", " ", text)
+
+    for name in IDENT_RE.findall(text):
+        if name.lower() in KEYWORDS or re.fullmatch(r"\d.*", name):
+            continue
+        if name not in known:
+            problems.append(f"unknown metric {name}")
+            continue
+        used[name] = known[name]
+
+    available = set().union({"__name__"}, *used.values()) if used else set()
+    for keyword, labels in groupings:
+        for label in labels - available:
+            problems.append(f"{keyword} ({label}) but no selected metric has label {label!r}")
+
+    result = available
+    first_aggregation = next((g for g in groupings if g[0] in ("by", "without")), None)
+    if first_aggregation:
+        keyword, labels = first_aggregation
+        result = labels if keyword == "by" else available - labels
+    elif re.match(r"\s*\(*\s*(sum|avg|min|max|count|count_values|stddev|stdvar|topk|bottomk|quantile)\s*\(", expr):
+        result = set()
+
+    for label in LEGEND_RE.findall(legend or ""):
+        if label not in result and label != "__name__":
+            problems.append(f"legend uses {{{{{label}}}}} but the result has no such label")
+
+    return problems, result
+
+
+# =====================================================
+# SOURCES
+# =====================================================
+def recording_rules(path: str = RULES_FILE) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        configmap = yaml.safe_load(f)
+    rules = []
+    for key, content in sorted(configmap.get("data", {}).items()):
+        for group in yaml.safe_load(content).get("groups", []):
+            for rule in group.get("rules", []):
+                rules.append({**rule, "source": f"{os.path.basename(path)}:{key}:{group['name']}"})
+    return rules
+
+
+def dashboard_queries(path: str):
+    with open(path, encoding="utf-8") as f:
+        dashboard = json.load(f)
+
+    def panels(items):
+        for panel in items:
+            yield panel
+            yield from panels(panel.get("panels", []))
+
+    for panel in panels(dashboard.get("panels", [])):
+        for target in panel.get("targets", []):
+            if target.get("expr"):
+                yield panel.get("title", "?"), target["expr"], target.get("legendFormat", "")
+
+
+def alert_queries(path: str):
+    with open(path, encoding="utf-8") as f:
+        provisioning = yaml.safe_load(f)
+    for group in provisioning.get("groups", []):
+        for rule in group.get("rules", []):
+            for query in rule.get("data", []):
+                if query.get("datasourceUid") == "__expr__":
+                    continue
+                model = query.get("model", {})
+                if model.get("expr"):
+                    yield rule.get("title", "?"), model["expr"], ""
+
+
+def main() -> None:
+    known = {**emitted_metrics(), **{name: labels | TARGET_LABELS for name, labels in EXTERNAL_METRICS.items()}}
+    failures = 0
+    checked = 0
+
+    def report(source: str, where: str, problems: list[str]) -> None:
+        nonlocal failures
+        for problem in problems:
+            failures += 1
+            print(f"FAIL {source} [{where}]: {problem}")
+
+    # Rules are checked in order; each recorded output becomes selectable after it.
+    for rule in recording_rules():
+        problems, labels = check_expr(rule["expr"], known)
+        report(rule["source"], rule.get("record") or rule.get("alert"), problems)
+        if "record" in rule:
+            known[rule["record"]] = labels | set(rule.get("labels", {}))
+        checked += 1
+
+    for path in sorted(glob.glob(os.path.join(ROOT, "dashboards", "*.json"))):
+        for title, expr, legend in dashboard_queries(path):
+            report(os.path.basename(path), title, check_expr(expr, known, legend)[0])
+            checked += 1
+
+    for path in sorted(glob.glob(os.path.join(ROOT, "alerts", "*.yaml"))):
+        for title, expr, legend in alert_queries(path):
+            report(os.path.basename(path), title, check_expr(expr, known, legend)[0])
+            checked += 1
+
+    print(f"{checked} queries checked, {failures} problems")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measures the columnar audit export (audit_export.py) on a month of
+synthetic audit rows: write time, size on disk, and the "denials by policy
+per namespace" query against the one second target. A row-by-row scan of
+the same rows, already in Python memory, is printed for reference; it
+leaves out reading any storage, so it is not what the export replaces.
+
+Usage:
+    python benchmarks/bench_audit_export.py [rows_per_day] [days]
+
+Requires pyarrow. Rows are generated in memory (no PostgreSQL) and written
+through audit_export.write_partition, the same path the exporter uses.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from audit_export import partition_path, query, write_partition  # noqa: E402
+
+NAMESPACES = [f"team-{i}" for i in range(60)] + ["prod", "test", "dev", "default"]
+IMAGES = [f"registry.example.com/app-{i}:1.{i % 7}" for i in range(200)] + ["nginx:latest", "nginx"]
+DENIES = [
+    ("security", "Privileged container is not allowed"),
+    ("security", "Running as root is not allowed"),
+    ("image", "Latest or tagless image is not allowed"),
+    ("resource", "CPU/memory requests and limits are required"),
+    ("storage", "hostPath volumes are not allowed"),
+    ("rules", "Blocked registry: docker.io (rule no-dockerhub)"),
+]
+
+
+def day_rows(day: date, count: int, rng: random.Random) -> list[tuple]:
+    start = datetime.combine(day, datetime.min.time())
+    rows = []
+    for i in range(count):
+        namespace = rng.choice(NAMESPACES)
+        if rng.random() < 0.2:
+            policy, reason = rng.choice(DENIES)
+            decision = "deny"
+        else:
+            policy, reason, decision = "all", "All policies passed", "allow"
+        rows.append((
+            start + timedelta(seconds=86400 * i / count),
+            namespace,
+            f"pod-{rng.getrandbits(32):08x}",
+            rng.choice(IMAGES),
+            decision,
+            policy,
+            reason,
+            "prod" if namespace == "prod" else "test",
+        ))
+    return rows
+
+
+def main() -> None:
+    rows_per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    rng = random.Random(42)
+    first = date(2026, 9, 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        all_rows = []
+        write_time = 0.0
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            rows = day_rows(day, rows_per_day, rng)
+            all_rows.extend(rows)
+            start = time.perf_counter()
+            write_partition((rows[i:i + 50_000] for i in range(0, len(rows), 50_000)), partition_path(directory, day))
+            write_time += time.perf_counter() - start
+
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"{len(all_rows)} rows in {days} files: write {write_time:.2f}s, {size / 1024 / 1024:.1f} MiB on disk")
+
+        start = time.perf_counter()
+        counts = Counter((row[5], row[1]) for row in all_rows if row[4] == "deny")
+        row_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = query(directory, ["policy", "namespace"], decisions=["deny"])
+        columnar_time = time.perf_counter() - start
+
+        assert {(r["policy"], r["namespace"]): r["count"] for r in result} == counts
+        print(f"denials by policy per namespace ({len(result)} groups)")
+        print(f"  columnar query (files)  {columnar_time * 1000:8.0f} ms   target < 1000 ms: {'ok' if columnar_time < 1 else 'MISSED'}")
+        print(f"  row scan (in memory)    {row_time * 1000:8.0f} ms   reference, no I/O")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measures image rule lookup cost as the number of rules grows.
+
+Usage:
+    python benchmarks/bench_image_policy.py [iterations]
+
+Each run compiles a policy with N repository rules and validates the same
+set of image references, both against the index directly and through
+validate_images (the request path, including the compiled-index lookup);
+per-image cost should stay flat as N grows.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from image_policy import compile_image_policy, parse_image_reference  # noqa: E402
+from policies import validate_images  # noqa: E402
+
+IMAGES = [
+    "nginx:1.25",
+    "ghcr.io/team-7/service-3:2.1.0",
+    "registry.example.com/platform/api@sha256:" + "a" * 64,
+    "quay.io/prometheus/node-exporter:v1.8.0",
+    "redis",
+]
+
+
+def build_policy(rule_count: int) -> dict:
+    rules = [
+        {"repository": f"registry.example.com/team-{i}/service-{i}", "allowedTags": ["1.0", "1.1"]}
+        for i in range(rule_count)
+    ]
+    rules.append({"repository": "ghcr.io/team-7", "tagPattern": r"^\d+\.\d+\.\d+$"})
+    rules.append({"repository": "nginx", "allowedTags": ["1.25"]})
+    return {
+        "allowLatestTag": False,
+        "imagePolicy": {"allowedRegistries": ["docker.io", "ghcr.io", "*.example.com", "quay.io"], "rules": rules},
+    }
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    for rule_count in (10, 1_000, 100_000):
+        policy = build_policy(rule_count)
+
+        start = time.perf_counter()
+        index = compile_image_policy(policy)
+        compile_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for image in IMAGES:
+                ref = parse_image_reference(image)
+                index.registry_allowed(ref.registry)
+                index.lookup(ref)
+        elapsed = time.perf_counter() - start
+
+        per_image = elapsed / (iterations * len(IMAGES)) * 1e6
+
+        # The spec is denied on its first image without a rule, so validate
+        # each image as its own single-container pod.
+        specs = [{"containers": [{"name": "c", "image": image}]} for image in IMAGES]
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for spec in specs:
+                validate_images(spec, policy)
+        elapsed = time.perf_counter() - start
+
+        per_request = elapsed / (iterations * len(IMAGES)) * 1e6
+        print(
+            f"rules={rule_count:>7}  compile={compile_seconds * 1000:8.1f} ms  "
+            f"lookup={per_image:.3f} us/image  validate_images={per_request:.3f} us/image"
+        )
+
+
+if __name__ == "__main__":
+    main()
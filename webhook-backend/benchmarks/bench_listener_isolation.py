@@ -0,0 +1,207 @@
+"""
+Measures /validate latency while the UI API is under heavy load, with the
+combined listener and with SERVE_MODE=split (serve.py).
+
+Usage:
+    python benchmarks/bench_listener_isolation.py [admission_requests] [ui_clients]
+
+The webhook runs in child processes through serve.serve() with a fake
+apiserver: namespace reads sleep 1 ms, and the cluster-wide pod LIST builds
+UI_POD_COUNT V1Pod objects, as the kubernetes client does when it
+deserializes a large LIST. Plain HTTP is used (TLS disabled).
+
+For each mode it reports admission p50 / p99 idle and under UI load.
+"""
+import os
+import sys
+import json
+import time
+import types
+import socket
+import http.client
+import multiprocessing
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+POLICY_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "k8s", "configmap-policy.yaml")
+
+ADMISSION_PORT = 18443
+UI_PORT = 18444
+UI_POD_COUNT = 1500
+
+POD = {
+    "metadata": {"name": "bench"},
+    "spec": {
+        "securityContext": {"runAsNonRoot": True},
+        "containers": [{
+            "name": "c",
+            "image": "nginx:1.25",
+            "resources": {
+                "requests": {"cpu": "100m", "memory": "128Mi"},
+                "limits": {"cpu": "200m", "memory": "256Mi"},
+            },
+        }],
+    },
+}
+
+
+def _install_fake_apiserver() -> None:
+    import yaml
+    from kubernetes import client, config
+
+    config.load_incluster_config = lambda *a, **k: None
+    policy_data = yaml.safe_load(open(POLICY_FILE))["data"]
+
+    def read_namespace(self, name, **kwargs):
+        time.sleep(0.001)
+        return types.SimpleNamespace(metadata=types.SimpleNamespace(labels={"environment": "test"}))
+
+    def read_namespaced_config_map(self, name, namespace, **kwargs):
+        return types.SimpleNamespace(data=policy_data, metadata=types.SimpleNamespace(resource_version="1"))
+
+    def list_namespaced_config_map(self, *args, **kwargs):
+        raise RuntimeError("watch disabled in benchmark")
+
+    def list_pod_for_all_namespaces(self, **kwargs):
+        return client.V1PodList(items=[
+            client.V1Pod(
+                metadata=client.V1ObjectMeta(name=f"pod-{i}", namespace=f"ns-{i % 40}"),
+                status=client.V1PodStatus(
+                    phase="Running",
+                    container_statuses=[client.V1ContainerStatus(
+                        name="c", image="nginx:1.25", image_id="", ready=True, restart_count=0,
+                        state=client.V1ContainerState(running=client.V1ContainerStateRunning()),
+                    )],
+                ),
+            )
+            for i in range(UI_POD_COUNT)
+        ])
+
+    client.CoreV1Api.read_namespace = read_namespace
+    client.CoreV1Api.read_namespaced_config_map = read_namespaced_config_map
+    client.CoreV1Api.list_namespaced_config_map = list_namespaced_config_map
+    client.CoreV1Api.list_pod_for_all_namespaces = list_pod_for_all_namespaces
+
+
+def _run_server(mode: str) -> None:
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+    sys.path.insert(0, SRC)
+    os.environ.update({
+        "SERVE_MODE": mode,
+        "TLS_CERTFILE": "",
+        "TLS_KEYFILE": "",
+        "ADMISSION_PORT": str(ADMISSION_PORT),
+        "UI_PORT": str(UI_PORT),
+        "UI_METRICS_PORT": "19092",
+        "DB_HOST": "127.0.0.1",
+        "DB_PORT": "1",
+        "LOG_ALLOW_SAMPLE_RATE": "0",
+        "POLICY_WATCH_MAX_BACKOFF": "3600",
+    })
+    _install_fake_apiserver()
+
+    import metrics_server
+    metrics_server.start_metrics_server = lambda *a, **k: None
+
+    import serve
+    if mode == "split":
+        serve.serve_split()
+    else:
+        serve.serve("all")
+
+
+def _wait_for(port: int, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _ui_load(port: int, stop) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    while not stop.is_set():
+        try:
+            conn.request("GET", "/api/pods")
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            time.sleep(0.05)
+
+
+def _admission_latencies(requests: int) -> list[float]:
+    conn = http.client.HTTPConnection("127.0.0.1", ADMISSION_PORT, timeout=30)
+    latencies = []
+    for i in range(requests):
+        body = json.dumps({
+            "apiVersion": "admission.k8s.io/v1",
+            "kind": "AdmissionReview",
+            "request": {"uid": str(i), "kind": {"kind": "Pod"}, "namespace": "bench", "operation": "CREATE", "object": POD},
+        })
+        start = time.perf_counter()
+        conn.request("POST", "/validate", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"/validate returned {response.status}")
+        time.sleep(0.005)
+    return latencies
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_mode(mode: str, requests: int, ui_clients: int) -> None:
+    server = multiprocessing.Process(target=_run_server, args=(mode,), daemon=False)
+    server.start()
+    ui_port = UI_PORT if mode == "split" else ADMISSION_PORT
+
+    try:
+        _wait_for(ADMISSION_PORT)
+        _wait_for(ui_port)
+        _admission_latencies(20)  # warm-up
+
+        idle = _admission_latencies(requests)
+
+        stop = multiprocessing.Event()
+        loaders = [multiprocessing.Process(target=_ui_load, args=(ui_port, stop)) for _ in range(ui_clients)]
+        for loader in loaders:
+            loader.start()
+        time.sleep(1.0)
+
+        loaded = _admission_latencies(requests)
+
+        stop.set()
+        for loader in loaders:
+            loader.join(timeout=60)
+            if loader.is_alive():
+                loader.terminate()
+    finally:
+        server.terminate()
+        server.join(timeout=10)
+        if server.is_alive():
+            server.kill()
+
+    for label, values in (("idle", idle), (f"UI load x{ui_clients}", loaded)):
+        print(
+            f"{mode:<9} {label:<12} p50 {_percentile(values, 0.50) * 1000:7.2f} ms"
+            f"   p99 {_percentile(values, 0.99) * 1000:7.2f} ms"
+        )
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    ui_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    for mode in ("combined", "split"):
+        run_mode(mode, requests, ui_clients)
+        time.sleep(1.0)
+
+
+if __name__ == "__main__":
+    main()
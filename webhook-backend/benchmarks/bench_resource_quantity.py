@@ -0,0 +1,78 @@
+"""
+Compares Kubernetes quantity parsing throughput against a naive
+Decimal-based parser.
+
+Usage:
+    python benchmarks/bench_resource_quantity.py [iterations]
+
+- naive Decimal    -> parses every value from scratch with Decimal arithmetic
+- integer, cold    -> resource_policy parser with its cache cleared each round
+- integer, cached  -> resource_policy parser as used on the admission path
+"""
+import os
+import sys
+import time
+from decimal import Decimal, ROUND_CEILING
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from resource_policy import cpu_millicores, memory_bytes  # noqa: E402
+
+CPU_VALUES = ["100m", "250m", "500m", "1", "1.5", "2", "2e3", "750m"]
+MEMORY_VALUES = ["64Mi", "128Mi", "256Mi", "512Mi", "1Gi", "1.5Gi", "1G", "500M"]
+
+_NAIVE_SUFFIXES = {
+    "Ki": Decimal(2) ** 10, "Mi": Decimal(2) ** 20, "Gi": Decimal(2) ** 30,
+    "Ti": Decimal(2) ** 40, "Pi": Decimal(2) ** 50, "Ei": Decimal(2) ** 60,
+    "n": Decimal("1e-9"), "u": Decimal("1e-6"), "m": Decimal("1e-3"),
+    "k": Decimal("1e3"), "M": Decimal("1e6"), "G": Decimal("1e9"),
+    "T": Decimal("1e12"), "P": Decimal("1e15"), "E": Decimal("1e18"),
+}
+
+
+def naive_quantity(value: str) -> Decimal:
+    for suffix in ("Ki", "Mi", "Gi", "Ti", "Pi", "Ei"):
+        if value.endswith(suffix):
+            return Decimal(value[:-2]) * _NAIVE_SUFFIXES[suffix]
+    if value[-1] in _NAIVE_SUFFIXES:
+        return Decimal(value[:-1]) * _NAIVE_SUFFIXES[value[-1]]
+    return Decimal(value)
+
+
+def naive_round(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for value in CPU_VALUES:
+            int((naive_quantity(value) * 1000).to_integral_value(ROUND_CEILING))
+        for value in MEMORY_VALUES:
+            int(naive_quantity(value).to_integral_value(ROUND_CEILING))
+    return time.perf_counter() - start
+
+
+def integer_round(iterations: int, cold: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            cpu_millicores.cache_clear()
+            memory_bytes.cache_clear()
+        for value in CPU_VALUES:
+            cpu_millicores(value)
+        for value in MEMORY_VALUES:
+            memory_bytes(value)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    parsed = iterations * (len(CPU_VALUES) + len(MEMORY_VALUES))
+
+    for label, elapsed in (
+        ("naive Decimal", naive_round(iterations)),
+        ("integer, cold", integer_round(iterations, cold=True)),
+        ("integer, cached", integer_round(iterations, cold=False)),
+    ):
+        print(f"{label:<16} {parsed / elapsed / 1e6:6.2f} M quantities/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Compares declarative rule evaluation against the hard-coded checks.
+
+Usage:
+    python benchmarks/bench_rule_engine.py [iterations] [rule_count]
+
+- hard-coded checks    -> validate_images + validate_security + validate_resources
+                          (the ~15 built-in checks) on the test policy
+- naive interpreter    -> the same declarative rules, each field path walked
+                          per rule and every rule checked
+- compiled rule plan   -> rule_engine plan (shared field extraction, rules
+                          indexed by their first equals / in condition)
+
+The last column is the cost relative to the hard-coded checks.
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from policies import _all_containers, validate_images, validate_resources, validate_security  # noqa: E402
+from rule_engine import compile_rules, evaluate_rules  # noqa: E402
+
+POLICY = {
+    "allowLatestTag": False,
+    "blockPrivileged": True,
+    "blockRootUser": True,
+    "warnRootUser": False,
+    "requireResources": True,
+}
+
+CONTAINER = {
+    "image": "registry.example.com/platform/api:1.4.2",
+    "imagePullPolicy": "IfNotPresent",
+    "securityContext": {
+        "runAsNonRoot": True,
+        "runAsUser": 1000,
+        "allowPrivilegeEscalation": False,
+        "readOnlyRootFilesystem": True,
+        "capabilities": {"drop": ["ALL"]},
+    },
+    "resources": {
+        "requests": {"cpu": "100m", "memory": "128Mi"},
+        "limits": {"cpu": "200m", "memory": "256Mi"},
+    },
+    "ports": [{"containerPort": 8080}],
+}
+
+POD = {
+    "metadata": {
+        "name": "api-7c9f",
+        "labels": {"app": "api", "team": "platform", "tier": "backend"},
+    },
+    "spec": {
+        "securityContext": {"runAsNonRoot": True, "seccompProfile": {"type": "RuntimeDefault"}},
+        "serviceAccountName": "api",
+        "containers": [dict(CONTAINER, name=f"c{i}") for i in range(3)],
+    },
+}
+
+# (scope, field, op, value) templates; rule i uses template i % len with
+# a per-rule constant, so rules share field paths like real rule sets do.
+TEMPLATES = [
+    ("container", "imagePullPolicy", "equals", lambda i: f"Policy{i}"),
+    ("container", "securityContext.privileged", "equals", lambda i: True),
+    ("container", "securityContext.capabilities.add", "contains", lambda i: f"CAP_{i}"),
+    ("container", "securityContext.runAsUser", "lessThan", lambda i: 0),
+    ("container", "securityContext.procMount", "in", lambda i: [f"Mount{i}", "Unmasked"]),
+    ("container", "image", "matches", lambda i: rf"docker\.io/blocked-{i}/.*"),
+    ("container", "securityContext.seLinuxOptions.type", "equals", lambda i: f"spc_{i}_t"),
+    ("container", "name", "equals", lambda i: f"forbidden-{i}"),
+    ("pod", "spec.hostNetwork", "equals", lambda i: True),
+    ("pod", "spec.serviceAccountName", "equals", lambda i: f"sa-{i}"),
+    ("pod", "metadata.labels.team", "equals", lambda i: f"team-{i}"),
+    ("pod", "spec.securityContext.seccompProfile.type", "equals", lambda i: f"Profile{i}"),
+]
+
+
+def build_rules(rule_count: int) -> list[dict]:
+    rules = []
+    for i in range(rule_count):
+        scope, field, op, value = TEMPLATES[i % len(TEMPLATES)]
+        condition = {"field": field, "op": op}
+        if op == "in":
+            condition["values"] = value(i)
+        else:
+            condition["value"] = value(i)
+        rules.append({"id": f"rule-{i}", "scope": scope, "match": [condition]})
+    return rules
+
+
+def _naive_get(obj, field: str):
+    for key in field.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            return None
+        obj = obj[key]
+    return obj
+
+
+def _naive_test(value, condition: dict) -> bool:
+    op = condition["op"]
+    if op == "equals":
+        return value == condition["value"]
+    if op == "in":
+        return value in condition["values"]
+    if op == "contains":
+        return isinstance(value, list) and condition["value"] in value
+    if op == "lessThan":
+        return isinstance(value, int) and value < condition["value"]
+    if op == "matches":
+        return isinstance(value, str) and re.fullmatch(condition["value"], value) is not None
+    raise ValueError(op)
+
+
+def naive_evaluate(rules: list[dict], pod: dict) -> bool:
+    containers = _all_containers(pod["spec"])
+    for rule in rules:
+        targets = [pod] if rule["scope"] == "pod" else containers
+        for target in targets:
+            if all(_naive_test(_naive_get(target, c["field"]), c) for c in rule["match"]):
+                return False
+    return True
+
+
+def hard_coded_round(iterations: int) -> float:
+    spec = POD["spec"]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        validate_images(spec, POLICY)
+        validate_security(spec, POLICY)
+        validate_resources(spec, POLICY)
+    return time.perf_counter() - start
+
+
+def naive_round(iterations: int, rules: list[dict]) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        naive_evaluate(rules, POD)
+    return time.perf_counter() - start
+
+
+def compiled_round(iterations: int, policy: dict) -> float:
+    spec = POD["spec"]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        # compile_rules is a cache hit after the first call, as on the admission path.
+        evaluate_rules(compile_rules(policy), POD, _all_containers(spec))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rule_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rules = build_rules(rule_count)
+    policy = dict(POLICY, rules=rules)
+
+    ok, msg, _ = evaluate_rules(compile_rules(policy), POD, _all_containers(POD["spec"]))
+    assert ok and naive_evaluate(rules, POD), msg
+
+    baseline = hard_coded_round(iterations)
+    for label, elapsed in (
+        ("hard-coded checks", baseline),
+        (f"naive, {rule_count} rules", naive_round(iterations, rules)),
+        (f"compiled, {rule_count} rules", compiled_round(iterations, policy)),
+    ):
+        print(f"{label:<22} {iterations / elapsed / 1e3:8.1f} k pods/s   x{elapsed / baseline:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures apiserver lookups and cache-warm cost as webhook replicas are added.
+
+Usage:
+    python benchmarks/bench_shared_cache.py [namespaces] [requests_per_replica]
+
+Each replica is a TieredCache with its own near-cache. Every replica serves
+the same mix of namespaces; the loader stands in for an apiserver read.
+
+- near-cache only  -> every replica warms its own cache (loads grow with replicas)
+- shared tier      -> replicas share the in-process stand-in store
+                      (loads stay flat as replicas are added)
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from shared_cache import CacheBackend, MemoryBackend, NearCache, TieredCache  # noqa: E402
+
+APISERVER_LATENCY = 0.0005
+REPLICA_COUNTS = (1, 2, 4, 8)
+
+
+def run(replicas: int, backend_factory, namespaces: int, requests: int) -> tuple[int, float]:
+    backend = backend_factory()
+    caches = [TieredCache(backend, NearCache(size=namespaces * 2, ttl=3600)) for _ in range(replicas)]
+    loads = 0
+
+    def loader(namespace: str):
+        nonlocal loads
+        loads += 1
+        time.sleep(APISERVER_LATENCY)
+        return {"environment": "test", "team": namespace}
+
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for cache in caches:
+        for _ in range(requests):
+            namespace = f"ns-{rng.randrange(namespaces)}"
+            cache.get_or_load("namespace-labels", namespace, lambda: loader(namespace))
+    return loads, time.perf_counter() - start
+
+
+def main() -> None:
+    namespaces = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print(f"{'replicas':>8}  {'near-only loads':>15}  {'warm s':>7}  {'shared loads':>12}  {'warm s':>7}")
+    for replicas in REPLICA_COUNTS:
+        near_loads, near_time = run(replicas, CacheBackend, namespaces, requests)
+        shared_loads, shared_time = run(replicas, MemoryBackend, namespaces, requests)
+        print(f"{replicas:>8}  {near_loads:>15}  {near_time:>7.3f}  {shared_loads:>12}  {shared_time:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Checks the admission sketches (sketches.py) against exact counting.
+
+Usage:
+    python benchmarks/bench_sketches.py [events] [distinct_images]
+
+Events spread over one hour of buckets; images follow a Zipf-like
+distribution (a few hot offenders, a long tail), 30% of events are denials.
+Reports the per-event cost on the request thread (record, an enqueue) and
+on the background thread (add), window merge time, top-10 recall and count
+error for images and pods, and HyperLogLog error against exact sets.
+"""
+import os
+import sys
+import time
+import random
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sketches import WindowedSketches  # noqa: E402
+
+START = 1_800_000_000
+
+
+def main() -> None:
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    distinct_images = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    rng = random.Random(42)
+    images = [f"registry.example.com/team-{i % 97}/app-{i}:1.{i % 13}" for i in range(distinct_images)]
+    drawn = rng.choices(images, weights=[1 / (i + 1) for i in range(distinct_images)], k=events)
+
+    sketches = WindowedSketches()
+    denied_images = Counter()
+    denied_pods = Counter()
+    all_pods = set()
+    all_images = set()
+
+    record_time = 0.0
+    add_time = 0.0
+    for i, image in enumerate(drawn):
+        # A workload keeps its namespace and pod names (a crash-looping
+        # Deployment retries the same pods), so hot images make hot pods.
+        namespace = image.split("/")[1]
+        pod_name = f"{image.rsplit('/', 1)[-1].split(':')[0]}-{rng.randrange(3)}"
+        decision = "deny" if rng.random() < 0.3 else "allow"
+
+        start = time.perf_counter()
+        sketches.record(namespace, pod_name, [image], decision, "image", now=START + i * 3600 / events)
+        record_time += time.perf_counter() - start
+        if len(sketches.pending) >= 1000:
+            # Stands in for the background thread (timed separately).
+            start = time.perf_counter()
+            sketches.flush()
+            add_time += time.perf_counter() - start
+
+        pod = f"{namespace}/{pod_name}"
+        all_pods.add(pod)
+        all_images.add(image)
+        if decision == "deny":
+            denied_images[image] += 1
+            denied_pods[pod] += 1
+
+    start = time.perf_counter()
+    sketches.flush()
+    add_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    window = sketches.window(3600, now=START + 3599)
+    merge_time = time.perf_counter() - start
+    summary = window.summary(10)
+
+    print(
+        f"{events} events: record (request thread) {record_time / events * 1e6:.1f} us/event, "
+        f"add (background) {add_time / events * 1e6:.1f} us/event, 1h window merge {merge_time * 1000:.0f} ms"
+    )
+    for label, exact, top in (("image", denied_images, summary["top"]["image"]), ("pod", denied_pods, summary["top"]["pod"])):
+        truth = exact.most_common(10)
+        recall = len({key for key, _ in truth} & {item["key"] for item in top}) / len(truth)
+        error = max(abs(item["count"] - exact[item["key"]]) / exact[item["key"]] for item in top)
+        print(f"top-10 {label:<6} recall {recall * 100:5.1f}%   max count error {error * 100:5.2f}%")
+
+    for label, exact, estimate in (
+        ("pods", len(all_pods), summary["distinct"]["pods"]),
+        ("images", len(all_images), summary["distinct"]["images"]),
+    ):
+        print(f"distinct {label:<6} exact {exact:>8}  estimate {estimate:>8}  error {abs(estimate - exact) / exact * 100:5.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Compares serving the exported UI the previous way (Starlette StaticFiles
+plus the 404 handler reading <path>.html / index.html from disk) with the
+in-memory StaticAssets.
+
+Usage:
+    python benchmarks/bench_static_assets.py [static_dir] [requests]
+
+Without static_dir a synthetic Next.js-like export is generated in a temp
+directory. Both ASGI apps are called directly (no sockets), so the numbers
+are per-request serving cost. Each run reports requests/s and bytes sent for
+a browser-like mix: page loads, hashed chunks and revalidations.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from starlette.exceptions import HTTPException  # noqa: E402
+from starlette.responses import HTMLResponse  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+from static_assets import StaticAssets  # noqa: E402
+
+PAGES = ("index", "pods", "audit", "logs", "create")
+
+
+def build_export(directory: str) -> None:
+    rng = random.Random(7)
+    chunks = os.path.join(directory, "_next", "static", "chunks")
+    os.makedirs(chunks)
+    for page in PAGES:
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write("<!DOCTYPE html><html><body>" + f"<div class='row'>{page}</div>" * 400 + "</body></html>")
+    for i in range(20):
+        with open(os.path.join(chunks, f"{i:02d}-{rng.getrandbits(32):08x}.js"), "w") as f:
+            f.write("".join(f"function f{j}(a){{return a+{j}}};" for j in range(rng.randint(500, 4000))))
+
+
+class DiskUI:
+    """StaticFiles with the former custom_404_handler page fallback."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files = StaticFiles(directory=directory, html=True)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.files(scope, receive, send)
+        except HTTPException:
+            html_file = os.path.join(self.directory, scope["path"].lstrip("/") + ".html")
+            if not os.path.isfile(html_file):
+                html_file = os.path.join(self.directory, "index.html")
+            with open(html_file, "r", encoding="utf-8") as f:
+                await HTMLResponse(content=f.read())(scope, receive, send)
+
+
+def request_mix(directory: str, count: int) -> list[tuple[str, bool]]:
+    rng = random.Random(42)
+    chunks = [
+        "/_next/static/chunks/" + name
+        for name in sorted(os.listdir(os.path.join(directory, "_next", "static", "chunks")))
+    ]
+    pages = ["/"] + [f"/{page}" for page in PAGES if page != "index"]
+    mix = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            mix.append((rng.choice(pages), False))
+        elif roll < 0.5:
+            mix.append((rng.choice(pages), True))  # revalidation
+        else:
+            mix.append((rng.choice(chunks), False))
+    return mix
+
+
+async def call(app, path: str, headers: list) -> tuple[int, int, dict]:
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": headers, "http_version": "1.1",
+        "scheme": "http", "server": ("test", 80),
+    }
+    status = 0
+    size = 0
+    response_headers = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update({k.decode(): v.decode() for k, v in message["headers"]})
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, size, response_headers
+
+
+async def run(app, mix: list) -> tuple[float, int]:
+    etags = {}
+    sent = 0
+    start = time.perf_counter()
+    for path, revalidate in mix:
+        headers = [(b"accept-encoding", b"gzip, deflate, br")]
+        if revalidate and path in etags:
+            headers.append((b"if-none-match", etags[path].encode()))
+        status, size, response_headers = await call(app, path, headers)
+        if status not in (200, 304):
+            raise RuntimeError(f"{path} returned {status}")
+        if "etag" in response_headers:
+            etags[path] = response_headers["etag"]
+        sent += size
+    return time.perf_counter() - start, sent
+
+
+def main() -> None:
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "-" else tmp
+        if directory == tmp:
+            build_export(tmp)
+        mix = request_mix(directory, requests)
+
+        load_start = time.perf_counter()
+        assets = StaticAssets(directory)
+        load_time = time.perf_counter() - load_start
+
+        print(f"StaticAssets startup load: {load_time * 1000:.1f} ms")
+        for name, app in (("StaticFiles", DiskUI(directory)), ("StaticAssets", assets)):
+            elapsed, sent = asyncio.run(run(app, mix))
+            print(f"{name:<12}  {requests / elapsed:9.0f} req/s   {sent / 1024 / 1024:8.2f} MiB sent")
+
+
+if __name__ == "__main__":
+    main()
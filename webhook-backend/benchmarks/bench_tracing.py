@@ -0,0 +1,63 @@
+"""
+Measures the per-call overhead of stage() instrumentation.
+
+Usage:
+    python benchmarks/bench_tracing.py [iterations]
+
+Compares a bare call against the same call wrapped in stage() with span
+export disabled (the production default) and with the file exporter.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import tracing  # noqa: E402
+
+
+def work() -> int:
+    return sum(range(20))
+
+
+def bench_bare(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        work()
+    return time.perf_counter() - start
+
+
+def bench_stage(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with tracing.stage("bench") as st:
+            work()
+            st.outcome = "pass"
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    bare = bench_bare(iterations)
+
+    tracing.init_tracing("none")
+    histogram_only = bench_stage(iterations)
+
+    tracing.TRACE_FILE_PATH = os.path.join(tempfile.gettempdir(), "bench-spans.jsonl")
+    tracing.init_tracing("file")
+    with_spans = bench_stage(iterations)
+    tracing.init_tracing("none")
+
+    def per_call(total: float) -> float:
+        return (total - bare) / iterations * 1e6
+
+    print(f"iterations:                 {iterations}")
+    print(f"bare call:                  {bare / iterations * 1e6:.3f} us/call")
+    print(f"stage() histogram only:     +{per_call(histogram_only):.3f} us/call")
+    print(f"stage() with file spans:    +{per_call(with_spans):.3f} us/call")
+
+
+if __name__ == "__main__":
+    main()
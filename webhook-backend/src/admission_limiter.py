@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from prometheus_client import Counter, Gauge
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Sustained admission requests per second and burst size per namespace.
+# ADMISSION_NS_RATE=0 disables the token bucket.
+ADMISSION_NS_RATE = float(os.getenv("ADMISSION_NS_RATE", "50"))
+ADMISSION_NS_BURST = float(os.getenv("ADMISSION_NS_BURST", "100"))
+
+# Requests of one namespace being evaluated at the same time (0 = unlimited).
+ADMISSION_NS_MAX_INFLIGHT = int(os.getenv("ADMISSION_NS_MAX_INFLIGHT", "16"))
+
+# deny  -> over-limit requests are rejected (429) without evaluation
+# allow -> over-limit requests are allowed without evaluation (fail-open)
+ADMISSION_SHED_POLICY = os.getenv("ADMISSION_SHED_POLICY", "deny").lower()
+
+ADMISSION_LIMITER_EXEMPT_NAMESPACES = frozenset(
+    ns.strip()
+    for ns in os.getenv("ADMISSION_LIMITER_EXEMPT_NAMESPACES", "kube-system").split(",")
+    if ns.strip()
+)
+
+# Upper bound on tracked namespaces; idle ones are evicted first. When every
+# tracked namespace has requests in flight, new namespaces share one bucket
+# (reported as OVERFLOW_NAMESPACE) until one can be evicted.
+ADMISSION_LIMITER_MAX_NAMESPACES = int(os.getenv("ADMISSION_LIMITER_MAX_NAMESPACES", "1000"))
+OVERFLOW_NAMESPACE = "_overflow"
+
+# =====================================================
+# PROMETHEUS METRICS (NAMESPACE ACCOUNTING)
+# =====================================================
+NAMESPACE_REQUESTS = Counter(
+    "admission_namespace_requests_total",
+    "Admission requests per namespace (admitted to evaluation or shed)",
+    ["namespace", "result"]
+)
+
+NAMESPACE_INFLIGHT = Gauge(
+    "admission_namespace_inflight",
+    "Admission requests of the namespace being evaluated",
+    ["namespace"]
+)
+
+NAMESPACE_TOKENS = Gauge(
+    "admission_namespace_tokens",
+    "Tokens left in the namespace bucket after its last request",
+    ["namespace"]
+)
+
+
+# =====================================================
+# TOKEN BUCKETS
+# =====================================================
+class _NamespaceState:
+    __slots__ = ("tokens", "updated", "inflight")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+        self.inflight = 0
+
+
+class NamespaceLimiter:
+    """
+    Per-namespace admission accounting with a token bucket (rate, burst)
+    and a concurrency limit.
+
+    - acquire() returns None when the request may be evaluated, otherwise
+      the reason it was shed ('rate' or 'concurrency')
+    - every admitted request must be paired with release()
+    - exempt namespaces are counted but never shed
+    - at most max_namespaces are tracked; the shared overflow bucket takes
+      the rest, so the map never grows past the cap
+    """
+
+    def __init__(
+        self,
+        rate: float = ADMISSION_NS_RATE,
+        burst: float = ADMISSION_NS_BURST,
+        max_inflight: int = ADMISSION_NS_MAX_INFLIGHT,
+        exempt: frozenset = ADMISSION_LIMITER_EXEMPT_NAMESPACES,
+        max_namespaces: int = ADMISSION_LIMITER_MAX_NAMESPACES
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_inflight = max_inflight
+        self.exempt = exempt
+        self.max_namespaces = max_namespaces
+        self._states: OrderedDict = OrderedDict()
+        self._overflow = _NamespaceState(self.burst, time.monotonic())
+        # Admitted requests per namespace currently accounted to _overflow.
+        self._overflowed: dict = {}
+        self._lock = threading.Lock()
+
+    def _state(self, namespace: str, now: float) -> tuple[str, _NamespaceState]:
+        """(metric label, state) for a namespace; called with the lock held."""
+        state = self._states.get(namespace)
+        if state is not None:
+            self._states.move_to_end(namespace)
+            return namespace, state
+
+        if namespace not in self._overflowed:
+            if len(self._states) >= self.max_namespaces:
+                self._evict()
+            if len(self._states) < self.max_namespaces:
+                state = _NamespaceState(self.burst, now)
+                self._states[namespace] = state
+                return namespace, state
+
+        return OVERFLOW_NAMESPACE, self._overflow
+
+    def _evict(self) -> None:
+        # Least recently used namespace without requests in flight.
+        for namespace, state in self._states.items():
+            if state.inflight == 0:
+                del self._states[namespace]
+                for gauge in (NAMESPACE_INFLIGHT, NAMESPACE_TOKENS):
+                    try:
+                        gauge.remove(namespace)
+                    except KeyError:
+                        pass
+                return
+
+    def acquire(self, namespace: str) -> Optional[str]:
+        now = time.monotonic()
+
+        with self._lock:
+            label, state = self._state(namespace, now)
+            exempt = namespace in self.exempt
+
+            if self.rate > 0:
+                state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+                state.updated = now
+
+            reason = None
+            if not exempt:
+                if self.max_inflight > 0 and state.inflight >= self.max_inflight:
+                    reason = "concurrency"
+                elif self.rate > 0 and state.tokens < 1.0:
+                    reason = "rate"
+
+            if reason is None:
+                if self.rate > 0:
+                    state.tokens = max(state.tokens - 1.0, 0.0)
+                state.inflight += 1
+                if state is self._overflow:
+                    self._overflowed[namespace] = self._overflowed.get(namespace, 0) + 1
+
+            # Under the lock, so _evict never runs before the children exist.
+            NAMESPACE_INFLIGHT.labels(namespace=label).set(state.inflight)
+            NAMESPACE_TOKENS.labels(namespace=label).set(state.tokens)
+
+        NAMESPACE_REQUESTS.labels(namespace=label, result=reason or "admitted").inc()
+        return reason
+
+    def release(self, namespace: str) -> None:
+        with self._lock:
+            label, state = namespace, self._states.get(namespace)
+            count = self._overflowed.get(namespace)
+            if count is not None:
+                label, state = OVERFLOW_NAMESPACE, self._overflow
+                if count > 1:
+                    self._overflowed[namespace] = count - 1
+                else:
+                    del self._overflowed[namespace]
+
+            if state is None or state.inflight == 0:
+                return
+            state.inflight -= 1
+            NAMESPACE_INFLIGHT.labels(namespace=label).set(state.inflight)
@@ -1,48 +1,101 @@
 import os
+import json
 import time
 import logging
-import uvicorn
-import asyncio
+import anyio.to_thread
 
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request
 from pydantic import BaseModel
 from typing import Optional
 
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Histogram
 
 from audit_logger import save_audit_log
 
 from audit_summary import get_audit_summary, check_database_health, get_dashboard_stats
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.concurrency import run_in_threadpool
 
-logging.Formatter.converter = time.localtime
+from tracing import span, stage, current_trace_id
+from decision_logger import setup_logging, log_decision
+from metrics_server import start_metrics_server, add_route, respond, query_params, authorized
+from explain import explain_buffer, explaining, explain_requested, replaying
+from workloads import pod_from_object, changed_pod, template_spec_pointer
+from mutation import compile_mutation_plan, build_patch, encode_patch
+from policy_store import PolicyStore
+from admission_limiter import NamespaceLimiter, ADMISSION_SHED_POLICY
+from static_assets import StaticAssets
+from lifecycle import lifecycle
+import pod_operations
+from sketches import WindowedSketches, SKETCH_BUCKETS, SKETCH_BUCKET_SECONDS, fetch_window
 
 from policies import (
     init_k8s_client,
-    get_namespace_environment,
-    load_policy_for_environment,
+    get_namespace_labels,
     validate_storage,
     validate_images,
     validate_security,
     validate_resources,
+    validate_rules,
 )
 
 # =====================================================
 # LOGGING SETUP
 # =====================================================
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(message)s"
-)
+# Structured JSON by default, LOG_FORMAT=console for colorized dev output.
+setup_logging()
 logger = logging.getLogger("admission-webhook")
 
 # =====================================================
 # METRICS SERVER
 # =====================================================
 # Prometheus metrics endpoint: http://<pod-ip>:9091/metrics
-start_http_server(9091)
+# Sampling profiler (PROFILER_TOKEN required): http://<pod-ip>:9091/debug/profile
+# Explain traces (PROFILER_TOKEN required): http://<pod-ip>:9091/debug/explain
+#
+# WEBHOOK_ROLE is set by serve.py:
+# - all       -> one process serves admission and the UI/API (default)
+# - admission -> /validate, /mutate, /health only
+# - ui        -> UI/API, audit endpoints and static assets only
+WEBHOOK_ROLE = os.getenv("WEBHOOK_ROLE", "all")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9091"))
+
+start_metrics_server(METRICS_PORT)
+
+# =====================================================
+# ADMISSION SKETCHES (TOP-K / DISTINCT COUNTS)
+# =====================================================
+# Fed from the decision paths below; served as a mergeable snapshot on
+# http://<pod-ip>:9091/sketches and summarized by /api/analytics/*.
+#
+# SKETCH_SOURCES: extra /sketches URLs merged into the API answer
+# (other replicas). The UI process in split mode always reads the
+# admission process, which owns the sketches.
+admission_sketches = WindowedSketches()
+if WEBHOOK_ROLE != "ui":
+    admission_sketches.start()
+SKETCH_SOURCES = [url.strip() for url in os.getenv("SKETCH_SOURCES", "").split(",") if url.strip()]
+if WEBHOOK_ROLE == "ui":
+    SKETCH_SOURCES.insert(0, os.getenv("ADMISSION_SKETCH_URL", "http://127.0.0.1:9091/sketches"))
+
+SKETCH_MAX_WINDOW = SKETCH_BUCKETS * SKETCH_BUCKET_SECONDS
+
+
+def _sketch_window(params: dict) -> int:
+    return max(1, min(int(params.get("window", SKETCH_MAX_WINDOW)), SKETCH_MAX_WINDOW))
+
+
+def sketches_endpoint(environ, start_response):
+    """GET /sketches?window=3600 -> serialized sketches for the window."""
+    try:
+        window = _sketch_window(query_params(environ))
+    except ValueError:
+        return respond(start_response, "400 Bad Request", {"error": "window must be an integer"})
+    return respond(start_response, "200 OK", admission_sketches.window(window).to_dict())
+
+
+if WEBHOOK_ROLE != "ui":
+    add_route("/sketches", sketches_endpoint)
 
 # =====================================================
 # PROMETHEUS METRICS (GENERIC)
@@ -51,6 +104,18 @@ ADMISSION_REQUESTS = Counter("admission_requests_total", "Total admission reques
 ADMISSION_ALLOWED = Counter("admission_requests_allowed_total", "Allowed admission requests")
 ADMISSION_DENIED = Counter("admission_requests_denied_total", "Denied admission requests")
 
+# Bounded labels only (namespaces and policies are finite); dashboards, alerts
+# and the recording rules in monitoring/ aggregate this one.
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Pod admission decisions by namespace, environment and policy",
+    ["decision", "policy", "namespace", "environment"]
+)
+
+# Per-pod series (pod_name, image, reason) grow without bound; kept for
+# ad-hoc debugging, POD_LEVEL_METRICS=false turns them off.
+POD_LEVEL_METRICS = os.getenv("POD_LEVEL_METRICS", "true").lower() == "true"
+
 ADMISSION_POD_ALLOWED = Counter(
     "admission_pod_allowed_total",
     "Allowed Pod admission requests with pod details",
@@ -63,11 +128,67 @@ ADMISSION_POD_DENIED = Counter(
     ["namespace", "pod_name", "environment", "policy", "reason", "image"]
 )
 
+ADMISSION_UPDATE_UNCHANGED = Counter(
+    "admission_update_unchanged_total",
+    "UPDATE requests allowed without evaluation because no policy-relevant field changed"
+)
+
+ADMISSION_MUTATIONS = Counter(
+    "admission_mutations_total",
+    "Mutating admission requests by result",
+    ["result"]
+)
+
+ADMISSION_SHED = Counter(
+    "admission_requests_shed_total",
+    "Admission requests answered without evaluation by the namespace limiter",
+    ["reason", "action"]
+)
+
+# Buckets resolve the 0.5-50 ms range admission decisions live in, plus the
+# SLO threshold and the apiserver webhook timeout (timeoutSeconds, default 10).
+ADMISSION_LATENCY_SLO_SECONDS = float(os.getenv("ADMISSION_LATENCY_SLO_SECONDS", "0.1"))
+ADMISSION_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_TIMEOUT_SECONDS", "10"))
+ADMISSION_LATENCY_BUCKETS = sorted({
+    float(bucket)
+    for bucket in os.getenv(
+        "ADMISSION_LATENCY_BUCKETS",
+        "0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5"
+    ).split(",")
+    if bucket.strip()
+} | {ADMISSION_LATENCY_SLO_SECONDS, ADMISSION_TIMEOUT_SECONDS})
+
+# Exemplars (request UID, trace ID when tracing is on) are exposed to
+# OpenMetrics scrapes only; the plain text format ignores them.
+ADMISSION_EXEMPLARS = os.getenv("ADMISSION_EXEMPLARS", "true").lower() == "true"
+
 ADMISSION_LATENCY = Histogram(
     "admission_request_duration_seconds",
-    "Admission webhook latency"
+    "Admission webhook latency by decision and policy",
+    ["decision", "policy"],
+    buckets=ADMISSION_LATENCY_BUCKETS
 )
 
+# Children cached per (decision, policy), as in tracing.stage().
+_latency_children: dict = {}
+
+
+def observe_latency(start_time: float, uid: str, decision: str, policy: str) -> None:
+    key = (decision, policy)
+    child = _latency_children.get(key)
+    if child is None:
+        child = ADMISSION_LATENCY.labels(decision=decision, policy=policy)
+        _latency_children[key] = child
+
+    exemplar = None
+    if ADMISSION_EXEMPLARS and uid:
+        exemplar = {"uid": uid}
+        trace_id = current_trace_id()
+        if trace_id:
+            exemplar["trace_id"] = trace_id
+
+    child.observe(time.time() - start_time, exemplar=exemplar)
+
 # =====================================================
 # RESPONSE MODELS
 # =====================================================
@@ -100,6 +221,11 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Routes are registered on two routers; app serves both, while
+# admission_app and ui_app (bottom of the file) serve one each.
+admission_router = APIRouter()
+ui_router = APIRouter()
+
 # =====================================================
 # CONFIG
 # =====================================================
@@ -116,12 +242,37 @@ DEFAULT_ENVIRONMENT = os.getenv("DEFAULT_ENVIRONMENT", "dev")
 # =====================================================
 # K8S CLIENT
 # =====================================================
-core_v1 = init_k8s_client()
+# Admission lookups and UI/API calls use separate connection pools,
+# so UI browsing never takes connections from the admission path.
+core_v1 = init_k8s_client("admission")
+ui_core_v1 = init_k8s_client("ui")
+
+# =====================================================
+# POLICY STORE
+# =====================================================
+# Policy is read from memory; a background watch on the ConfigMap
+# publishes validated versions without a restart.
+policy_store = PolicyStore(core_v1, POLICY_CONFIGMAP_NAME, POLICY_CONFIGMAP_NAMESPACE)
+if WEBHOOK_ROLE != "ui":
+    policy_store.start()
+
+# =====================================================
+# NAMESPACE ADMISSION LIMITER
+# =====================================================
+# Per-namespace token bucket + concurrency limit in front of /validate,
+# so one namespace cannot exhaust the shared worker.
+namespace_limiter = NamespaceLimiter()
 
 # =====================================================
 # ADMISSION RESPONSE
 # =====================================================
-def admission_response(uid: str, allowed: bool, message: str, warnings: list[str] | None = None) -> dict:
+def admission_response(
+    uid: str,
+    allowed: bool,
+    message: str,
+    warnings: list[str] | None = None,
+    code: int | None = None
+) -> dict:
     response = {
         "apiVersion": "admission.k8s.io/v1",
         "kind": "AdmissionReview",
@@ -134,85 +285,169 @@ def admission_response(uid: str, allowed: bool, message: str, warnings: list[str
         }
     }
 
+    if code is not None:
+        response["response"]["status"]["code"] = code
+
     if warnings:
         response["response"]["warnings"] = warnings
 
     return response
 
 
-# =====================================================
-# STRUCTURED DECISION LOGGING
-# =====================================================
-def colorize_decision(decision: str) -> str:
-    """
-    Adds ANSI color codes to the DECISION value.
-    - ALLOW              -> green
-    - ALLOW_WITH_WARNING -> yellow
-    - DENY               -> red
-    """
-    if decision == "ALLOW":
-        return f"\033[92m{decision}\033[0m"
-    if decision == "ALLOW_WITH_WARNING":
-        return f"\033[93m{decision}\033[0m"
-    if decision == "DENY":
-        return f"\033[91m{decision}\033[0m"
-    return decision
+def mutation_response(uid: str, patch: list[dict]) -> dict:
+    response = {
+        "apiVersion": "admission.k8s.io/v1",
+        "kind": "AdmissionReview",
+        "response": {
+            "uid": uid,
+            "allowed": True
+        }
+    }
+
+    if patch:
+        response["response"]["patchType"] = "JSONPatch"
+        response["response"]["patch"] = encode_patch(patch)
+
+    return response
 
 
-def log_decision(
-    level: str,
+# =====================================================
+# DENY PATH
+# =====================================================
+def deny_request(
     uid: str,
-    decision: str,
-    policy: str,
+    policy_name: str,
+    msg: str,
     environment: str,
     namespace: str,
     pod_name: str,
-    reason: str,
-    start_time: float,
-    warnings: list[str] | None = None
-) -> None:
-    latency = time.time() - start_time
-    warning_text = ",".join(warnings) if warnings else "-"
-    colored_decision = colorize_decision(decision)
-
-    message = (
-        f"EVENT=admission_review "
-        f"DECISION={colored_decision} "
-        f"POLICY={policy} "
-        #f"ENV={environment} "
-        f"NAMESPACE={namespace} "
-        f"POD={pod_name} "
-        f"REASON=\"{reason}\" "
-        f"WARNINGS=\"{warning_text}\" "
-        #f"LATENCY={latency:.4f}s"
+    image_text: str,
+    start_time: float
+) -> dict:
+    """
+    Records a DENY decision (metrics, decision log, audit row)
+    and builds the AdmissionReview response.
+    """
+    if replaying():
+        return admission_response(uid, False, msg)
+
+    ADMISSION_DENIED.inc()
+    observe_latency(start_time, uid, "deny", policy_name)
+    ADMISSION_DECISIONS.labels(
+        decision="deny",
+        policy=policy_name,
+        namespace=namespace,
+        environment=environment
+    ).inc()
+    if POD_LEVEL_METRICS:
+        ADMISSION_POD_DENIED.labels(
+            namespace=namespace,
+            pod_name=pod_name,
+            environment=environment,
+            policy=policy_name,
+            reason=msg,
+            image=image_text
+        ).inc()
+
+    log_decision(
+        level="warning",
+        uid=uid,
+        decision="DENY",
+        policy=policy_name,
+        environment=environment,
+        namespace=namespace,
+        pod_name=pod_name,
+        reason=msg,
+        start_time=start_time
     )
 
-    if level == "warning":
-        logger.warning(message)
-    else:
-        logger.info(message)
+    admission_sketches.record(namespace, pod_name, image_text.split(","), "deny", policy_name)
+
+    with stage("audit_write"):
+        save_audit_log(
+            namespace=namespace,
+            pod_name=pod_name,
+            image=image_text,
+            decision="deny",
+            policy=policy_name,
+            reason=msg,
+            environment=environment
+        )
+
+    return admission_response(uid, False, msg)
 
 
 # =====================================================
 # WEBHOOK ENDPOINT
 # =====================================================
-@app.post(
+@admission_router.post(
     "/validate",
     include_in_schema=False
 )
 
 async def validate(request: Request):
-    start_time = time.time()
-    body = await request.json()
-    ADMISSION_REQUESTS.inc()
+    with lifecycle.track():
+        start_time = time.time()
+        body = await request.json()
+        ADMISSION_REQUESTS.inc()
+
+        req = body.get("request", {}) or {}
+        uid = req.get("uid", "")
+        namespace = req.get("namespace") or "-"
+
+        # Over-limit requests are answered before any policy, log or audit work.
+        shed_reason = namespace_limiter.acquire(namespace)
+        if shed_reason is not None:
+            return shed_response(uid, namespace, shed_reason)
+
+        # Evaluation (apiserver lookups, audit writes) runs in the threadpool so a
+        # slow namespace does not block the event loop for the others.
+        try:
+            return await run_in_threadpool(validate_in_span, req, uid, start_time)
+        finally:
+            namespace_limiter.release(namespace)
 
-    req = body.get("request", {}) or {}
-    uid = req.get("uid", "")
 
-    # Only Pod objects
-    if req.get("kind", {}).get("kind") != "Pod":
+def validate_in_span(req: dict, uid: str, start_time: float) -> dict:
+    with span("admission.validate", uid=uid):
+        if explain_requested(req):
+            with explaining(req, "annotation", current_trace_id()) as trace:
+                return trace.finish(evaluate_pod_request(req, uid, start_time))
+        return evaluate_pod_request(req, uid, start_time)
+
+
+def shed_response(uid: str, namespace: str, reason: str) -> dict:
+    ADMISSION_SHED.labels(reason=reason, action=ADMISSION_SHED_POLICY).inc()
+
+    if ADMISSION_SHED_POLICY == "allow":
+        return admission_response(uid, True, f"Admission limit exceeded for namespace {namespace} ({reason}); allowed without evaluation")
+
+    return admission_response(
+        uid,
+        False,
+        f"Admission limit exceeded for namespace {namespace} ({reason}); retry later",
+        code=429
+    )
+
+
+def evaluate_pod_request(req: dict, uid: str, start_time: float) -> dict:
+    kind = req.get("kind", {}).get("kind")
+    obj = req.get("object", {}) or {}
+
+    # Namespace can come from AdmissionReview request.
+    # If not available there, fallback to object metadata.
+    namespace = req.get("namespace") or (obj.get("metadata", {}) or {}).get("namespace", "default")
+
+    # Pods and the pod templates of Deployments, StatefulSets, DaemonSets,
+    # Jobs and CronJobs go through the same rules.
+    pod = pod_from_object(kind, obj, namespace)
+
+    if pod is None:
+        if replaying():
+            return admission_response(uid, True, "Non-Pod resource allowed")
+
         ADMISSION_ALLOWED.inc()
-        ADMISSION_LATENCY.observe(time.time() - start_time)
+        observe_latency(start_time, uid, "allow", "non-pod")
 
         log_decision(
             level="info",
@@ -228,7 +463,6 @@ async def validate(request: Request):
 
         return admission_response(uid, True, "Non-Pod resource allowed")
 
-    pod = req.get("object", {}) or {}
     spec = pod.get("spec", {}) or {}
     meta = pod.get("metadata", {}) or {}
     pod_name = meta.get("name", "unknown")
@@ -238,203 +472,136 @@ async def validate(request: Request):
     images = [container.get("image", "unknown") for container in containers]
     image_text = ",".join(images)
 
-    # Namespace can come from AdmissionReview request.
-    # If not available there, fallback to pod metadata.
-    namespace = req.get("namespace") or meta.get("namespace", "default")
-
-    # 0) Environment-based policy loading
-    environment = get_namespace_environment(
-        core_v1=core_v1,
-        namespace=namespace,
-        default_environment=DEFAULT_ENVIRONMENT
-    )
-
-    policy = load_policy_for_environment(
-        core_v1=core_v1,
-        configmap_name=POLICY_CONFIGMAP_NAME,
-        configmap_namespace=POLICY_CONFIGMAP_NAMESPACE,
-        environment=environment
-    )
+    # Pod-scoped declarative rules see the whole pod whenever rules run;
+    # changed_pod only skips updates that no rule or scope selection reads.
+    full_pod = pod
+
+    # UPDATE: only changed containers / volumes are re-evaluated, or the
+    # whole pod when pod-level fields (or labels a policy reads) changed.
+    if req.get("operation") == "UPDATE":
+        old_pod = pod_from_object(kind, req.get("oldObject", {}) or {}, namespace)
+        if old_pod is not None:
+            pod = changed_pod(old_pod, full_pod, policy_store.snapshot.reads_pod_labels)
+
+            if pod is None:
+                if replaying():
+                    return admission_response(uid, True, "No policy-relevant changes")
+
+                ADMISSION_UPDATE_UNCHANGED.inc()
+                ADMISSION_ALLOWED.inc()
+                observe_latency(start_time, uid, "allow", "unchanged")
+
+                log_decision(
+                    level="info",
+                    uid=uid,
+                    decision="ALLOW",
+                    policy="unchanged",
+                    environment="-",
+                    namespace=namespace,
+                    pod_name=pod_name,
+                    reason="No policy-relevant changes",
+                    start_time=start_time
+                )
 
-    # 1) Storage policy
-    
-# 1) Storage policy
-    ok, msg, storage_warnings = validate_storage(
-        pod,
-        core_v1,
-        ALLOWED_STORAGE_CLASSES,
-        environment
-    )
+                return admission_response(uid, True, "No policy-relevant changes")
 
-    if not ok:
-        ADMISSION_DENIED.inc()
-        ADMISSION_POD_DENIED.labels(
-            namespace=namespace,
-            pod_name=pod_name,
-            environment=environment,
-            policy="storage",
-            reason=msg,
-            image=image_text
-        ).inc()
-        ADMISSION_LATENCY.observe(time.time() - start_time)
+            spec = pod["spec"]
 
-        log_decision(
-            level="warning",
-            uid=uid,
-            decision="DENY",
-            policy="storage",
-            environment=environment,
-            namespace=namespace,
-            pod_name=pod_name,
-            reason=msg,
-            start_time=start_time
+    # 0) Environment-based policy loading
+    # The environment comes from the namespace 'environment' label;
+    # scoped overrides are selected by namespace and pod labels.
+    with stage("namespace_lookup") as st:
+        namespace_labels = get_namespace_labels(core_v1=core_v1, namespace=namespace)
+        environment = namespace_labels.get("environment", DEFAULT_ENVIRONMENT)
+        st.set_attribute("environment", environment)
+
+    # The compiled sections come from the policy snapshot, so the rule
+    # stages below do no per-request compilation.
+    with stage("policy_load") as st:
+        compiled, applied_scopes = policy_store.compiled_for(
+            environment,
+            namespace_labels,
+            meta.get("labels", {}) or {}
         )
+        policy = compiled.policy
+        st.set_attribute("scopes", ",".join(applied_scopes))
+        st.set_attribute("policy_version", policy_store.snapshot.version)
 
-        save_audit_log(
-            namespace=namespace,
-            pod_name=pod_name,
-            image=image_text,
-            decision="deny",
-            policy="storage",
-            reason=msg,
-            environment=environment
+    # 1) Storage policy
+    # PVC lookups inside validate_storage are timed separately as pvc_lookup.
+    with stage("rule_storage") as st:
+        ok, msg, storage_warnings = validate_storage(
+            pod,
+            core_v1,
+            ALLOWED_STORAGE_CLASSES,
+            environment,
+            policy
         )
+        st.outcome = "deny" if not ok else ("warn" if storage_warnings else "pass")
+
+    if not ok:
+        return deny_request(uid, "storage", msg, environment, namespace, pod_name, image_text, start_time)
 
-        return admission_response(uid, False, msg)
-    
     # 2) Image policy
     # dev  -> latest tag is allowed
     # test -> latest or tagless images are denied
-    ok, msg = validate_images(spec, policy)
-    if not ok:
-        ADMISSION_DENIED.inc()
-        ADMISSION_POD_DENIED.labels(
-            namespace=namespace,
-            pod_name=pod_name,
-            environment=environment,
-            policy="image",
-            reason=msg,
-            image=image_text
-        ).inc()
-        ADMISSION_LATENCY.observe(time.time() - start_time)
-
-        log_decision(
-            level="warning",
-            uid=uid,
-            decision="DENY",
-            policy="image",
-            environment=environment,
-            namespace=namespace,
-            pod_name=pod_name,
-            reason=msg,
-            start_time=start_time
-        )
-
-        save_audit_log(
-            namespace=namespace,
-            pod_name=pod_name,
-            image=image_text,
-            decision="deny",
-            policy="image",
-            reason=msg,
-            environment=environment
-        )
+    with stage("rule_image") as st:
+        ok, msg = validate_images(spec, policy, compiled.image)
+        st.outcome = "pass" if ok else "deny"
 
-        return admission_response(uid, False, msg)
+    if not ok:
+        return deny_request(uid, "image", msg, environment, namespace, pod_name, image_text, start_time)
 
     # 3) Security policy
     # dev  -> root user and hostpath returns warning but does not deny
     # test -> root user and hostpath denied
-    ok, msg, security_warnings = validate_security(spec, policy)
+    with stage("rule_security") as st:
+        ok, msg, security_warnings = validate_security(spec, policy)
+        st.outcome = "deny" if not ok else ("warn" if security_warnings else "pass")
+
     warnings = (storage_warnings or []) + (security_warnings or [])
     if not ok:
-        ADMISSION_DENIED.inc()
-        ADMISSION_POD_DENIED.labels(
-            namespace=namespace,
-            pod_name=pod_name,
-            environment=environment,
-            policy="security",
-            reason=msg,
-            image=image_text
-        ).inc()
-        ADMISSION_LATENCY.observe(time.time() - start_time)
-
-        log_decision(
-            level="warning",
-            uid=uid,
-            decision="DENY",
-            policy="security",
-            environment=environment,
-            namespace=namespace,
-            pod_name=pod_name,
-            reason=msg,
-            start_time=start_time
-        )
-
-        save_audit_log(
-            namespace=namespace,
-            pod_name=pod_name,
-            image=image_text,
-            decision="deny",
-            policy="security",
-            reason=msg,
-            environment=environment
-        )
-
-        return admission_response(uid, False, msg)
+        return deny_request(uid, "security", msg, environment, namespace, pod_name, image_text, start_time)
 
     # 4) Resource policy
     # Resource requests and limits are mandatory in both dev and test.
-    if policy.get("requireResources", True):
-        ok, msg = validate_resources(spec)
-        if not ok:
-            ADMISSION_DENIED.inc()
-            ADMISSION_POD_DENIED.labels(
-                namespace=namespace,
-                pod_name=pod_name,
-                environment=environment,
-                policy="resources",
-                reason=msg,
-                image=image_text
-            ).inc()
-            ADMISSION_LATENCY.observe(time.time() - start_time)
-
-            log_decision(
-                level="warning",
-                uid=uid,
-                decision="DENY",
-                policy="resources",
-                environment=environment,
-                namespace=namespace,
-                pod_name=pod_name,
-                reason=msg,
-                start_time=start_time
-            )
+    # Optional resourcePolicy bounds and limit/request ratios per environment.
+    with stage("rule_resources") as st:
+        ok, msg = validate_resources(spec, policy, compiled.resources)
+        st.outcome = "pass" if ok else "deny"
 
-            save_audit_log(
-                namespace=namespace,
-                pod_name=pod_name,
-                image=image_text,
-                decision="deny",
-                policy="resources",
-                reason=msg,
-                environment=environment
-            )
+    if not ok:
+        return deny_request(uid, "resources", msg, environment, namespace, pod_name, image_text, start_time)
+
+    # 5) Declarative rules from the policy 'rules' key
+    with stage("rule_custom") as st:
+        ok, msg, rule_warnings = validate_rules(full_pod, spec, policy, compiled.rules)
+        st.outcome = "deny" if not ok else ("warn" if rule_warnings else "pass")
 
-            return admission_response(uid, False, msg)
+    warnings += rule_warnings or []
+    if not ok:
+        return deny_request(uid, "rules", msg, environment, namespace, pod_name, image_text, start_time)
+
+    # Replays (/debug/explain) stop here: no metrics, decision log or audit row.
+    if replaying():
+        return admission_response(uid, True, "Allowed with warnings" if warnings else "Allowed", warnings)
 
     # Allow
     ADMISSION_ALLOWED.inc()
-    ADMISSION_LATENCY.observe(time.time() - start_time)
-    ADMISSION_POD_ALLOWED.labels(
-        namespace=namespace,
-        pod_name=pod_name,
-        environment=environment,
-        image=image_text
-    ).inc()
+    if warnings:
+        warning_policy = "storage" if storage_warnings else ("security" if security_warnings else "rules")
+        observe_latency(start_time, uid, "allow_with_warning", warning_policy)
+    else:
+        observe_latency(start_time, uid, "allow", "all")
+    if POD_LEVEL_METRICS:
+        ADMISSION_POD_ALLOWED.labels(
+            namespace=namespace,
+            pod_name=pod_name,
+            environment=environment,
+            image=image_text
+        ).inc()
 
     if warnings:
-        warning_policy = "storage" if storage_warnings else "security"
         warning_reason = "; ".join(warnings)
 
         log_decision(
@@ -450,15 +617,24 @@ async def validate(request: Request):
             warnings=warnings
         )
 
-        save_audit_log(
-            namespace=namespace,
-            pod_name=pod_name,
-            image=image_text,
+        ADMISSION_DECISIONS.labels(
             decision="allow_with_warning",
             policy=warning_policy,
-            reason=warning_reason,
+            namespace=namespace,
             environment=environment
-        )
+        ).inc()
+        admission_sketches.record(namespace, pod_name, images, "allow_with_warning", warning_policy)
+
+        with stage("audit_write"):
+            save_audit_log(
+                namespace=namespace,
+                pod_name=pod_name,
+                image=image_text,
+                decision="allow_with_warning",
+                policy=warning_policy,
+                reason=warning_reason,
+                environment=environment
+            )
 
         return admission_response(uid, True, "Allowed with warnings", warnings)
 
@@ -474,27 +650,167 @@ async def validate(request: Request):
         start_time=start_time
     )
 
-    save_audit_log(
-        namespace=namespace,
-        pod_name=pod_name,
-        image=image_text,
+    ADMISSION_DECISIONS.labels(
         decision="allow",
         policy="all",
-        reason="Allowed",
+        namespace=namespace,
         environment=environment
-    )
+    ).inc()
+    admission_sketches.record(namespace, pod_name, images, "allow", "all")
+
+    with stage("audit_write"):
+        save_audit_log(
+            namespace=namespace,
+            pod_name=pod_name,
+            image=image_text,
+            decision="allow",
+            policy="all",
+            reason="Allowed",
+            environment=environment
+        )
 
     return admission_response(uid, True, "Allowed")
 
+# =====================================================
+# EXPLAIN TRACES
+# =====================================================
+# Pods annotated with EXPLAIN_ANNOTATION=true are evaluated with a trace
+# (validate_in_span); finished traces are kept in a bounded ring buffer.
+EXPLAIN_MAX_BODY = 4 * 1024 * 1024
+
+
+def replay_request(req: dict) -> dict:
+    """Evaluates an AdmissionReview request as a dry run and returns its trace."""
+    with explaining(req, "replay") as trace:
+        trace.finish(evaluate_pod_request(req, trace.uid, time.time()))
+    return trace.to_dict()
+
+
+def explain_endpoint(environ, start_response):
+    """
+    GET  /debug/explain            -> buffered traces, newest first
+    GET  /debug/explain?uid=<uid>  -> one trace
+    POST /debug/explain            -> replays the AdmissionReview in the body
+    POST /debug/explain?uid=<uid>  -> replays the request of a buffered trace
+
+    Requires 'Authorization: Bearer <PROFILER_TOKEN>'.
+    """
+    if not authorized(environ):
+        return respond(start_response, "401 Unauthorized", {"error": "unauthorized"})
+
+    uid = query_params(environ).get("uid")
+    buffered = explain_buffer.get(uid) if uid else None
+    if uid and buffered is None:
+        return respond(start_response, "404 Not Found", {"error": f"no explain trace for uid {uid}"})
+
+    if environ.get("REQUEST_METHOD") != "POST":
+        if buffered is None:
+            return respond(start_response, "200 OK", {"traces": explain_buffer.recent()})
+        return respond(start_response, "200 OK", buffered.to_dict())
+
+    if buffered is not None:
+        return respond(start_response, "200 OK", replay_request(buffered.req))
+
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if length <= 0 or length > EXPLAIN_MAX_BODY:
+        return respond(start_response, "400 Bad Request", {"error": "an AdmissionReview body is required"})
+
+    try:
+        body = json.loads(environ["wsgi.input"].read(length))
+    except ValueError:
+        return respond(start_response, "400 Bad Request", {"error": "body is not valid JSON"})
+
+    req = body.get("request") if isinstance(body, dict) else None
+    if not isinstance(req, dict) or not isinstance(req.get("object"), dict):
+        return respond(start_response, "400 Bad Request", {"error": "body must be an AdmissionReview with request.object"})
+
+    return respond(start_response, "200 OK", replay_request(req))
+
+
+if WEBHOOK_ROLE != "ui":
+    add_route("/debug/explain", explain_endpoint)
+
+# =====================================================
+# MUTATING WEBHOOK ENDPOINT
+# =====================================================
+@admission_router.post(
+    "/mutate",
+    include_in_schema=False
+)
+
+async def mutate(request: Request):
+    with lifecycle.track():
+        body = await request.json()
+
+        req = body.get("request", {}) or {}
+        uid = req.get("uid", "")
+
+        # Namespace lookups block on the apiserver on a cache miss; run in the
+        # threadpool like /validate so the event loop keeps serving.
+        return await run_in_threadpool(mutate_in_span, req, uid)
+
+
+def mutate_in_span(req: dict, uid: str) -> dict:
+    with span("admission.mutate", uid=uid):
+        return mutate_pod_request(req, uid)
+
+
+def mutate_pod_request(req: dict, uid: str) -> dict:
+    """
+    Adds the environment's secure defaults (policy 'defaults' key) to Pods
+    and workload pod templates as a JSONPatch. Values set in the manifest are
+    kept; the validating webhook still evaluates the mutated object.
+    Mutation never denies: on errors the object is admitted unchanged.
+    """
+    kind = req.get("kind", {}).get("kind")
+    obj = req.get("object", {}) or {}
+    namespace = req.get("namespace") or (obj.get("metadata", {}) or {}).get("namespace", "default")
+
+    pointer = template_spec_pointer(kind)
+    pod = pod_from_object(kind, obj, namespace)
+    if pointer is None or pod is None:
+        return mutation_response(uid, [])
+
+    with stage("namespace_lookup"):
+        namespace_labels = get_namespace_labels(core_v1=core_v1, namespace=namespace)
+        environment = namespace_labels.get("environment", DEFAULT_ENVIRONMENT)
+
+    with stage("policy_load"):
+        compiled, _ = policy_store.compiled_for(
+            environment,
+            namespace_labels,
+            (pod.get("metadata", {}) or {}).get("labels", {}) or {}
+        )
+
+    with stage("mutation") as st:
+        try:
+            plan = compiled.mutation if compiled.mutation is not None else compile_mutation_plan(compiled.policy)
+        except (ValueError, TypeError, AttributeError) as e:
+            st.outcome = "invalid"
+            ADMISSION_MUTATIONS.labels(result="invalid_defaults").inc()
+            logger.warning("Invalid mutation defaults for environment %s: %s", environment, e)
+            return mutation_response(uid, [])
+
+        patch = build_patch(plan, pod.get("spec", {}) or {}, pointer)
+        st.outcome = "patched" if patch else "unchanged"
+
+    ADMISSION_MUTATIONS.labels(result="patched" if patch else "unchanged").inc()
+    return mutation_response(uid, patch)
+
+
 # =====================================================
 # HEALTH ENDPOINT
 # =====================================================
-@app.get(
+@admission_router.get(
     "/health",
     tags=["Health"],
     summary="Check webhook health",
     description="Returns basic health status of the admission webhook application."
 )
+@ui_router.get("/health", include_in_schema=False)
 async def health():
     return {
         "status": "healthy",
@@ -502,10 +818,25 @@ async def health():
     }
 
 
+# =====================================================
+# READINESS ENDPOINT
+# =====================================================
+# 503 until startup finished and again from the first SIGTERM, so the
+# apiserver stops routing admissions here before the drain starts.
+@admission_router.get("/ready", include_in_schema=False)
+@ui_router.get("/ready", include_in_schema=False)
+async def ready():
+    if not lifecycle.ready:
+        status = "draining" if lifecycle.draining else "not ready"
+        return JSONResponse(status_code=503, content={"status": status})
+
+    return {"status": "ready"}
+
+
 # =====================================================
 # DATABASE HEALTH ENDPOINT
 # =====================================================
-@app.get(
+@ui_router.get(
     "/health/db",
     tags=["Health"],
     summary="Check PostgreSQL health",
@@ -525,7 +856,7 @@ async def database_health():
 # =====================================================
 # AUDIT SUMMARY ENDPOINT
 # =====================================================
-@app.get(
+@ui_router.get(
     "/audit/summary",
     tags=["Audit Analytics"],
     summary="Get admission audit summary",
@@ -550,16 +881,16 @@ async def audit_summary():
 # UI API ENDPOINTS
 # =====================================================
 
-@app.get("/api/namespaces", tags=["UI API"])
+@ui_router.get("/api/namespaces", tags=["UI API"])
 async def get_namespaces():
     try:
-        res = await run_in_threadpool(core_v1.list_namespace)
+        res = await run_in_threadpool(ui_core_v1.list_namespace)
         namespaces = [ns.metadata.name for ns in res.items]
         return {"namespaces": namespaces}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
-@app.get("/api/dashboard/stats", tags=["UI API"])
+@ui_router.get("/api/dashboard/stats", tags=["UI API"])
 async def dashboard_stats():
     stats = get_dashboard_stats()
     if "error" in stats:
@@ -567,10 +898,50 @@ async def dashboard_stats():
     return stats
 
 
-@app.get("/api/pods", tags=["UI API"])
+def merged_sketches(window: int):
+    """Local sketches (unless this is the UI process) merged with SKETCH_SOURCES."""
+    merged = admission_sketches.window(window) if WEBHOOK_ROLE != "ui" else None
+    sources = 1 if merged is not None else 0
+    errors = []
+    for url in SKETCH_SOURCES:
+        try:
+            remote = fetch_window(url, window)
+        except Exception as e:
+            errors.append({"source": url, "error": str(e)})
+            continue
+        if merged is None:
+            merged = remote
+        else:
+            merged.merge(remote)
+        sources += 1
+    return merged, sources, errors
+
+
+@ui_router.get("/api/analytics/top", tags=["UI API"])
+async def analytics_top(window: int = SKETCH_MAX_WINDOW, k: int = 10, dimension: Optional[str] = None):
+    """
+    Approximate most-denied policies, namespaces, images and pods, plus
+    distinct counts, over the last `window` seconds (bucket granularity).
+    Counts are Count-Min upper bounds; distinct counts are HyperLogLog
+    estimates (~1.6% error).
+    """
+    window = max(1, min(window, SKETCH_MAX_WINDOW))
+    merged, sources, errors = await run_in_threadpool(merged_sketches, window)
+    if merged is None:
+        return JSONResponse(status_code=503, content={"error": "no sketch source reachable", "sources": errors})
+
+    summary = merged.summary(max(1, min(k, 50)))
+    if dimension is not None:
+        if dimension not in summary["top"]:
+            return JSONResponse(status_code=400, content={"error": f"unknown dimension: {dimension}"})
+        summary["top"] = {dimension: summary["top"][dimension]}
+    return {"window": window, "sources": sources, "errors": errors, **summary}
+
+
+@ui_router.get("/api/pods", tags=["UI API"])
 async def get_pods():
     try:
-        res = await run_in_threadpool(core_v1.list_pod_for_all_namespaces)
+        res = await run_in_threadpool(ui_core_v1.list_pod_for_all_namespaces)
         pods = []
         for p in res.items:
             exact_status = p.status.phase or 'Unknown'
@@ -593,20 +964,55 @@ async def get_pods():
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
-@app.delete("/api/pods", tags=["UI API"])
+@ui_router.delete("/api/pods", tags=["UI API"])
 async def delete_pod(name: str, namespace: str):
     if not name or not namespace:
         return JSONResponse(status_code=400, content={"error": "Name ve namespace gereklidir."})
-    try:
-        await run_in_threadpool(core_v1.delete_namespaced_pod, name=name, namespace=namespace)
-        return {"success": True, "message": f"Pod {name} başarıyla silindi."}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    result = await run_in_threadpool(pod_operations.delete_pod, ui_core_v1, name, namespace)
+    if not result["success"]:
+        return JSONResponse(status_code=500, content={"error": result["message"]})
+    return result
+
+
+def bulk_items(body: dict, key: str):
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return JSONResponse(status_code=400, content={"error": f"'{key}' listesi gereklidir."})
+    if len(items) > pod_operations.BULK_MAX_ITEMS:
+        return JSONResponse(status_code=400, content={"error": f"En fazla {pod_operations.BULK_MAX_ITEMS} öğe gönderilebilir."})
+    return items
+
 
-@app.get("/api/logs", tags=["UI API"])
+@ui_router.post("/api/pods/bulk-delete", tags=["UI API"])
+async def bulk_delete_pods(request: Request):
+    """
+    Deletes many pods with bounded parallelism.
+    Body: {"pods": [{"name", "namespace"}], "concurrency"?, "gracePeriodSeconds"?}
+    Streams one NDJSON result per pod, then a summary line.
+    """
+    body = await request.json()
+    items = bulk_items(body, "pods")
+    if isinstance(items, JSONResponse):
+        return items
+    grace_period = body.get("gracePeriodSeconds")
+
+    def delete(item: dict) -> dict:
+        name, namespace = item.get("name"), item.get("namespace")
+        if not name or not namespace:
+            return {"success": False, "message": "Name ve namespace gereklidir.", "reason": "INVALID"}
+        return {"name": name, "namespace": namespace,
+                **pod_operations.delete_pod(ui_core_v1, name, namespace, grace_period)}
+
+    return StreamingResponse(
+        pod_operations.run_bounded("delete", items, delete, int(body.get("concurrency", pod_operations.BULK_MAX_CONCURRENCY))),
+        media_type="application/x-ndjson"
+    )
+
+
+@ui_router.get("/api/logs", tags=["UI API"])
 async def get_logs():
     try:
-        pods = await run_in_threadpool(core_v1.list_namespaced_pod, namespace="webhook-system")
+        pods = await run_in_threadpool(ui_core_v1.list_namespaced_pod, namespace="webhook-system")
         webhook_pod = None
         for p in pods.items:
             if p.metadata.name and p.metadata.name.startswith("pod-security-webhook-") and p.status.phase == "Running" and not p.metadata.deletion_timestamp:
@@ -617,7 +1023,7 @@ async def get_logs():
             return {"logs": "Webhook pod bulunamadı. Lütfen webhook-system namespace'ini ve pod isimlerini kontrol edin."}
         
         logs = await run_in_threadpool(
-            core_v1.read_namespaced_pod_log,
+            ui_core_v1.read_namespaced_pod_log,
             name=webhook_pod.metadata.name,
             namespace="webhook-system",
             container="webhook",
@@ -628,205 +1034,121 @@ async def get_logs():
     except Exception as e:
         return {"logs": f"Loglar alınırken hata oluştu: {str(e)}"}
 
-@app.post("/api/pod", tags=["UI API"])
+@ui_router.post("/api/pod", tags=["UI API"])
 async def create_pod(request: Request):
     try:
         body = await request.json()
         pod_name = f"test-pod-{int(time.time())}"
-        
-        image = body.get("image")
-        if image == "unprivileged":
-            image = "nginxinc/nginx-unprivileged:alpine"
-        elif image == "latest":
-            image = "nginx:latest"
-        elif image == "alpine":
-            image = "nginx:alpine"
-            
-        containers_spec = {
-            "name": "test-container",
-            "image": image,
-            "securityContext": {},
-            "volumeMounts": [],
-            "env": []
-        }
-        
-        # Kubernetes API'sinin çelişkileri (privileged=True & allowPrivilegeEscalation=False) 
-        # yakalayabilmesi için alanları gizlemek yerine açıkça True/False olarak gönderiyoruz
-        if "privileged" in body:
-            containers_spec["securityContext"]["privileged"] = bool(body.get("privileged"))
-        if "allowPrivilegeEscalation" in body:
-            containers_spec["securityContext"]["allowPrivilegeEscalation"] = bool(body.get("allowPrivilegeEscalation"))
-            
-        pod_manifest = {
-            "apiVersion": "v1",
-            "kind": "Pod",
-            "metadata": {
-                "name": pod_name,
-                "namespace": body.get("namespace", "default"),
-                "labels": {
-                    "app": "webhook-test"
-                },
-                "annotations": {}
-            },
-            "spec": {
-                "securityContext": {},
-                "containers": [containers_spec],
-                "volumes": []
-            }
-        }
-        
-        if body.get("runAsNonRoot"):
-            pod_manifest["spec"]["securityContext"]["runAsNonRoot"] = True
-            
-        if body.get("runAsRoot"):
-            pod_manifest["spec"]["securityContext"]["runAsUser"] = 0
-            
-        if body.get("vaultAnnotations"):
-            pod_manifest["metadata"]["annotations"]["vault.hashicorp.com/agent-inject"] = "true"
-            pod_manifest["metadata"]["annotations"]["vault.hashicorp.com/role"] = "app-role"
-            
-        volume_type = body.get("volumeType")
-        if volume_type == "hostPath":
-            pod_manifest["spec"]["volumes"].append({
-                "name": "test-vol",
-                "hostPath": {"path": "/tmp/test"}
-            })
-            containers_spec["volumeMounts"].append({
-                "name": "test-vol",
-                "mountPath": "/data"
-            })
-        elif volume_type == "emptyDir":
-            pod_manifest["spec"]["volumes"].append({
-                "name": "test-vol",
-                "emptyDir": {}
-            })
-            containers_spec["volumeMounts"].append({
-                "name": "test-vol",
-                "mountPath": "/data"
-            })
-        elif volume_type == "pvc":
-            # Gelen pvcName aslında seçilen StorageClass'ı temsil ediyor ('standard-pvc' veya 'longhorn-pvc')
-            sc_selection = body.get("pvcName", "standard-pvc")
-            sc_name = "standard" if "standard" in sc_selection else "longhorn"
-            
-            pvc_name = f"pvc-{pod_name}"
-            pvc_manifest = {
-                "apiVersion": "v1",
-                "kind": "PersistentVolumeClaim",
-                "metadata": {
-                    "name": pvc_name,
-                    "namespace": pod_manifest["metadata"]["namespace"]
-                },
-                "spec": {
-                    "accessModes": ["ReadWriteOnce"],
-                    "storageClassName": sc_name,
-                    "resources": {
-                        "requests": {
-                            "storage": "1Gi"
-                        }
-                    }
-                }
-            }
-            
-            # PVC'yi Kubernetes üzerinde oluştur
-            try:
-                await run_in_threadpool(
-                    core_v1.create_namespaced_persistent_volume_claim,
-                    namespace=pod_manifest["metadata"]["namespace"],
-                    body=pvc_manifest
-                )
-                await asyncio.sleep(1)  # API Cache'in senkronize olması için kısa bir bekleme
-
-            except Exception as pvc_err:
-                return JSONResponse(status_code=400, content={"success": False, "message": f"PVC oluşturulamadı: {str(pvc_err)}", "reason": "PVC_CREATION_FAILED"})
-            
-            pod_manifest["spec"]["volumes"].append({
-                "name": "test-vol",
-                "persistentVolumeClaim": {"claimName": pvc_name}
-            })
-            containers_spec["volumeMounts"].append({
-                "name": "test-vol",
-                "mountPath": "/data"
-            })
-            
-        if body.get("useNativeSecret"):
-            containers_spec["env"].append({
-                "name": "SECRET_KEY",
-                "valueFrom": {
-                    "secretKeyRef": {
-                        "name": "my-secret",
-                        "key": "password"
-                    }
-                }
-            })
-            
-        if body.get("includeResources"):
-            containers_spec["resources"] = {
-                "requests": {"cpu": "100m", "memory": "128Mi"},
-                "limits": {"cpu": "200m", "memory": "256Mi"}
-            }
-            
-        if not containers_spec["volumeMounts"]:
-            del containers_spec["volumeMounts"]
-        if not containers_spec["env"]:
-            del containers_spec["env"]
-        if not pod_manifest["spec"]["volumes"]:
-            del pod_manifest["spec"]["volumes"]
-        if not pod_manifest["metadata"]["annotations"]:
-            del pod_manifest["metadata"]["annotations"]
-            
-        try:
-            res = await run_in_threadpool(
-                core_v1.create_namespaced_pod,
-                namespace=pod_manifest["metadata"]["namespace"],
-                body=pod_manifest
-            )
-            return {"success": True, "message": "Pod başarıyla oluşturuldu (ALLOW)", "pod": res.to_dict()}
-        except Exception as err:
-            import json
-            try:
-                err_body = json.loads(err.body)
-                msg = err_body.get("message", str(err))
-                reason = err_body.get("reason", "DENY")
-            except:
-                msg = str(err)
-                reason = "DENY"
-            return JSONResponse(status_code=400, content={"success": False, "message": msg, "reason": reason})
-            
+        status_code, result = await run_in_threadpool(pod_operations.create_test_pod, ui_core_v1, body, pod_name)
+        if status_code != 200:
+            return JSONResponse(status_code=status_code, content=result)
+        return result
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+
+@ui_router.post("/api/pods/bulk-create", tags=["UI API"])
+async def bulk_create_pods(request: Request):
+    """
+    Creates many test pods (same body format as /api/pod) with bounded
+    parallelism. Body: {"pods": [{...}], "concurrency"?}
+    Streams one NDJSON result per pod, then a summary line.
+    """
+    body = await request.json()
+    items = bulk_items(body, "pods")
+    if isinstance(items, JSONResponse):
+        return items
+    prefix = f"test-pod-{int(time.time())}"
+
+    def create(indexed: tuple) -> dict:
+        index, pod_body = indexed
+        pod_name = f"{prefix}-{index}"
+        _, result = pod_operations.create_test_pod(ui_core_v1, pod_body, pod_name)
+        result.pop("pod", None)
+        return {"name": pod_name, "namespace": pod_body.get("namespace", "default"), **result}
+
+    return StreamingResponse(
+        pod_operations.run_bounded("create", list(enumerate(items)), create, int(body.get("concurrency", pod_operations.BULK_MAX_CONCURRENCY))),
+        media_type="application/x-ndjson"
+    )
+
 # =====================================================
 # NEXT.JS UI STATIC FILE SERVING
 # =====================================================
 
-@app.exception_handler(404)
+# The exported UI is loaded into memory once (static_assets.py); the
+# admission-only process never serves it and skips the load.
+static_path = os.path.join(os.path.dirname(__file__), "static")
+static_assets = (
+    StaticAssets(static_path)
+    if WEBHOOK_ROLE != "admission" and os.path.isdir(static_path)
+    else None
+)
+
+
 async def custom_404_handler(request: Request, exc):
-    static_path = os.path.join(os.path.dirname(__file__), "static")
-    path = request.url.path
-    
-    html_file = os.path.join(static_path, path.lstrip('/') + '.html')
-    if os.path.isfile(html_file):
-        with open(html_file, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-            
-    index_file = os.path.join(static_path, "index.html")
-    if os.path.isfile(index_file):
-        with open(index_file, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read(), status_code=200)
-    
+    # Unmatched routes get the page of the same name, else index.html
+    # (client-side routing); both come from the in-memory route map.
+    # Missing /_next/ assets and unknown /api/ routes stay 404.
+    if static_assets is not None:
+        asset = static_assets.resolve(request.url.path)
+        if asset is not None:
+            return static_assets.response(asset, request.headers)
+
     return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
-static_path = os.path.join(os.path.dirname(__file__), "static")
-if os.path.isdir(static_path):
-    app.mount("/", StaticFiles(directory=static_path, html=True), name="static")
-
-if __name__ == "__main__":
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=8443,
-        ssl_keyfile="/tls/tls.key",
-        ssl_certfile="/tls/tls.crt",
-        access_log=False
-    )
\ No newline at end of file
+# =====================================================
+# APPLICATIONS
+# =====================================================
+WEBHOOK_THREADS = int(os.getenv("WEBHOOK_THREADS", "40"))
+
+
+async def configure_threadpool():
+    # Size of the threadpool behind run_in_threadpool for this process.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = WEBHOOK_THREADS
+
+
+async def mark_ready():
+    lifecycle.mark_ready()
+
+
+def manage_lifecycle(target: FastAPI) -> None:
+    target.add_event_handler("startup", configure_threadpool)
+    target.add_event_handler("startup", mark_ready)
+    # Runs once uvicorn stopped waiting for in-flight requests.
+    target.add_event_handler("shutdown", lifecycle.shutdown)
+
+
+def serve_ui(target: FastAPI) -> None:
+    target.add_exception_handler(404, custom_404_handler)
+    if static_assets is not None:
+        target.mount("/", static_assets, name="static")
+
+
+# Combined app (WEBHOOK_ROLE=all): admission and UI on one listener.
+app.include_router(admission_router)
+app.include_router(ui_router)
+manage_lifecycle(app)
+serve_ui(app)
+
+# Split mode (serve.py, SERVE_MODE=split): separate processes and listeners.
+admission_app = FastAPI(
+    title="Kubernetes Admission Webhook",
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None
+)
+admission_app.include_router(admission_router)
+manage_lifecycle(admission_app)
+
+ui_app = FastAPI(
+    title=app.title,
+    description=app.description,
+    version=app.version,
+    docs_url="/docs",
+    redoc_url="/redoc",
+    openapi_url="/openapi.json"
+)
+ui_app.include_router(ui_router)
+manage_lifecycle(ui_app)
+serve_ui(ui_app)
@@ -0,0 +1,316 @@
+"""
+Columnar export of admission_audit_logs for offline analytics.
+
+Closed UTC days are streamed out of PostgreSQL with a server-side cursor and
+written as one zstd-compressed Parquet file per day, with dictionary-encoded
+low-cardinality columns. Queries then run over the files with vectorized
+Arrow group-by, without touching the production database.
+
+Usage:
+    python src/audit_export.py export --dir /data/audit [--interval 3600]
+    python src/audit_export.py query --dir /data/audit --since 2026-09-01 \\
+        --decision deny --group-by policy,namespace [--top 20] [--json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional
+
+import psycopg2
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed where exports are written or queried
+    pa = None
+
+logger = logging.getLogger("admission-webhook.audit-export")
+
+# =====================================================
+# CONFIG
+# =====================================================
+DB_HOST = os.getenv("DB_HOST", "postgres.db.svc.cluster.local")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_NAME = os.getenv("DB_NAME", "webhook_audit")
+DB_USER = os.getenv("DB_USER", "webhook_user")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "webhook_pass")
+
+AUDIT_EXPORT_DIR = os.getenv("AUDIT_EXPORT_DIR", "/var/lib/webhook/audit-export")
+AUDIT_EXPORT_BATCH = int(os.getenv("AUDIT_EXPORT_BATCH", "50000"))
+AUDIT_EXPORT_COMPRESSION = os.getenv("AUDIT_EXPORT_COMPRESSION", "zstd")
+
+COLUMNS = ("created_at", "namespace", "pod_name", "image", "decision", "policy", "reason", "environment")
+# Few distinct values, repeated on every row -> stored as dictionary codes.
+DICTIONARY_COLUMNS = ("namespace", "image", "decision", "policy", "reason", "environment")
+
+FILE_PREFIX = "audit-"
+FILE_SUFFIX = ".parquet"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("audit export requires pyarrow (pip install pyarrow)")
+
+
+def _schema():
+    fields = [pa.field("created_at", pa.timestamp("us"))]
+    for column in COLUMNS[1:]:
+        kind = pa.dictionary(pa.int32(), pa.string()) if column in DICTIONARY_COLUMNS else pa.string()
+        fields.append(pa.field(column, kind))
+    return pa.schema(fields)
+
+
+def partition_path(directory: str, day: date) -> str:
+    return os.path.join(directory, f"{FILE_PREFIX}{day.isoformat()}{FILE_SUFFIX}")
+
+
+def _partition_day(filename: str) -> Optional[date]:
+    if not (filename.startswith(FILE_PREFIX) and filename.endswith(FILE_SUFFIX)):
+        return None
+    try:
+        return date.fromisoformat(filename[len(FILE_PREFIX):-len(FILE_SUFFIX)])
+    except ValueError:
+        return None
+
+
+# =====================================================
+# WRITING
+# =====================================================
+def write_partition(batches: Iterable[list[tuple]], path: str) -> int:
+    """
+    Writes row batches (tuples in COLUMNS order) to one Parquet file.
+    The file appears atomically, so a partial export is never queried.
+    Returns the row count.
+    """
+    _require_pyarrow()
+    schema = _schema()
+    tmp_path = path + ".tmp"
+    rows = 0
+
+    with pq.ParquetWriter(
+        tmp_path,
+        schema,
+        compression=AUDIT_EXPORT_COMPRESSION,
+        use_dictionary=list(DICTIONARY_COLUMNS)
+    ) as writer:
+        for batch in batches:
+            if not batch:
+                continue
+            columns = list(zip(*batch))
+            arrays = [pa.array(columns[0], type=pa.timestamp("us"))]
+            for name, values in zip(COLUMNS[1:], columns[1:]):
+                array = pa.array(values, type=pa.string())
+                arrays.append(array.dictionary_encode() if name in DICTIONARY_COLUMNS else array)
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(batch)
+
+    os.replace(tmp_path, path)
+    return rows
+
+
+def _connect():
+    return psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        connect_timeout=5
+    )
+
+
+def _fetch_day(conn, day: date, batch_size: int) -> Iterator[list[tuple]]:
+    # Named cursor -> rows stay on the server and arrive batch_size at a time.
+    with conn.cursor(name=f"audit_export_{day:%Y%m%d}") as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            f"""
+            SELECT {", ".join(COLUMNS)}
+            FROM admission_audit_logs
+            WHERE created_at >= %s AND created_at < %s
+            ORDER BY created_at
+            """,
+            (datetime.combine(day, datetime.min.time()), datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        )
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+
+
+def export_closed_partitions(directory: str, today: Optional[date] = None, batch_size: int = AUDIT_EXPORT_BATCH) -> list[tuple[date, int]]:
+    """
+    Exports every closed day (before today, UTC) that has no file yet.
+    Returns [(day, rows)] for the files written.
+    """
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    today = today or datetime.utcnow().date()
+    exported = []
+
+    conn = _connect()
+    try:
+        # Read-only snapshot; the exporter never blocks audit writes.
+        conn.set_session(readonly=True)
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(created_at) FROM admission_audit_logs WHERE created_at < %s",
+                        (datetime.combine(today, datetime.min.time()),))
+            first = cur.fetchone()[0]
+        conn.commit()
+
+        if first is None:
+            return exported
+
+        day = first.date()
+        while day < today:
+            path = partition_path(directory, day)
+            if not os.path.exists(path):
+                start = time.perf_counter()
+                rows = write_partition(_fetch_day(conn, day, batch_size), path)
+                conn.commit()
+                logger.info("Exported audit partition %s: %d rows in %.2fs", day, rows, time.perf_counter() - start)
+                exported.append((day, rows))
+            day += timedelta(days=1)
+    finally:
+        conn.close()
+
+    return exported
+
+
+# =====================================================
+# QUERYING
+# =====================================================
+def query(
+    directory: str,
+    group_by: list[str],
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    decisions: Optional[list[str]] = None,
+    namespaces: Optional[list[str]] = None,
+    top: Optional[int] = None
+) -> list[dict]:
+    """
+    Counts rows per group_by combination over the exported days in
+    [since, until). Files outside the range are never opened, and only the
+    columns the query needs are read.
+
+    Filters are applied to the aggregated groups, not to the rows: filter
+    columns join the group keys, the group-by runs on dictionary codes, and
+    the few resulting groups are filtered and summed. A row-level isin on
+    dictionary columns cost more than the whole aggregation.
+    """
+    _require_pyarrow()
+    for column in group_by:
+        if column not in COLUMNS[1:]:
+            raise ValueError(f"unknown column: {column}")
+
+    paths = []
+    for filename in sorted(os.listdir(directory)):
+        day = _partition_day(filename)
+        if day is None or (since and day < since) or (until and day >= until):
+            continue
+        paths.append(os.path.join(directory, filename))
+
+    if not paths:
+        return []
+
+    filters = {column: values for column, values in (("decision", decisions), ("namespace", namespaces)) if values}
+    keys = group_by + [column for column in filters if column not in group_by]
+
+    table = ds.dataset(paths, format="parquet").to_table(columns=keys)
+    if table.num_rows == 0:
+        return []
+
+    # Each file has its own dictionaries; unify them so group_by runs on codes.
+    table = table.unify_dictionaries().combine_chunks()
+    counts = table.group_by(keys).aggregate([([], "count_all")]).rename_columns(keys + ["count"])
+    # The result is small; decode the group keys so it can be filtered and sorted.
+    for column in keys:
+        index = counts.schema.get_field_index(column)
+        counts = counts.set_column(index, column, counts[column].cast(pa.string()))
+
+    if filters:
+        mask = None
+        for column, values in filters.items():
+            term = pc.is_in(counts[column], value_set=pa.array(values, pa.string()))
+            mask = term if mask is None else pc.and_(mask, term)
+        counts = counts.filter(mask)
+        if len(keys) > len(group_by):
+            counts = counts.group_by(group_by).aggregate([("count", "sum")]).rename_columns(group_by + ["count"])
+        if counts.num_rows == 0:
+            return []
+    counts = counts.sort_by([("count", "descending")] + [(column, "ascending") for column in group_by])
+    if top:
+        counts = counts.slice(0, top)
+    return counts.to_pylist()
+
+
+def _parse_list(value: Optional[str]) -> Optional[list[str]]:
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Columnar audit export and offline queries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="export closed days from PostgreSQL")
+    export_cmd.add_argument("--dir", default=AUDIT_EXPORT_DIR)
+    export_cmd.add_argument("--interval", type=int, default=0, help="repeat every N seconds (0 -> run once)")
+
+    query_cmd = commands.add_parser("query", help="aggregate exported days")
+    query_cmd.add_argument("--dir", default=AUDIT_EXPORT_DIR)
+    query_cmd.add_argument("--group-by", default="policy,namespace")
+    query_cmd.add_argument("--since", type=date.fromisoformat)
+    query_cmd.add_argument("--until", type=date.fromisoformat, help="exclusive")
+    query_cmd.add_argument("--decision", help="comma separated, e.g. deny")
+    query_cmd.add_argument("--namespace", help="comma separated")
+    query_cmd.add_argument("--top", type=int)
+    query_cmd.add_argument("--json", action="store_true")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.command == "export":
+        while True:
+            try:
+                export_closed_partitions(args.dir)
+            except Exception as e:
+                logger.error("Audit export failed: %s", e)
+                if not args.interval:
+                    sys.exit(1)
+            if not args.interval:
+                return
+            time.sleep(args.interval)
+
+    group_by = _parse_list(args.group_by)
+    start = time.perf_counter()
+    rows = query(
+        args.dir,
+        group_by,
+        since=args.since,
+        until=args.until,
+        decisions=_parse_list(args.decision),
+        namespaces=_parse_list(args.namespace),
+        top=args.top
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        widths = [max([len(column)] + [len(str(row[column])) for row in rows]) for column in group_by]
+        print("  ".join(column.ljust(width) for column, width in zip(group_by, widths)) + "  count")
+        for row in rows:
+            print("  ".join(str(row[column]).ljust(width) for column, width in zip(group_by, widths)) + f"  {row['count']}")
+    print(f"{len(rows)} groups in {elapsed * 1000:.0f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
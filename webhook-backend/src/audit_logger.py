@@ -1,6 +1,18 @@
 import os
+import json
+import time
+import queue
+import logging
+import threading
 import psycopg2
+import psycopg2.extras
 from datetime import datetime
+from typing import Callable, Optional
+
+from prometheus_client import Counter, Gauge
+
+
+logger = logging.getLogger("admission-webhook.audit")
 
 
 DB_HOST = os.getenv("DB_HOST", "postgres.db.svc.cluster.local")
@@ -9,53 +21,332 @@ DB_NAME = os.getenv("DB_NAME", "webhook_audit")
 DB_USER = os.getenv("DB_USER", "webhook_user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "webhook_pass")
 
+# AUDIT_MODE:
+# - buffered -> rows are queued and batch-inserted on a background thread (default)
+# - sync     -> one INSERT per decision on the request thread
+AUDIT_MODE = os.getenv("AUDIT_MODE", "buffered").lower()
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))
+AUDIT_RETRY_INTERVAL = float(os.getenv("AUDIT_RETRY_INTERVAL", "2"))
+# Rows that could not be written before exit; replayed from disk on the next
+# start and removed once committed.
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "/var/lib/webhook/audit-spill.jsonl")
+
+AUDIT_ROWS = Counter(
+    "admission_audit_rows_total",
+    "Audit rows by outcome (written, failed, dropped, spilled, replayed)",
+    ["result"]
+)
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "admission_audit_queue_depth",
+    "Audit rows waiting for the background writer"
+)
+
+INSERT_QUERY = """
+INSERT INTO admission_audit_logs
+(namespace, pod_name, image, decision, policy, reason, environment, created_at)
+VALUES %s;
+"""
+
+
+def _connect():
+    return psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        connect_timeout=2
+    )
+
+
+def _insert_rows(conn, rows: list[tuple]) -> None:
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_values(cur, INSERT_QUERY, rows, page_size=AUDIT_BATCH_SIZE)
+    conn.commit()
+
 
 def save_audit_log(namespace, pod_name, image, decision, policy, reason, environment):
     """
     Admission kararlarını PostgreSQL'e kaydeder.
     DB hatası olursa webhook karar mekanizmasını bozmaz.
     """
+    row = (namespace, pod_name, image, decision, policy, reason, environment, datetime.utcnow())
+
+    if _writer is not None:
+        _writer.submit(row)
+        return
 
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            connect_timeout=2
+        conn = _connect()
+        try:
+            _insert_rows(conn, [row])
+        finally:
+            conn.close()
+
+        AUDIT_ROWS.labels(result="written").inc()
+        logger.debug(
+            "[AUDIT] Saved admission decision to PostgreSQL | namespace=%s pod=%s decision=%s policy=%s",
+            namespace, pod_name, decision, policy
         )
 
-        cur = conn.cursor()
+    except Exception as e:
+        AUDIT_ROWS.labels(result="failed").inc()
+        logger.error("[AUDIT_ERROR] PostgreSQL audit log could not be saved: %s", e)
+
+
+# =====================================================
+# BUFFERED WRITER
+# =====================================================
+class AuditWriter:
+    """
+    Batches audit rows on a background thread over one connection, so the
+    admission request never waits for PostgreSQL. A failed batch is kept
+    and retried; close() flushes what is left and spills the rest to disk.
+    Rows spilled by an earlier run are replayed between live batches.
+    """
+
+    def __init__(self, spill_path: str = AUDIT_SPILL_PATH):
+        self.queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+        self.pending: list[tuple] = []
+        self.conn = None
+        self.stopping = threading.Event()
+        self.replay = SpillReplay(spill_path)
+        AUDIT_QUEUE_DEPTH.set_function(lambda: self.queue.qsize() + len(self.pending))
+        self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, row: tuple) -> None:
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            AUDIT_ROWS.labels(result="dropped").inc()
+
+    def _next_batch(self, limit: int, wait: float = AUDIT_FLUSH_INTERVAL) -> list[tuple]:
+        batch = []
+        deadline = time.monotonic() + wait
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, rows: list[tuple], result: str = "written") -> bool:
+        """Inserts and commits rows; False (rows kept by the caller) on failure."""
+        try:
+            if self.conn is None or self.conn.closed:
+                self.conn = _connect()
+            _insert_rows(self.conn, rows)
+        except Exception as e:
+            AUDIT_ROWS.labels(result="failed").inc(len(rows))
+            logger.error("[AUDIT_ERROR] %d audit rows could not be saved, retrying: %s", len(rows), e)
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            return False
+
+        AUDIT_ROWS.labels(result=result).inc(len(rows))
+        return True
+
+    def _write_pending(self) -> bool:
+        if not self.write(self.pending):
+            return False
+        self.pending = []
+        return True
 
-        insert_query = """
-        INSERT INTO admission_audit_logs
-        (namespace, pod_name, image, decision, policy, reason, environment, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+    def _run(self) -> None:
+        replaying = self.replay.pending()
+        while not self.stopping.is_set():
+            if not self.pending:
+                # While spilled rows remain, live rows are picked up without waiting.
+                self.pending = self._next_batch(AUDIT_BATCH_SIZE, 0 if replaying else AUDIT_FLUSH_INTERVAL)
+            if self.pending and not self._write_pending():
+                self.stopping.wait(AUDIT_RETRY_INTERVAL)
+                continue
+            if replaying:
+                try:
+                    replaying = self.replay.step(self.write)
+                except OSError as e:
+                    logger.error("[AUDIT_ERROR] Spilled audit rows could not be replayed: %s", e)
+                    replaying = False
+                if replaying and self.replay.failed:
+                    self.stopping.wait(AUDIT_RETRY_INTERVAL)
+
+    def close(self, timeout: float) -> tuple[int, int]:
+        """
+        Stops the writer, then writes the remaining rows until the deadline.
+        Rows still unwritten are appended to AUDIT_SPILL_PATH.
+        Returns (rows written, rows spilled).
         """
+        deadline = time.monotonic() + timeout
+        self.stopping.set()
+        self.thread.join(max(deadline - time.monotonic(), 0))
 
-        cur.execute(
-            insert_query,
-            (
-                namespace,
-                pod_name,
-                image,
-                decision,
-                policy,
-                reason,
-                environment,
-                datetime.utcnow()
-            )
-        )
+        written = 0
+        while time.monotonic() < deadline and not self.thread.is_alive():
+            if not self.pending:
+                self.pending = [self.queue.get_nowait() for _ in range(min(AUDIT_BATCH_SIZE, self.queue.qsize()))]
+            if not self.pending:
+                break
+            count = len(self.pending)
+            if not self._write_pending():
+                break
+            written += count
 
-        conn.commit()
-        cur.close()
-        conn.close()
+        # A writer thread stuck past the deadline keeps its own batch.
+        rows = []
+        if not self.thread.is_alive():
+            rows, self.pending = self.pending, []
+            if self.conn is not None:
+                self.conn.close()
+        while True:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
 
-        print(
-            f"[AUDIT] Saved admission decision to PostgreSQL | "
-            f"namespace={namespace} pod={pod_name} decision={decision} policy={policy}"
-        )
+        return written, spill_rows(rows)
 
-    except Exception as e:
-        print(f"[AUDIT_ERROR] PostgreSQL audit log could not be saved: {e}")
\ No newline at end of file
+
+def spill_rows(rows: list[tuple], path: str = AUDIT_SPILL_PATH) -> int:
+    if not rows:
+        return 0
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(list(row[:-1]) + [row[-1].isoformat()]) + "\n")
+    except OSError as e:
+        AUDIT_ROWS.labels(result="dropped").inc(len(rows))
+        logger.error("[AUDIT_ERROR] %d audit rows could not be spilled to %s: %s", len(rows), path, e)
+        return 0
+
+    AUDIT_ROWS.labels(result="spilled").inc(len(rows))
+    return len(rows)
+
+
+# =====================================================
+# SPILL REPLAY
+# =====================================================
+def _parse_spilled(line: str) -> Optional[tuple]:
+    try:
+        values = json.loads(line)
+        return tuple(values[:-1]) + (datetime.fromisoformat(values[-1]),)
+    except (ValueError, IndexError, TypeError):
+        return None
+
+
+class SpillReplay:
+    """
+    Writes rows spilled by an earlier shutdown, in batches, straight from
+    disk. The spill file is renamed to '<path>.replaying' (a leftover one
+    from a crash is picked up first); the offset of the last committed batch
+    is kept in '<path>.replaying.offset', and the file is removed only after
+    its last row is committed. A crash repeats at most the batch in flight.
+    """
+
+    def __init__(self, path: str = AUDIT_SPILL_PATH):
+        self.path = path
+        self.replaying = path + ".replaying"
+        self.offset_path = self.replaying + ".offset"
+        self.failed = False
+
+    def pending(self) -> bool:
+        return os.path.exists(self.replaying) or os.path.exists(self.path)
+
+    def _offset(self) -> int:
+        try:
+            with open(self.offset_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _save_offset(self, offset: int) -> None:
+        tmp = self.offset_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, self.offset_path)
+
+    def _read_batch(self, offset: int) -> tuple[list[tuple], int, bool]:
+        """Returns (rows, offset after them, end of file reached)."""
+        rows = []
+        with open(self.replaying, "rb") as f:
+            f.seek(offset)
+            while len(rows) < AUDIT_BATCH_SIZE:
+                line = f.readline()
+                if not line:
+                    return rows, offset, True
+                if not line.endswith(b"\n"):
+                    # Partial last line of an interrupted spill.
+                    AUDIT_ROWS.labels(result="dropped").inc()
+                    return rows, offset + len(line), True
+                offset += len(line)
+                row = _parse_spilled(line.decode("utf-8", errors="replace"))
+                if row is None:
+                    AUDIT_ROWS.labels(result="dropped").inc()
+                    continue
+                rows.append(row)
+            return rows, offset, False
+
+    def step(self, write: Callable[[list[tuple], str], bool]) -> bool:
+        """
+        Replays one batch through write(rows, result). Returns True while
+        spilled rows remain; self.failed is set when the batch was not written.
+        """
+        if not os.path.exists(self.replaying):
+            if not os.path.exists(self.path):
+                return False
+            os.replace(self.path, self.replaying)
+            logger.info("Replaying spilled audit rows from %s", self.path)
+
+        rows, offset, done = self._read_batch(self._offset())
+        self.failed = bool(rows) and not write(rows, "replayed")
+        if self.failed:
+            return True
+
+        if not done:
+            self._save_offset(offset)
+            return True
+
+        os.remove(self.replaying)
+        if os.path.exists(self.offset_path):
+            os.remove(self.offset_path)
+        # Rows spilled after this file was claimed are replayed next.
+        return os.path.exists(self.path)
+
+
+_writer: Optional[AuditWriter] = None
+
+
+def init_audit_writer(mode: str = AUDIT_MODE) -> None:
+    """
+    Starts the buffered writer, which also replays AUDIT_SPILL_PATH. Called
+    by serve.py for the process that owns admission, so only one process
+    ever reads the spill file; elsewhere rows are written synchronously.
+    """
+    global _writer
+
+    if mode != "buffered" or _writer is not None:
+        return
+
+    _writer = AuditWriter()
+
+
+def close_audit_writer(timeout: float) -> tuple[int, int]:
+    """
+    Flushes the buffered writer before exit. Later rows are written
+    synchronously. Returns (rows written, rows spilled).
+    """
+    global _writer
+
+    if _writer is None:
+        return 0, 0
+
+    writer, _writer = _writer, None
+    return writer.close(timeout)
@@ -29,8 +29,13 @@ def get_audit_summary():
         # =====================================================
         # TOTAL REQUESTS
         # =====================================================
+        # Policy reload events share the table; only admission decisions count.
         cur.execute(
-            "SELECT COUNT(*) FROM admission_audit_logs"
+            """
+            SELECT COUNT(*)
+            FROM admission_audit_logs
+            WHERE decision LIKE 'allow%' OR decision = 'deny'
+            """
         )
         total_requests = cur.fetchone()[0]
 
@@ -145,6 +150,8 @@ def get_dashboard_stats():
         for row in rows:
             decision = row[0]
             count = row[1]
+            if decision.startswith("policy_"):
+                continue
             stats["total"] += count
             if decision.startswith("allow"):
                 stats["success"] += count
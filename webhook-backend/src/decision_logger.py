@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+
+from prometheus_client import Counter
+
+# =====================================================
+# CONFIG
+# =====================================================
+# LOG_FORMAT:
+# - json    -> one JSON object per line (default)
+# - console -> colorized key=value lines for local development
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of plain ALLOW decisions that are logged.
+# DENY and ALLOW_WITH_WARNING decisions are always logged.
+LOG_ALLOW_SAMPLE_RATE = float(os.getenv("LOG_ALLOW_SAMPLE_RATE", "1.0"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+logger = logging.getLogger("admission-webhook")
+
+# =====================================================
+# PROMETHEUS METRICS (LOGGING)
+# =====================================================
+LOG_RECORDS_DROPPED = Counter(
+    "admission_log_records_dropped_total",
+    "Log records not written",
+    ["reason"]
+)
+
+_sampled_out = LOG_RECORDS_DROPPED.labels(reason="sampled")
+_queue_full = LOG_RECORDS_DROPPED.labels(reason="queue_full")
+
+
+# =====================================================
+# FORMATTERS
+# =====================================================
+def colorize_decision(decision: str) -> str:
+    """
+    Adds ANSI color codes to the DECISION value.
+    - ALLOW              -> green
+    - ALLOW_WITH_WARNING -> yellow
+    - DENY               -> red
+    """
+    if decision == "ALLOW":
+        return f"\033[92m{decision}\033[0m"
+    if decision == "ALLOW_WITH_WARNING":
+        return f"\033[93m{decision}\033[0m"
+    if decision == "DENY":
+        return f"\033[91m{decision}\033[0m"
+    return decision
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Structured records carry their payload in record.fields;
+    other records are written with their rendered message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload["event"] = record.msg
+            payload.update(fields)
+        else:
+            payload["message"] = record.getMessage()
+
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+
+        return json.dumps(payload, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    Dev-mode format, same layout as the original decision log line.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if fields and record.msg == "admission_review":
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = (
+                f"EVENT=admission_review "
+                f"DECISION={colorize_decision(fields['decision'])} "
+                f"POLICY={fields['policy']} "
+                f"NAMESPACE={fields['namespace']} "
+                f"POD={fields['pod']} "
+                f"REASON=\"{fields['reason']}\" "
+                f"WARNINGS=\"{','.join(fields['warnings']) or '-'}\" "
+                f"LATENCY={fields['latency_seconds']:.4f}s"
+            )
+            record.args = None
+        elif fields:
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = " ".join([str(record.msg)] + [f"{k}={v}" for k, v in fields.items()])
+            record.args = None
+        return super().format(record)
+
+
+# =====================================================
+# NON-BLOCKING QUEUE HANDLER
+# =====================================================
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records without formatting them on the caller's thread.
+    Formatting and the stdout write happen on the listener thread.
+    Records are dropped (and counted) when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Exception text must be captured before the traceback goes away.
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _queue_full.inc()
+
+
+_listener = None
+
+
+def setup_logging() -> None:
+    """
+    Routes the root logger through a bounded queue drained by a
+    background thread that writes to stdout.
+    """
+    global _listener
+
+    if _listener is not None:
+        return
+
+    logging.Formatter.converter = time.localtime
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(ConsoleFormatter() if LOG_FORMAT == "console" else JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers = [NonBlockingQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Drains queued records and stops the listener thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# =====================================================
+# DECISION LOGGING
+# =====================================================
+def log_decision(
+    level: str,
+    uid: str,
+    decision: str,
+    policy: str,
+    environment: str,
+    namespace: str,
+    pod_name: str,
+    reason: str,
+    start_time: float,
+    warnings: list[str] | None = None
+) -> None:
+    log_level = logging.WARNING if level == "warning" else logging.INFO
+
+    # Nothing is built for disabled levels or sampled-out ALLOW decisions.
+    if not logger.isEnabledFor(log_level):
+        return
+
+    if decision == "ALLOW" and LOG_ALLOW_SAMPLE_RATE < 1.0 and random.random() >= LOG_ALLOW_SAMPLE_RATE:
+        _sampled_out.inc()
+        return
+
+    logger.log(log_level, "admission_review", extra={"fields": {
+        "uid": uid,
+        "decision": decision,
+        "policy": policy,
+        "environment": environment,
+        "namespace": namespace,
+        "pod": pod_name,
+        "reason": reason,
+        "warnings": warnings or [],
+        "latency_seconds": time.time() - start_time,
+    }})
@@ -0,0 +1,181 @@
+import os
+import time
+import secrets
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import Counter
+
+# =====================================================
+# CONFIG
+# =====================================================
+# A pod (or workload) carrying this annotation with value "true" is
+# evaluated with an explain trace; empty disables the annotation trigger.
+EXPLAIN_ANNOTATION = os.getenv("EXPLAIN_ANNOTATION", "admission-webhook/explain")
+# Finished traces kept for GET /debug/explain, oldest evicted first.
+EXPLAIN_BUFFER_SIZE = int(os.getenv("EXPLAIN_BUFFER_SIZE", "200"))
+
+# =====================================================
+# PROMETHEUS METRICS (EXPLAIN)
+# =====================================================
+EXPLAIN_TRACES = Counter(
+    "admission_explain_traces_total",
+    "Admission requests evaluated with an explain trace, by trigger (annotation, replay)",
+    ["trigger"]
+)
+
+# The hooks in tracing.stage, TieredCache, TimedCoreV1Api, count_denial and
+# evaluate_rules read this once; with no trace active that is their only cost.
+current_explain: contextvars.ContextVar = contextvars.ContextVar("admission_explain", default=None)
+
+
+class ExplainTrace:
+    """
+    Ordered record of one admission evaluation: pipeline stages with their
+    outcome and timing, cache tiers, apiserver calls, denied checks and
+    fired declarative rules. Only touched by the thread evaluating it.
+    """
+
+    def __init__(self, uid: str, trigger: str, req: dict, trace_id: Optional[str] = None):
+        self.uid = uid
+        self.trigger = trigger
+        self.replay = trigger == "replay"
+        self.req = req
+        self.trace_id = trace_id
+        self.created_at = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self.decision = None
+        self.events: list[dict] = []
+
+    def offset_ms(self, at: Optional[float] = None) -> float:
+        return round(((at if at is not None else time.perf_counter()) - self.started) * 1000, 3)
+
+    def add(self, kind: str, **fields) -> None:
+        self.events.append({"kind": kind, "at_ms": self.offset_ms(), **fields})
+
+    def add_timed(self, kind: str, started: float, **fields) -> None:
+        """Event for a block that began at perf_counter() value started."""
+        now = time.perf_counter()
+        self.events.append({
+            "kind": kind,
+            "at_ms": self.offset_ms(started),
+            "duration_ms": round((now - started) * 1000, 3),
+            **fields,
+        })
+
+    def finish(self, response: dict) -> dict:
+        result = response.get("response", {}) or {}
+        status = result.get("status", {}) or {}
+        self.duration_ms = self.offset_ms()
+        self.decision = {
+            "allowed": result.get("allowed"),
+            "message": status.get("message"),
+            "code": status.get("code"),
+            "warnings": result.get("warnings", []),
+        }
+        return response
+
+    def summary(self) -> dict:
+        obj = self.req.get("object", {}) or {}
+        meta = obj.get("metadata", {}) or {}
+        return {
+            "uid": self.uid,
+            "trigger": self.trigger,
+            "created_at": self.created_at,
+            "kind": (self.req.get("kind", {}) or {}).get("kind"),
+            "operation": self.req.get("operation"),
+            "namespace": self.req.get("namespace") or meta.get("namespace"),
+            "name": meta.get("name") or meta.get("generateName"),
+            "allowed": (self.decision or {}).get("allowed"),
+            "duration_ms": self.duration_ms,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            **self.summary(),
+            "trace_id": self.trace_id,
+            "replay_of": self.req.get("uid") if self.replay else None,
+            "decision": self.decision,
+            "events": sorted(self.events, key=lambda event: event["at_ms"]),
+        }
+
+
+# =====================================================
+# RING BUFFER
+# =====================================================
+class ExplainBuffer:
+    """Last EXPLAIN_BUFFER_SIZE traces by UID; a repeated UID replaces the entry."""
+
+    def __init__(self, size: int = EXPLAIN_BUFFER_SIZE):
+        self.size = size
+        self._traces: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: ExplainTrace) -> None:
+        with self._lock:
+            self._traces.pop(trace.uid, None)
+            self._traces[trace.uid] = trace
+            while len(self._traces) > self.size:
+                self._traces.popitem(last=False)
+
+    def get(self, uid: str) -> Optional[ExplainTrace]:
+        with self._lock:
+            return self._traces.get(uid)
+
+    def recent(self) -> list[dict]:
+        with self._lock:
+            traces = list(self._traces.values())
+        return [trace.summary() for trace in reversed(traces)]
+
+
+explain_buffer = ExplainBuffer()
+
+
+# =====================================================
+# TRIGGERS
+# =====================================================
+def explain_requested(req: dict) -> bool:
+    """True if the admitted object carries EXPLAIN_ANNOTATION=true."""
+    if not EXPLAIN_ANNOTATION:
+        return False
+    annotations = ((req.get("object") or {}).get("metadata") or {}).get("annotations")
+    return bool(annotations) and str(annotations.get(EXPLAIN_ANNOTATION, "")).lower() == "true"
+
+
+def replaying() -> bool:
+    """
+    True while /debug/explain replays a request. Replays skip decision
+    metrics, denial counters, the decision log and the audit row.
+    """
+    trace = current_explain.get()
+    return trace is not None and trace.replay
+
+
+@contextmanager
+def explaining(req: dict, trigger: str, trace_id: Optional[str] = None):
+    """
+    Evaluates the block with an explain trace, then stores the trace in
+    explain_buffer.
+    """
+    uid = req.get("uid", "")
+    if trigger == "replay":
+        # Own UID, so a replay never replaces the trace it was taken from.
+        uid = f"replay-{secrets.token_hex(8)}"
+    trace = ExplainTrace(uid, trigger, req, trace_id)
+    EXPLAIN_TRACES.labels(trigger=trigger).inc()
+    token = current_explain.set(trace)
+
+    try:
+        yield trace
+    except Exception as e:
+        trace.add("error", error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current_explain.reset(token)
+        if trace.duration_ms is None:
+            trace.duration_ms = trace.offset_ms()
+        explain_buffer.add(trace)
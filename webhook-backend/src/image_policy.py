@@ -0,0 +1,282 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# =====================================================
+# CONFIG
+# =====================================================
+IMAGE_REF_CACHE_SIZE = int(os.getenv("IMAGE_REF_CACHE_SIZE", "4096"))
+IMAGE_POLICY_INDEX_CACHE_SIZE = 16
+
+DEFAULT_REGISTRY = "docker.io"
+DEFAULT_NAMESPACE = "library"
+
+# =====================================================
+# OCI / DOCKER IMAGE REFERENCE GRAMMAR
+# =====================================================
+# Based on the distribution reference grammar:
+#   reference := name [ ":" tag ] [ "@" digest ]
+#   name      := [domain "/"] path-component ["/" path-component]*
+_PATH_COMPONENT = re.compile(r"[a-z0-9]+(?:(?:[._]|__|-+)[a-z0-9]+)*")
+_DOMAIN = re.compile(
+    r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?)"
+    r"(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]*[a-zA-Z0-9])?)*"
+    r"(?::[0-9]+)?"
+)
+_TAG = re.compile(r"[\w][\w.-]{0,127}")
+_DIGEST = re.compile(r"[A-Za-z][A-Za-z0-9]*(?:[-_+.][A-Za-z][A-Za-z0-9]*)*:[0-9a-fA-F]{32,}")
+
+_NAME_MAX_LENGTH = 255
+
+
+class ImageReference(NamedTuple):
+    registry: str
+    repository: str
+    tag: Optional[str]
+    digest: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return f"{self.registry}/{self.repository}"
+
+    @property
+    def is_latest(self) -> bool:
+        """
+        latest tag, or no tag and no digest (resolved as latest by the runtime).
+        """
+        if self.tag is None:
+            return self.digest is None
+        return self.tag == "latest"
+
+
+def _is_domain(component: str) -> bool:
+    return "." in component or ":" in component or component == "localhost" or component != component.lower()
+
+
+def _parse(image: str) -> ImageReference:
+    if not image:
+        raise ValueError("empty image reference")
+
+    name, _, digest = image.partition("@")
+    if digest and not _DIGEST.fullmatch(digest):
+        raise ValueError(f"invalid digest: {digest}")
+
+    tag = None
+    colon = name.rfind(":")
+    if colon > name.rfind("/"):
+        name, tag = name[:colon], name[colon + 1:]
+        if not _TAG.fullmatch(tag):
+            raise ValueError(f"invalid tag: {tag}")
+
+    if len(name) > _NAME_MAX_LENGTH:
+        raise ValueError("repository name too long")
+
+    first, sep, rest = name.partition("/")
+    if sep and _is_domain(first):
+        registry, path = first, rest
+        if not _DOMAIN.fullmatch(registry):
+            raise ValueError(f"invalid registry: {registry}")
+    else:
+        registry, path = DEFAULT_REGISTRY, name
+
+    if registry == "index.docker.io":
+        registry = DEFAULT_REGISTRY
+
+    if registry == DEFAULT_REGISTRY and "/" not in path:
+        path = f"{DEFAULT_NAMESPACE}/{path}"
+
+    for component in path.split("/"):
+        if not _PATH_COMPONENT.fullmatch(component):
+            raise ValueError(f"invalid repository component: {component}")
+
+    return ImageReference(registry, path, tag, digest or None)
+
+
+@lru_cache(maxsize=IMAGE_REF_CACHE_SIZE)
+def parse_image_reference(image: str) -> Optional[ImageReference]:
+    """
+    Parses an image reference into registry, repository, tag and digest.
+    Examples:
+    - nginx                      -> docker.io/library/nginx, no tag
+    - nginx:1.25                 -> docker.io/library/nginx, tag 1.25
+    - ghcr.io/org/app@sha256:... -> ghcr.io/org/app, digest
+    - localhost:5000/app:dev     -> localhost:5000/app, tag dev
+
+    Returns None for invalid references. Results are kept in an LRU cache.
+    """
+    try:
+        return _parse(image)
+    except ValueError:
+        return None
+
+
+# =====================================================
+# COMPILED IMAGE POLICY INDEX
+# =====================================================
+class ImageRule(NamedTuple):
+    repository: str
+    deny: bool
+    allow_latest: bool
+    require_digest: bool
+    allowed_tags: Optional[frozenset]
+    tag_pattern: Optional[re.Pattern]
+
+
+class _TrieNode:
+    __slots__ = ("children", "rule")
+
+    def __init__(self):
+        self.children = {}
+        self.rule = None
+
+
+def _rule_path(repository: str) -> list[str]:
+    """
+    Splits a rule repository into trie keys (registry first).
+    A repository without a registry is read like an image name:
+    'nginx' -> docker.io/library/nginx, 'myorg/app' -> docker.io/myorg/app.
+    A bare registry ('ghcr.io') matches everything it hosts.
+    """
+    parts = [p for p in repository.strip().strip("/").split("/") if p and p != "*"]
+    if not parts:
+        raise ValueError("empty repository in image rule")
+
+    if _is_domain(parts[0]):
+        registry = DEFAULT_REGISTRY if parts[0] == "index.docker.io" else parts[0]
+        return [registry] + parts[1:]
+
+    if len(parts) == 1:
+        return [DEFAULT_REGISTRY, DEFAULT_NAMESPACE] + parts
+
+    return [DEFAULT_REGISTRY] + parts
+
+
+class ImagePolicyIndex:
+    """
+    Image rules compiled from the policy ConfigMap.
+
+    policy keys:
+    - allowLatestTag: bool
+    - imagePolicy.allowedRegistries: exact hosts or '*.suffix' wildcards
+    - imagePolicy.requireDigest: bool
+    - imagePolicy.rules: list of
+        repository, deny, allowLatestTag, requireDigest, allowedTags, tagPattern
+
+    Rules are stored in a prefix trie keyed by registry and repository path
+    components; the longest matching prefix wins. A lookup walks at most the
+    depth of the image name, so its cost does not grow with the rule count.
+    """
+
+    def __init__(self, policy: dict):
+        image_policy = policy.get("imagePolicy", {}) or {}
+
+        self.default_rule = ImageRule(
+            repository="*",
+            deny=False,
+            allow_latest=bool(policy.get("allowLatestTag", False)),
+            require_digest=bool(image_policy.get("requireDigest", False)),
+            allowed_tags=None,
+            tag_pattern=None
+        )
+
+        registries = image_policy.get("allowedRegistries") or []
+        self.allowed_registries = frozenset(r for r in registries if not r.startswith("*."))
+        self.allowed_registry_suffixes = frozenset(r[1:] for r in registries if r.startswith("*."))
+        self.restrict_registries = bool(registries)
+
+        self.root = _TrieNode()
+        for raw_rule in image_policy.get("rules", []) or []:
+            self._insert(raw_rule)
+
+        self.is_trivial = (
+            self.default_rule.allow_latest
+            and not self.default_rule.require_digest
+            and not self.restrict_registries
+            and not self.root.children
+        )
+
+    def _insert(self, raw_rule: dict) -> None:
+        node = self.root
+        for key in _rule_path(raw_rule["repository"]):
+            node = node.children.setdefault(key, _TrieNode())
+
+        allowed_tags = raw_rule.get("allowedTags")
+        tag_pattern = raw_rule.get("tagPattern")
+
+        node.rule = ImageRule(
+            repository=raw_rule["repository"],
+            deny=bool(raw_rule.get("deny", False)),
+            allow_latest=bool(raw_rule.get("allowLatestTag", self.default_rule.allow_latest)),
+            require_digest=bool(raw_rule.get("requireDigest", self.default_rule.require_digest)),
+            allowed_tags=frozenset(str(t) for t in allowed_tags) if allowed_tags is not None else None,
+            tag_pattern=re.compile(tag_pattern) if tag_pattern else None
+        )
+
+    def registry_allowed(self, registry: str) -> bool:
+        if not self.restrict_registries or registry in self.allowed_registries:
+            return True
+
+        host = registry.split(":")[0]
+        dot = host.find(".")
+        while dot != -1:
+            if host[dot:] in self.allowed_registry_suffixes:
+                return True
+            dot = host.find(".", dot + 1)
+
+        return False
+
+    def lookup(self, ref: ImageReference) -> ImageRule:
+        node = self.root.children.get(ref.registry)
+        if node is None:
+            return self.default_rule
+
+        rule = node.rule or self.default_rule
+        for component in ref.repository.split("/"):
+            node = node.children.get(component)
+            if node is None:
+                break
+            if node.rule is not None:
+                rule = node.rule
+
+        return rule
+
+
+_index_cache: dict = {}
+
+# (id(imagePolicy), allowLatestTag) -> (imagePolicy, index). Policy snapshots
+# hand out the same mapping on every request, so the JSON key (O(rules))
+# is only built when a new policy version is seen.
+_identity_cache: dict = {}
+
+
+def compile_image_policy(policy: dict) -> ImagePolicyIndex:
+    """
+    Returns the compiled ImagePolicyIndex for a policy, reusing the
+    previous compilation while the image-related keys are unchanged
+    (once per policy version).
+    Raises ValueError / re.error for malformed rules.
+    """
+    raw = policy.get("imagePolicy")
+    allow_latest = policy.get("allowLatestTag", False)
+
+    identity = (id(raw), allow_latest)
+    cached = _identity_cache.get(identity)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+
+    key = json.dumps([allow_latest, raw], sort_keys=True, default=str)
+
+    index = _index_cache.get(key)
+    if index is None:
+        index = ImagePolicyIndex(policy)
+        if len(_index_cache) >= IMAGE_POLICY_INDEX_CACHE_SIZE:
+            _index_cache.clear()
+        _index_cache[key] = index
+
+    if len(_identity_cache) >= IMAGE_POLICY_INDEX_CACHE_SIZE:
+        _identity_cache.clear()
+    _identity_cache[identity] = (raw, index)
+
+    return index
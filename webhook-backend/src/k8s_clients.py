@@ -0,0 +1,207 @@
+import os
+import time
+import socket
+import functools
+import threading
+
+from kubernetes import client as k8s_client
+from urllib3.connection import HTTPConnection
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, REGISTRY
+
+from explain import current_explain
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Connection pools are separate per traffic class, so UI browsing
+# (cluster-wide LISTs, log reads) can never take admission connections.
+POOLS = {
+    "admission": {
+        "size": int(os.getenv("K8S_ADMISSION_POOL_SIZE", "16")),
+        "timeout": (
+            float(os.getenv("K8S_ADMISSION_CONNECT_TIMEOUT", "1")),
+            float(os.getenv("K8S_ADMISSION_READ_TIMEOUT", "3")),
+        ),
+    },
+    "ui": {
+        "size": int(os.getenv("K8S_UI_POOL_SIZE", "8")),
+        "timeout": (
+            float(os.getenv("K8S_UI_CONNECT_TIMEOUT", "3")),
+            float(os.getenv("K8S_UI_READ_TIMEOUT", "30")),
+        ),
+    },
+}
+
+# TCP keep-alive for idle pooled connections (seconds).
+K8S_KEEPALIVE_IDLE = int(os.getenv("K8S_KEEPALIVE_IDLE", "30"))
+K8S_KEEPALIVE_INTERVAL = int(os.getenv("K8S_KEEPALIVE_INTERVAL", "10"))
+K8S_KEEPALIVE_COUNT = int(os.getenv("K8S_KEEPALIVE_COUNT", "3"))
+
+# =====================================================
+# PROMETHEUS METRICS (KUBERNETES API CLIENT)
+# =====================================================
+K8S_REQUEST_LATENCY = Histogram(
+    "admission_k8s_request_duration_seconds",
+    "Kubernetes API call latency by client pool and method",
+    ["pool", "method"]
+)
+
+K8S_REQUEST_ERRORS = Counter(
+    "admission_k8s_request_errors_total",
+    "Kubernetes API calls that raised, by client pool and method",
+    ["pool", "method"]
+)
+
+
+def _socket_options() -> list:
+    options = list(HTTPConnection.default_socket_options)
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # Linux-only knobs; other platforms keep the system keep-alive timers.
+    for name, value in (
+        ("TCP_KEEPIDLE", K8S_KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", K8S_KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", K8S_KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+# =====================================================
+# POOLED API CLIENTS
+# =====================================================
+class TimedCoreV1Api:
+    """
+    CoreV1Api proxy bound to one pool.
+    - applies the pool's (connect, read) timeout unless the call passes
+      _request_timeout itself (watches do)
+    - records latency and errors per method, and each call in the active
+      explain trace
+    """
+
+    def __init__(self, pool: str, api: k8s_client.CoreV1Api, timeout: tuple):
+        self.pool = pool
+        self.api = api
+        self.timeout = timeout
+        self._methods = {}
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+
+        target = getattr(self.api, name)
+        if not callable(target) or name.startswith("_"):
+            return target
+
+        latency = K8S_REQUEST_LATENCY.labels(pool=self.pool, method=name)
+        errors = K8S_REQUEST_ERRORS.labels(pool=self.pool, method=name)
+        timeout = self.timeout
+
+        # functools.wraps keeps __doc__, which kubernetes.watch reads
+        # to find the return type of list functions.
+        @functools.wraps(target)
+        def call(*args, **kwargs):
+            kwargs.setdefault("_request_timeout", timeout)
+            explain = current_explain.get()
+            error = None
+            start = time.perf_counter()
+            try:
+                return target(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {getattr(e, 'reason', None) or e}"
+                raise
+            finally:
+                # Replays (/debug/explain) are recorded in the trace only.
+                if explain is None or not explain.replay:
+                    latency.observe(time.perf_counter() - start)
+                    if error is not None:
+                        errors.inc()
+                if explain is not None:
+                    explain.add_timed("k8s_call", start, pool=self.pool, method=name, error=error)
+
+        self._methods[name] = call
+        return call
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def pooled_core_v1(pool: str) -> TimedCoreV1Api:
+    """
+    Returns the CoreV1Api of a pool ('admission' or 'ui'), creating it on
+    first use from the loaded kube config. Each pool has its own ApiClient,
+    and therefore its own urllib3 connection pool.
+    """
+    with _clients_lock:
+        api = _clients.get(pool)
+        if api is not None:
+            return api
+
+        settings = POOLS[pool]
+        configuration = k8s_client.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = settings["size"]
+
+        api_client = k8s_client.ApiClient(configuration)
+        # Applied to every per-host pool the manager creates.
+        api_client.rest_client.pool_manager.connection_pool_kw["socket_options"] = _socket_options()
+
+        api = TimedCoreV1Api(pool, k8s_client.CoreV1Api(api_client), settings["timeout"])
+        _clients[pool] = api
+        return api
+
+
+# =====================================================
+# POOL UTILIZATION
+# =====================================================
+class PoolCollector:
+    """
+    Reads urllib3 pool state at scrape time; nothing is recorded on the
+    request path.
+    """
+
+    def collect(self):
+        size = GaugeMetricFamily(
+            "admission_k8s_pool_max_connections",
+            "Connection pool size per client pool",
+            labels=["pool"]
+        )
+        in_use = GaugeMetricFamily(
+            "admission_k8s_pool_connections_in_use",
+            "Connections checked out of the pool",
+            labels=["pool"]
+        )
+        opened = CounterMetricFamily(
+            "admission_k8s_pool_connections_opened",
+            "New connections opened (a steady rise means the pool is too small)",
+            labels=["pool"]
+        )
+
+        with _clients_lock:
+            clients = list(_clients.items())
+
+        for name, api in clients:
+            manager = api.api.api_client.rest_client.pool_manager
+            maxsize = manager.connection_pool_kw.get("maxsize", 1)
+            busy = 0
+            created = 0
+            for key in list(manager.pools.keys()):
+                host_pool = manager.pools.get(key)
+                if host_pool is None:
+                    continue
+                busy += host_pool.pool.maxsize - host_pool.pool.qsize() if host_pool.pool else 0
+                created += host_pool.num_connections
+
+            size.add_metric([name], maxsize)
+            in_use.add_metric([name], busy)
+            opened.add_metric([name], created)
+
+        yield size
+        yield in_use
+        yield opened
+
+
+REGISTRY.register(PoolCollector())
@@ -0,0 +1,103 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+from prometheus_client import Gauge
+
+from audit_logger import close_audit_writer
+
+logger = logging.getLogger("admission-webhook.lifecycle")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Shutdown (SIGTERM) runs in this order:
+# 1) /ready answers 503, the pod leaves the Service endpoints
+# 2) SHUTDOWN_DELAY_SECONDS: requests still arriving are served normally
+# 3) the listener closes, in-flight requests drain for SHUTDOWN_DRAIN_SECONDS
+# 4) buffered audit rows are flushed for AUDIT_FLUSH_TIMEOUT, the rest spilled
+# terminationGracePeriodSeconds must cover the sum.
+SHUTDOWN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DELAY_SECONDS", "5"))
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "20"))
+AUDIT_FLUSH_TIMEOUT = float(os.getenv("AUDIT_FLUSH_TIMEOUT", "10"))
+
+# =====================================================
+# PROMETHEUS METRICS (LIFECYCLE)
+# =====================================================
+READY = Gauge("admission_ready", "1 while the process accepts new admission traffic")
+INFLIGHT = Gauge("admission_inflight_requests", "Admission requests being evaluated")
+SHUTDOWN_DRAIN = Gauge(
+    "admission_shutdown_drain_seconds",
+    "Time from closing the listener until in-flight requests finished (last shutdown)"
+)
+SHUTDOWN_ABANDONED = Gauge(
+    "admission_shutdown_abandoned_requests",
+    "In-flight requests still running when the drain deadline passed (last shutdown)"
+)
+SHUTDOWN_AUDIT_ROWS = Gauge(
+    "admission_shutdown_audit_rows",
+    "Buffered audit rows handled at shutdown by result (flushed, spilled)",
+    ["result"]
+)
+
+
+class Lifecycle:
+    """
+    Readiness and in-flight tracking for one server process.
+    Counters are only touched from the event loop, so no lock is needed.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.inflight = 0
+        self.drain_started = None
+        INFLIGHT.set_function(lambda: self.inflight)
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        READY.set(1)
+
+    def begin_shutdown(self) -> None:
+        """Step 1: stop advertising readiness; traffic is still served."""
+        if self.ready:
+            logger.info("Shutdown requested: readiness off, serving for %.0fs more", SHUTDOWN_DELAY_SECONDS)
+        self.ready = False
+        READY.set(0)
+
+    def begin_drain(self) -> None:
+        """Step 3: the listener is closing; only in-flight requests remain."""
+        if self.drain_started is None:
+            self.begin_shutdown()
+            self.draining = True
+            self.drain_started = time.monotonic()
+            logger.info("Draining %d in-flight admission requests", self.inflight)
+
+    @contextmanager
+    def track(self):
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+
+    def shutdown(self) -> None:
+        """
+        Step 4, run by the ASGI shutdown event after uvicorn stopped waiting
+        for connections: records the drain, then flushes the audit buffer.
+        """
+        if self.drain_started is not None:
+            drained = time.monotonic() - self.drain_started
+            SHUTDOWN_DRAIN.set(drained)
+            SHUTDOWN_ABANDONED.set(self.inflight)
+            logger.info("Drain finished in %.2fs, %d requests abandoned", drained, self.inflight)
+
+        flushed, spilled = close_audit_writer(AUDIT_FLUSH_TIMEOUT)
+        SHUTDOWN_AUDIT_ROWS.labels(result="flushed").set(flushed)
+        SHUTDOWN_AUDIT_ROWS.labels(result="spilled").set(spilled)
+        if flushed or spilled:
+            logger.info("Audit buffer closed: %d rows flushed, %d spilled", flushed, spilled)
+
+
+lifecycle = Lifecycle()
@@ -0,0 +1,138 @@
+import os
+import hmac
+import json
+import threading
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from prometheus_client import make_wsgi_app
+
+from profiler import ProfilerBusy, sample_profile
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Debug endpoints are disabled unless PROFILER_TOKEN is set.
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _SilentHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def respond(start_response, status: str, body, content_type: str = "application/json", headers=None):
+    if not isinstance(body, (bytes, str)):
+        body = json.dumps(body)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    start_response(status, [("Content-Type", content_type), ("Content-Length", str(len(body)))] + (headers or []))
+    return [body]
+
+
+def query_params(environ) -> dict:
+    return {key: values[-1] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+
+
+def authorized(environ) -> bool:
+    if not PROFILER_TOKEN:
+        return False
+
+    auth = environ.get("HTTP_AUTHORIZATION", "")
+    if not auth.startswith("Bearer "):
+        return False
+
+    return hmac.compare_digest(auth[len("Bearer "):].encode("utf-8"), PROFILER_TOKEN.encode("utf-8"))
+
+
+# =====================================================
+# DEBUG: SAMPLING PROFILER
+# =====================================================
+def profile_endpoint(environ, start_response):
+    """
+    GET /debug/profile
+    Query parameters:
+    - seconds=10         -> profile duration (capped by PROFILER_MAX_SECONDS)
+    - interval=0.01      -> sampling interval in seconds
+    - tracemalloc=1      -> include top allocations (json format only)
+    - format=json        -> stacks, overhead and allocations as JSON (default)
+    - format=collapsed   -> collapsed stacks only, for flamegraph.pl / speedscope
+
+    Requires 'Authorization: Bearer <PROFILER_TOKEN>'.
+    """
+    if not authorized(environ):
+        return respond(start_response, "401 Unauthorized", {"error": "unauthorized"})
+
+    params = query_params(environ)
+
+    try:
+        seconds = float(params.get("seconds", "10"))
+        interval = float(params.get("interval", "0.01"))
+    except ValueError:
+        return respond(start_response, "400 Bad Request", {"error": "seconds and interval must be numbers"})
+
+    output_format = params.get("format", "json")
+    trace_allocations = params.get("tracemalloc", "0").lower() in ("1", "true") and output_format == "json"
+
+    try:
+        result = sample_profile(seconds, interval, trace_allocations)
+    except ProfilerBusy as e:
+        return respond(start_response, "409 Conflict", {"error": str(e)})
+
+    if output_format == "collapsed":
+        return respond(
+            start_response,
+            "200 OK",
+            result["collapsed"] + "\n",
+            content_type="text/plain; charset=utf-8",
+            headers=[
+                ("X-Profile-Samples", str(result["samples"])),
+                ("X-Profile-Overhead-Percent", str(result["overhead_percent"])),
+            ]
+        )
+
+    return respond(start_response, "200 OK", result)
+
+
+# =====================================================
+# METRICS SERVER
+# =====================================================
+# Extra WSGI routes registered by the application (e.g. /sketches).
+EXTRA_ROUTES = {}
+
+
+def add_route(path: str, handler) -> None:
+    """Registers a WSGI handler on the metrics port (also after the server started)."""
+    EXTRA_ROUTES[path] = handler
+
+
+def make_metrics_app():
+    metrics_app = make_wsgi_app()
+    routes = {
+        "/debug/profile": profile_endpoint,
+    }
+
+    def dispatch(environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        handler = routes.get(path) or EXTRA_ROUTES.get(path)
+        if handler is None:
+            return metrics_app(environ, start_response)
+        return handler(environ, start_response)
+
+    return dispatch
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0") -> None:
+    """
+    Serves Prometheus metrics and the authenticated debug endpoints
+    on a daemon thread, separate from the uvicorn event loop.
+    """
+    httpd = make_server(addr, port, make_metrics_app(), _ThreadingWSGIServer, handler_class=_SilentHandler)
+    thread = threading.Thread(target=httpd.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
@@ -0,0 +1,190 @@
+import json
+import base64
+from typing import NamedTuple, Optional
+
+from resource_policy import cpu_millicores, memory_bytes
+
+# =====================================================
+# CONFIG
+# =====================================================
+MUTATION_PLAN_CACHE_SIZE = 16
+
+_QUANTITY_PARSERS = {
+    "cpu": cpu_millicores,
+    "memory": memory_bytes,
+}
+
+
+def _escape(key: str) -> str:
+    """
+    JSON Pointer escaping (RFC 6901).
+    """
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+# =====================================================
+# MUTATION PLAN
+# =====================================================
+class MutationPlan(NamedTuple):
+    """
+    Secure defaults compiled from the policy 'defaults' key.
+    Keys are pre-escaped so building a patch only walks the pod spec.
+    """
+    pod_security_context: tuple
+    container_security_context: tuple
+    requests: tuple
+    limits: tuple
+
+    @property
+    def empty(self) -> bool:
+        return not (self.pod_security_context or self.container_security_context or self.requests or self.limits)
+
+
+def _compile_section(section: Optional[dict]) -> tuple:
+    return tuple((key, _escape(str(key)), value) for key, value in (section or {}).items())
+
+
+def _compile(policy: dict) -> MutationPlan:
+    defaults = policy.get("defaults", {}) or {}
+    resources = defaults.get("resources", {}) or {}
+
+    for bucket in ("requests", "limits"):
+        for resource, value in (resources.get(bucket, {}) or {}).items():
+            parser = _QUANTITY_PARSERS.get(resource)
+            if parser is not None:
+                parser(value)
+
+    return MutationPlan(
+        pod_security_context=_compile_section(defaults.get("podSecurityContext")),
+        container_security_context=_compile_section(defaults.get("containerSecurityContext")),
+        requests=_compile_section(resources.get("requests")),
+        limits=_compile_section(resources.get("limits")),
+    )
+
+
+_plan_cache: dict = {}
+
+
+def compile_mutation_plan(policy: dict) -> MutationPlan:
+    """
+    Compiles the 'defaults' policy key, reused while it is unchanged.
+
+    defaults keys:
+    - podSecurityContext        -> fields added to spec.securityContext
+    - containerSecurityContext  -> fields added to each container securityContext
+    - resources.requests/limits -> quantities added to each container
+
+    Raises ValueError for malformed quantities.
+    """
+    key = json.dumps(policy.get("defaults"), sort_keys=True, default=str)
+
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = _compile(policy)
+        if len(_plan_cache) >= MUTATION_PLAN_CACHE_SIZE:
+            _plan_cache.clear()
+        _plan_cache[key] = plan
+
+    return plan
+
+
+# =====================================================
+# JSON PATCH GENERATION
+# =====================================================
+def _add_missing(ops: list, path: str, current: Optional[dict], section: tuple) -> None:
+    """
+    Adds the fields of section that are missing from current.
+    Existing values are never overwritten.
+    """
+    if not section:
+        return
+
+    if current is None:
+        ops.append({"op": "add", "path": path, "value": {key: value for key, _, value in section}})
+        return
+
+    for key, escaped, value in section:
+        if key not in current:
+            ops.append({"op": "add", "path": f"{path}/{escaped}", "value": value})
+
+
+def _fits(resource: str, low, high) -> bool:
+    parser = _QUANTITY_PARSERS.get(resource)
+    if parser is None:
+        return True
+    try:
+        return parser(low) <= parser(high)
+    except ValueError:
+        return True
+
+
+def _resource_defaults(section: tuple, own: dict, other: dict, is_limit: bool) -> tuple:
+    """
+    Adjusts default requests/limits so a default never produces
+    limit < request against values the container already declares.
+    """
+    adjusted = []
+    for key, escaped, value in section:
+        if key in own:
+            continue
+        declared = other.get(key)
+        if declared is not None:
+            low, high = (declared, value) if is_limit else (value, declared)
+            if not _fits(key, low, high):
+                value = declared
+        adjusted.append((key, escaped, value))
+    return tuple(adjusted)
+
+
+def build_patch(plan: MutationPlan, spec: dict, prefix: str = "/spec") -> list[dict]:
+    """
+    Returns the JSONPatch operations that apply the plan's defaults to a
+    pod spec located at prefix. Only missing fields are added.
+    """
+    ops = []
+
+    if plan.empty:
+        return ops
+
+    _add_missing(ops, f"{prefix}/securityContext", spec.get("securityContext"), plan.pod_security_context)
+
+    for list_key in ("initContainers", "containers"):
+        for i, container in enumerate(spec.get(list_key, []) or []):
+            base = f"{prefix}/{list_key}/{i}"
+
+            _add_missing(ops, f"{base}/securityContext", container.get("securityContext"), plan.container_security_context)
+
+            if not (plan.requests or plan.limits):
+                continue
+
+            resources = container.get("resources")
+            if resources is None:
+                value = {}
+                if plan.requests:
+                    value["requests"] = {key: v for key, _, v in plan.requests}
+                if plan.limits:
+                    value["limits"] = {key: v for key, _, v in plan.limits}
+                ops.append({"op": "add", "path": f"{base}/resources", "value": value})
+                continue
+
+            requests = resources.get("requests")
+            limits = resources.get("limits")
+
+            _add_missing(
+                ops,
+                f"{base}/resources/requests",
+                requests,
+                _resource_defaults(plan.requests, requests or {}, limits or {}, is_limit=False)
+            )
+            _add_missing(
+                ops,
+                f"{base}/resources/limits",
+                limits,
+                _resource_defaults(plan.limits, limits or {}, requests or {}, is_limit=True)
+            )
+
+    return ops
+
+
+def encode_patch(ops: list[dict]) -> str:
+    return base64.b64encode(json.dumps(ops).encode("utf-8")).decode("ascii")
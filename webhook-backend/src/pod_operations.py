@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from kubernetes import watch
+from prometheus_client import Counter, Histogram
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("admission-webhook.pods")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Upper bound for parallel Kubernetes calls in one bulk request; further
+# capped by the UI threadpool and the UI client pool (K8S_UI_POOL_SIZE).
+BULK_MAX_CONCURRENCY = int(os.getenv("BULK_MAX_CONCURRENCY", "16"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+PVC_WAIT_TIMEOUT = int(os.getenv("PVC_WAIT_TIMEOUT", "30"))
+# false -> a Pending claim is ready (WaitForFirstConsumer classes only bind
+#          once the pod is scheduled); true -> wait until the claim is Bound
+PVC_WAIT_FOR_BIND = os.getenv("PVC_WAIT_FOR_BIND", "false").lower() == "true"
+
+# =====================================================
+# PROMETHEUS METRICS (UI POD OPERATIONS)
+# =====================================================
+BULK_ITEMS = Counter(
+    "admission_ui_bulk_items_total",
+    "Items processed by bulk pod operations",
+    ["operation", "result"]
+)
+
+PVC_WAIT = Histogram(
+    "admission_ui_pvc_wait_seconds",
+    "Time spent waiting for a created PVC to become ready"
+)
+
+
+# =====================================================
+# TEST POD MANIFESTS
+# =====================================================
+def build_test_pod(body: dict, pod_name: str) -> tuple[dict, Optional[dict]]:
+    """
+    Builds the pod manifest (and the PVC manifest for volumeType=pvc)
+    from a UI form body.
+    """
+    image = body.get("image")
+    if image == "unprivileged":
+        image = "nginxinc/nginx-unprivileged:alpine"
+    elif image == "latest":
+        image = "nginx:latest"
+    elif image == "alpine":
+        image = "nginx:alpine"
+
+    containers_spec = {
+        "name": "test-container",
+        "image": image,
+        "securityContext": {},
+        "volumeMounts": [],
+        "env": []
+    }
+
+    # Kubernetes API'sinin çelişkileri (privileged=True & allowPrivilegeEscalation=False)
+    # yakalayabilmesi için alanları gizlemek yerine açıkça True/False olarak gönderiyoruz
+    if "privileged" in body:
+        containers_spec["securityContext"]["privileged"] = bool(body.get("privileged"))
+    if "allowPrivilegeEscalation" in body:
+        containers_spec["securityContext"]["allowPrivilegeEscalation"] = bool(body.get("allowPrivilegeEscalation"))
+
+    namespace = body.get("namespace", "default")
+    pod_manifest = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": pod_name,
+            "namespace": namespace,
+            "labels": {
+                "app": "webhook-test"
+            },
+            "annotations": {}
+        },
+        "spec": {
+            "securityContext": {},
+            "containers": [containers_spec],
+            "volumes": []
+        }
+    }
+
+    if body.get("runAsNonRoot"):
+        pod_manifest["spec"]["securityContext"]["runAsNonRoot"] = True
+
+    if body.get("runAsRoot"):
+        pod_manifest["spec"]["securityContext"]["runAsUser"] = 0
+
+    if body.get("vaultAnnotations"):
+        pod_manifest["metadata"]["annotations"]["vault.hashicorp.com/agent-inject"] = "true"
+        pod_manifest["metadata"]["annotations"]["vault.hashicorp.com/role"] = "app-role"
+
+    pvc_manifest = None
+    volume_type = body.get("volumeType")
+    if volume_type == "hostPath":
+        pod_manifest["spec"]["volumes"].append({
+            "name": "test-vol",
+            "hostPath": {"path": "/tmp/test"}
+        })
+    elif volume_type == "emptyDir":
+        pod_manifest["spec"]["volumes"].append({
+            "name": "test-vol",
+            "emptyDir": {}
+        })
+    elif volume_type == "pvc":
+        # Gelen pvcName aslında seçilen StorageClass'ı temsil ediyor ('standard-pvc' veya 'longhorn-pvc')
+        sc_selection = body.get("pvcName", "standard-pvc")
+        sc_name = "standard" if "standard" in sc_selection else "longhorn"
+
+        pvc_name = f"pvc-{pod_name}"
+        pvc_manifest = {
+            "apiVersion": "v1",
+            "kind": "PersistentVolumeClaim",
+            "metadata": {
+                "name": pvc_name,
+                "namespace": namespace
+            },
+            "spec": {
+                "accessModes": ["ReadWriteOnce"],
+                "storageClassName": sc_name,
+                "resources": {
+                    "requests": {
+                        "storage": "1Gi"
+                    }
+                }
+            }
+        }
+        pod_manifest["spec"]["volumes"].append({
+            "name": "test-vol",
+            "persistentVolumeClaim": {"claimName": pvc_name}
+        })
+
+    if pod_manifest["spec"]["volumes"]:
+        containers_spec["volumeMounts"].append({
+            "name": "test-vol",
+            "mountPath": "/data"
+        })
+
+    if body.get("useNativeSecret"):
+        containers_spec["env"].append({
+            "name": "SECRET_KEY",
+            "valueFrom": {
+                "secretKeyRef": {
+                    "name": "my-secret",
+                    "key": "password"
+                }
+            }
+        })
+
+    if body.get("includeResources"):
+        containers_spec["resources"] = {
+            "requests": {"cpu": "100m", "memory": "128Mi"},
+            "limits": {"cpu": "200m", "memory": "256Mi"}
+        }
+
+    if not containers_spec["volumeMounts"]:
+        del containers_spec["volumeMounts"]
+    if not containers_spec["env"]:
+        del containers_spec["env"]
+    if not pod_manifest["spec"]["volumes"]:
+        del pod_manifest["spec"]["volumes"]
+    if not pod_manifest["metadata"]["annotations"]:
+        del pod_manifest["metadata"]["annotations"]
+
+    return pod_manifest, pvc_manifest
+
+
+def api_error(err: Exception) -> tuple[str, str]:
+    """Returns (message, reason) from a Kubernetes API error body."""
+    try:
+        err_body = json.loads(err.body)
+        return err_body.get("message", str(err)), err_body.get("reason", "DENY")
+    except Exception:
+        return str(err), "DENY"
+
+
+# =====================================================
+# PVC READINESS
+# =====================================================
+def _pvc_ready(pvc) -> bool:
+    phase = pvc.status.phase if pvc.status else None
+    if phase == "Lost":
+        raise RuntimeError(f"PVC {pvc.metadata.name} is Lost")
+    if PVC_WAIT_FOR_BIND:
+        return phase == "Bound"
+    return phase in ("Pending", "Bound")
+
+
+def wait_for_pvc(core_v1, pvc, timeout: int = PVC_WAIT_TIMEOUT) -> None:
+    """
+    Waits until a just-created PVC is ready, watching from the
+    resourceVersion returned by the create call instead of sleeping
+    for a fixed time. Raises TimeoutError if it does not get there.
+    """
+    start = time.perf_counter()
+    try:
+        if _pvc_ready(pvc):
+            return
+
+        name = pvc.metadata.name
+        w = watch.Watch()
+        try:
+            for event in w.stream(
+                core_v1.list_namespaced_persistent_volume_claim,
+                namespace=pvc.metadata.namespace,
+                field_selector=f"metadata.name={name}",
+                resource_version=pvc.metadata.resource_version,
+                timeout_seconds=timeout,
+                _request_timeout=timeout + 5
+            ):
+                if event["type"] == "DELETED":
+                    raise RuntimeError(f"PVC {name} was deleted while waiting")
+                if event["type"] in ("ADDED", "MODIFIED") and _pvc_ready(event["object"]):
+                    return
+        finally:
+            w.stop()
+
+        raise TimeoutError(f"PVC {name} not ready after {timeout}s")
+    finally:
+        PVC_WAIT.observe(time.perf_counter() - start)
+
+
+# =====================================================
+# SINGLE OPERATIONS
+# =====================================================
+def create_test_pod(core_v1, body: dict, pod_name: str) -> tuple[int, dict]:
+    """
+    Creates the PVC (if any), waits for it, then creates the pod.
+    Returns (status_code, result) in the /api/pod response shape.
+    """
+    pod_manifest, pvc_manifest = build_test_pod(body, pod_name)
+    namespace = pod_manifest["metadata"]["namespace"]
+
+    if pvc_manifest is not None:
+        try:
+            pvc = core_v1.create_namespaced_persistent_volume_claim(namespace=namespace, body=pvc_manifest)
+            wait_for_pvc(core_v1, pvc)
+        except Exception as pvc_err:
+            return 400, {"success": False, "message": f"PVC oluşturulamadı: {str(pvc_err)}", "reason": "PVC_CREATION_FAILED"}
+
+    try:
+        res = core_v1.create_namespaced_pod(namespace=namespace, body=pod_manifest)
+        return 200, {"success": True, "message": "Pod başarıyla oluşturuldu (ALLOW)", "pod": res.to_dict()}
+    except Exception as err:
+        msg, reason = api_error(err)
+        return 400, {"success": False, "message": msg, "reason": reason}
+
+
+def delete_pod(core_v1, name: str, namespace: str, grace_period_seconds: Optional[int] = None) -> dict:
+    try:
+        kwargs = {}
+        if grace_period_seconds is not None:
+            kwargs["grace_period_seconds"] = grace_period_seconds
+        core_v1.delete_namespaced_pod(name=name, namespace=namespace, **kwargs)
+        return {"success": True, "message": f"Pod {name} başarıyla silindi."}
+    except Exception as err:
+        msg, reason = api_error(err)
+        return {"success": False, "message": msg, "reason": reason}
+
+
+# =====================================================
+# BULK EXECUTION
+# =====================================================
+async def run_bounded(
+    operation: str,
+    items: list,
+    fn: Callable[[object], dict],
+    concurrency: int
+) -> AsyncIterator[str]:
+    """
+    Runs fn(item) in the threadpool with at most `concurrency` calls in
+    flight and yields one NDJSON line per item as it completes, followed
+    by a summary line. Pending calls are cancelled if the client goes away.
+    """
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, BULK_MAX_CONCURRENCY)))
+
+    async def run(index: int, item):
+        async with semaphore:
+            try:
+                result = await run_in_threadpool(fn, item)
+            except Exception as e:
+                result = {"success": False, "message": str(e), "reason": "ERROR"}
+        return {"index": index, **result}
+
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+    succeeded = 0
+    start = time.perf_counter()
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            ok = result.get("success", False)
+            succeeded += ok
+            BULK_ITEMS.labels(operation=operation, result="success" if ok else "failure").inc()
+            yield json.dumps(result) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    yield json.dumps({
+        "summary": True,
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "durationMs": round((time.perf_counter() - start) * 1000, 1),
+    }) + "\n"
@@ -1,6 +1,6 @@
 import os
-import yaml
-from typing import Tuple
+import re
+from typing import Optional, Tuple
 
 from kubernetes import client as k8s_client
 from kubernetes import config as k8s_config
@@ -8,6 +8,14 @@ from kubernetes.client.rest import ApiException
 
 from prometheus_client import Counter
 
+from tracing import stage
+from explain import current_explain
+from image_policy import ImagePolicyIndex, compile_image_policy, parse_image_reference
+from resource_policy import ResourcePolicy, compile_resource_policy, cpu_millicores, memory_bytes
+from rule_engine import RulePlan, compile_rules, evaluate_rules
+from shared_cache import TieredCache
+from k8s_clients import TimedCoreV1Api, pooled_core_v1
+
 # =====================================================
 # PROMETHEUS METRICS (POLICY-SPECIFIC)
 # =====================================================
@@ -18,9 +26,15 @@ DENY_ESCALATION = Counter("admission_deny_privilege_escalation_total", "Denied p
 DENY_NON_ROOT = Counter("admission_deny_non_root_total", "Denied runAsNonRoot violation")
 
 DENY_LATEST_IMAGE = Counter("admission_deny_latest_image_total", "Denied latest or tagless image")
+DENY_INVALID_IMAGE_REFERENCE = Counter("admission_deny_invalid_image_reference_total", "Denied unparseable image reference")
+DENY_IMAGE_REGISTRY = Counter("admission_deny_image_registry_total", "Denied image from a registry outside the allowlist")
+DENY_IMAGE_REPOSITORY = Counter("admission_deny_image_repository_total", "Denied image repository by policy rule")
+DENY_IMAGE_DIGEST = Counter("admission_deny_image_digest_total", "Denied image not pinned by digest")
+DENY_IMAGE_TAG = Counter("admission_deny_image_tag_total", "Denied image tag not allowed by policy rule")
+DENY_INVALID_IMAGE_POLICY = Counter("admission_deny_invalid_image_policy_total", "Denied because the image policy could not be compiled")
 
 DENY_HOSTPATH = Counter("admission_deny_hostpath_total", "Denied hostPath volume")
-WARN_HOSTPATH = Counter("admission_warn_hostpath_total", "Warned hostPath volume in dev environment")
+WARN_HOSTPATH = Counter("admission_warn_hostpath_total", "Warned hostPath volume")
 DENY_DISALLOWED_STORAGE_CLASS = Counter("admission_deny_disallowed_storage_class_total","Denied PVC with disallowed storageClass")
 DENY_PVC_LOOKUP_FAILED = Counter("admission_deny_pvc_lookup_failed_total", "Denied PVC lookup failure")
 
@@ -41,84 +55,127 @@ DENY_MISSING_LIMITS_MEMORY = Counter(
     "admission_deny_missing_limits_memory_total",
     "Denied missing resources.limits.memory"
 )
+DENY_RESOURCE_RANGE = Counter(
+    "admission_deny_resource_range_total",
+    "Denied resource request/limit outside policy bounds",
+    ["resource", "check"]
+)
+DENY_INVALID_RESOURCE_POLICY = Counter(
+    "admission_deny_invalid_resource_policy_total",
+    "Denied because the resource policy could not be compiled"
+)
+
+DENY_INVALID_RULES = Counter(
+    "admission_deny_invalid_rules_total",
+    "Denied because the declarative rules could not be compiled"
+)
+
+# One labeled series per check, so dashboards and recording rules aggregate
+# a single metric instead of matching every admission_deny_* name.
+POLICY_DENIALS = Counter(
+    "admission_policy_denials_total",
+    "Denied checks by policy",
+    ["policy", "check"]
+)
+
+
+def count_denial(counter, policy: str, check: str) -> None:
+    explain = current_explain.get()
+    if explain is not None:
+        explain.add("check", policy=policy, check=check, result="deny")
+        # Replays (/debug/explain) must not move the denial dashboards.
+        if explain.replay:
+            return
+    counter.inc()
+    POLICY_DENIALS.labels(policy=policy, check=check).inc()
+
+
+def count_warning(counter, policy: str, check: str) -> None:
+    explain = current_explain.get()
+    if explain is not None:
+        explain.add("check", policy=policy, check=check, result="warn")
+        if explain.replay:
+            return
+    counter.inc()
 
 # =====================================================
 # K8S CLIENT INIT
 # =====================================================
-def init_k8s_client() -> k8s_client.CoreV1Api:
+_k8s_config_loaded = False
+
+
+def init_k8s_client(pool: str = "admission") -> TimedCoreV1Api:
     """
-    Initializes Kubernetes CoreV1Api client.
+    Initializes Kubernetes CoreV1Api client of a connection pool.
     - USE_KUBECONFIG=true -> uses local kubeconfig
     - otherwise -> uses in-cluster config
+    - pool 'admission' / 'ui' -> separate connection pools and timeouts
     """
-    if os.getenv("USE_KUBECONFIG", "false").lower() == "true":
-        k8s_config.load_kube_config()
-    else:
-        k8s_config.load_incluster_config()
-    return k8s_client.CoreV1Api()
+    global _k8s_config_loaded
+
+    if not _k8s_config_loaded:
+        if os.getenv("USE_KUBECONFIG", "false").lower() == "true":
+            k8s_config.load_kube_config()
+        else:
+            k8s_config.load_incluster_config()
+        _k8s_config_loaded = True
+
+    return pooled_core_v1(pool)
 
 
 # =====================================================
-# ENVIRONMENT POLICY CONFIG
+# LOOKUP CACHE
 # =====================================================
-def get_namespace_environment(
-    core_v1: k8s_client.CoreV1Api,
-    namespace: str,
-    default_environment: str = "dev"
-) -> str:
-    """
-    Reads the namespace label 'environment'.
-    Example:
-    - environment=dev
-    - environment=test
+# Namespace labels and PVC storage classes are read through a near-cache
+# and the optional shared tier (SHARED_CACHE_BACKEND), so replicas do not
+# each query the apiserver for the same objects.
+lookup_cache = TieredCache()
 
-    If the label is missing or namespace lookup fails, default_environment is used.
-    """
-    try:
-        ns = core_v1.read_namespace(name=namespace)
-        labels = ns.metadata.labels or {}
-        return labels.get("environment", default_environment)
-    except ApiException:
-        return default_environment
 
-
-def load_policy_for_environment(
+# =====================================================
+# ENVIRONMENT POLICY CONFIG
+# =====================================================
+def get_namespace_labels(
     core_v1: k8s_client.CoreV1Api,
-    configmap_name: str,
-    configmap_namespace: str,
-    environment: str
+    namespace: str
 ) -> dict:
     """
-    Loads environment-based policy from ConfigMap.
-    Expected ConfigMap keys:
-    - dev.yaml
-    - test.yaml
+    Reads the namespace labels. Returns an empty dict if the lookup fails.
+    Failed lookups are not cached.
     """
+    def load() -> dict:
+        ns = core_v1.read_namespace(name=namespace)
+        return ns.metadata.labels or {}
+
     try:
-        cm = core_v1.read_namespaced_config_map(
-            name=configmap_name,
-            namespace=configmap_namespace
-        )
+        return lookup_cache.get_or_load("namespace-labels", namespace, load)
+    except ApiException:
+        return {}
 
-        data = cm.data or {}
-        policy_key = f"{environment}.yaml"
-        raw_policy = data.get(policy_key)
 
-        if not raw_policy:
-            raise ValueError(f"Policy key not found in ConfigMap: {policy_key}")
+# Fail-safe default policy.
+# This prevents the webhook from becoming too permissive if ConfigMap cannot be read.
+FAIL_SAFE_POLICY = {
+    "allowLatestTag": False,
+    "blockPrivileged": True,
+    "blockRootUser": True,
+    "warnRootUser": False,
+    "requireResources": True
+}
 
-        return yaml.safe_load(raw_policy) or {}
 
-    except Exception:
-        # Fail-safe default policy.
-        # This prevents the webhook from becoming too permissive if ConfigMap cannot be read.
-        return {
-            "allowLatestTag": False,
-            "blockPrivileged": True,
-            "blockRootUser": True,
-            "warnRootUser": False,
-            "requireResources": True
-        }
+# =====================================================
+# CONTAINERS
+# =====================================================
+def _all_containers(spec: dict, include_ephemeral: bool = True) -> list[dict]:
+    """
+    containers + initContainers, and ephemeralContainers
+    (kubectl debug) unless include_ephemeral is False.
+    """
+    containers = (spec.get("containers", []) or []) + (spec.get("initContainers", []) or [])
+    if include_ephemeral:
+        containers += spec.get("ephemeralContainers", []) or []
+    return containers
 
 
 # =====================================================
@@ -128,7 +185,8 @@ def validate_storage(
     pod: dict,
     core_v1: k8s_client.CoreV1Api,
     allowed_storage_classes: list[str],
-    environment: str
+    environment: str,
+    policy: dict | None = None
 ) -> Tuple[bool, str, list[str]]:
     spec = pod.get("spec", {})
     volumes = spec.get("volumes", [])
@@ -136,15 +194,20 @@ def validate_storage(
 
     warnings = []
 
+    # hostPath is a warning when the policy sets warnHostPath;
+    # without the key, only the dev environment warns.
+    warn_host_path = (policy or {}).get("warnHostPath", environment == "dev")
+
     # 1) hostPath policy
     for v in volumes:
         if v.get("hostPath") is not None:
-            if environment == "dev":
-                WARN_HOSTPATH.inc()
-                warnings.append("hostPath volume used in dev environment")
-                return True, "hostPath volume used in dev environment", warnings
+            if warn_host_path:
+                count_warning(WARN_HOSTPATH, "storage", "hostpath")
+                message = f"hostPath volume used in {environment} environment"
+                warnings.append(message)
+                return True, message, warnings
 
-            DENY_HOSTPATH.inc()
+            count_denial(DENY_HOSTPATH, "storage", "hostpath")
             return False, "hostPath volume not allowed", warnings
 
     # 2) PVC storageClass enforcement
@@ -155,22 +218,25 @@ def validate_storage(
 
         claim_name = pvc_ref.get("claimName")
         if not claim_name:
-            DENY_PVC_LOOKUP_FAILED.inc()
+            count_denial(DENY_PVC_LOOKUP_FAILED, "storage", "pvc_lookup_failed")
             return False, "PVC claimName missing", warnings
 
-        try:
+        def load_storage_class() -> Optional[str]:
             pvc = core_v1.read_namespaced_persistent_volume_claim(
                 name=claim_name,
                 namespace=namespace
             )
+            return pvc.spec.storage_class_name
+
+        try:
+            with stage("pvc_lookup"):
+                scn = lookup_cache.get_or_load("pvc-storage-class", f"{namespace}/{claim_name}", load_storage_class)
         except ApiException as e:
-            DENY_PVC_LOOKUP_FAILED.inc()
+            count_denial(DENY_PVC_LOOKUP_FAILED, "storage", "pvc_lookup_failed")
             return False, f"PVC lookup failed: {e.reason}", warnings
 
-        scn = pvc.spec.storage_class_name
-
         if scn not in allowed_storage_classes:
-            DENY_DISALLOWED_STORAGE_CLASS.inc()
+            count_denial(DENY_DISALLOWED_STORAGE_CLASS, "storage", "disallowed_storage_class")
             return (
                 False,
                 f"PVC storageClass '{scn}' not allowed. "
@@ -183,44 +249,59 @@ def validate_storage(
 # =====================================================
 # IMAGE POLICY
 # =====================================================
-def _is_latest_or_tagless_image(image: str) -> bool:
+def validate_images(spec: dict, policy: dict, index: Optional[ImagePolicyIndex] = None) -> Tuple[bool, str]:
     """
-    Detects latest or tagless images.
-    Examples:
-    - nginx             -> tagless, treated as latest
-    - nginx:latest      -> latest
-    - nginx:1.25        -> valid
-    - repo/nginx:1.25   -> valid
+    index is the policy's compiled ImagePolicyIndex (from the policy
+    snapshot); it is compiled here when not given.
     """
-    if not image:
-        return True
+    containers = _all_containers(spec)
 
-    image_without_digest = image.split("@")[0]
-    last_part = image_without_digest.split("/")[-1]
+    try:
+        if index is None:
+            index = compile_image_policy(policy)
+    except (ValueError, KeyError, TypeError, re.error) as e:
+        count_denial(DENY_INVALID_IMAGE_POLICY, "image", "invalid_image_policy")
+        return False, f"Invalid image policy: {e}"
 
-    if ":" not in last_part:
-        return True
+    if index.is_trivial:
+        return True, "Image policy passed"
 
-    tag = last_part.split(":")[-1]
-    return tag == "latest"
+    for c in containers:
+        name = c.get("name", "<noname>")
+        image = c.get("image", "")
 
+        ref = parse_image_reference(image)
+        if ref is None:
+            count_denial(DENY_INVALID_IMAGE_REFERENCE, "image", "invalid_image_reference")
+            return False, f"Invalid image reference: {name} ({image})"
 
-def validate_images(spec: dict, policy: dict) -> Tuple[bool, str]:
-    containers = (spec.get("containers", []) or []) + (spec.get("initContainers", []) or [])
+        if not index.registry_allowed(ref.registry):
+            count_denial(DENY_IMAGE_REGISTRY, "image", "image_registry")
+            return False, f"Image registry not allowed: {name} ({ref.registry})"
 
-    allow_latest = policy.get("allowLatestTag", False)
+        rule = index.lookup(ref)
 
-    if allow_latest:
-        return True, "Image policy passed"
+        if rule.deny:
+            count_denial(DENY_IMAGE_REPOSITORY, "image", "image_repository")
+            return False, f"Image repository not allowed: {name} ({ref.name})"
 
-    for c in containers:
-        name = c.get("name", "<noname>")
-        image = c.get("image", "")
+        if rule.require_digest and ref.digest is None:
+            count_denial(DENY_IMAGE_DIGEST, "image", "image_digest")
+            return False, f"Image must be pinned by digest: {name} ({image})"
 
-        if _is_latest_or_tagless_image(image):
-            DENY_LATEST_IMAGE.inc()
+        if ref.is_latest and not rule.allow_latest:
+            count_denial(DENY_LATEST_IMAGE, "image", "latest_image")
             return False, f"Latest or tagless image not allowed: {name} ({image})"
 
+        if ref.tag is not None and (rule.allowed_tags is not None or rule.tag_pattern is not None):
+            tag_ok = (
+                (rule.allowed_tags is not None and ref.tag in rule.allowed_tags)
+                or (rule.tag_pattern is not None and rule.tag_pattern.match(ref.tag) is not None)
+            )
+            if not tag_ok:
+                count_denial(DENY_IMAGE_TAG, "image", "image_tag")
+                return False, f"Image tag not allowed: {name} ({image})"
+
     return True, "Image policy passed"
 
 
@@ -229,7 +310,7 @@ def validate_images(spec: dict, policy: dict) -> Tuple[bool, str]:
 # =====================================================
 def validate_security(spec: dict, policy: dict) -> Tuple[bool, str, list[str]]:
     pod_sc = spec.get("securityContext", {}) or {}
-    containers = (spec.get("containers", []) or []) + (spec.get("initContainers", []) or [])
+    containers = _all_containers(spec)
 
     warnings = []
 
@@ -238,27 +319,27 @@ def validate_security(spec: dict, policy: dict) -> Tuple[bool, str, list[str]]:
         sc = c.get("securityContext", {}) or {}
 
         if policy.get("blockPrivileged", True) and sc.get("privileged") is True:
-            DENY_PRIVILEGED.inc()
+            count_denial(DENY_PRIVILEGED, "security", "privileged")
             return False, f"Privileged container: {name}", warnings
 
         if sc.get("allowPrivilegeEscalation") is True:
-            DENY_ESCALATION.inc()
+            count_denial(DENY_ESCALATION, "security", "privilege_escalation")
             return False, f"Privilege escalation: {name}", warnings
 
         run_as_user = sc.get("runAsUser", pod_sc.get("runAsUser"))
         if run_as_user == 0:
             if policy.get("blockRootUser", True):
-                DENY_ROOT.inc()
+                count_denial(DENY_ROOT, "security", "root_user")
                 return False, f"Running as root: {name}", warnings
 
             if policy.get("warnRootUser", False):
-                WARN_ROOT.inc()
+                count_warning(WARN_ROOT, "security", "root_user")
                 warnings.append(f"Container '{name}' is running as root user")
 
         run_as_non_root = sc.get("runAsNonRoot", pod_sc.get("runAsNonRoot"))
 
         if policy.get("blockRootUser", True) and run_as_non_root is not True:
-            DENY_NON_ROOT.inc()
+            count_denial(DENY_NON_ROOT, "security", "non_root")
             return False, f"runAsNonRoot not true: {name}", warnings
 
     return True, "Security policy passed", warnings
@@ -275,8 +356,30 @@ def _is_missing(val) -> bool:
     return False
 
 
-def validate_resources(spec: dict) -> Tuple[bool, str]:
-    containers = (spec.get("containers", []) or []) + (spec.get("initContainers", []) or [])
+def _format_quantity(resource: str, value: int) -> str:
+    return f"{value}m" if resource == "cpu" else str(value)
+
+
+def validate_resources(
+    spec: dict,
+    policy: dict | None = None,
+    resource_policy: Optional[ResourcePolicy] = None
+) -> Tuple[bool, str]:
+    """
+    Checks requests/limits presence (requireResources) and the optional
+    resourcePolicy bounds in one pass over the containers.
+    Quantities are compared as canonical integers (millicores / bytes).
+    resource_policy is the compiled policy from the snapshot, if any.
+    """
+    # Ephemeral containers cannot declare resources.
+    containers = _all_containers(spec, include_ephemeral=False)
+
+    try:
+        if resource_policy is None:
+            resource_policy = compile_resource_policy(policy or {})
+    except (ValueError, TypeError, AttributeError) as e:
+        count_denial(DENY_INVALID_RESOURCE_POLICY, "resources", "invalid_resource_policy")
+        return False, f"Invalid resource policy: {e}"
 
     for c in containers:
         name = c.get("name", "<noname>")
@@ -284,25 +387,95 @@ def validate_resources(spec: dict) -> Tuple[bool, str]:
         requests = (resources.get("requests", {}) or {})
         limits = (resources.get("limits", {}) or {})
 
-        req_cpu = requests.get("cpu")
-        req_mem = requests.get("memory")
-        lim_cpu = limits.get("cpu")
-        lim_mem = limits.get("memory")
-
-        if _is_missing(req_cpu):
-            DENY_MISSING_REQUESTS_CPU.inc()
-            return False, f"Missing resources.requests.cpu: {name}"
+        if resource_policy.require_resources:
+            req_cpu = requests.get("cpu")
+            req_mem = requests.get("memory")
+            lim_cpu = limits.get("cpu")
+            lim_mem = limits.get("memory")
+
+            if _is_missing(req_cpu):
+                count_denial(DENY_MISSING_REQUESTS_CPU, "resources", "missing_requests_cpu")
+                return False, f"Missing resources.requests.cpu: {name}"
+
+            if _is_missing(req_mem):
+                count_denial(DENY_MISSING_REQUESTS_MEMORY, "resources", "missing_requests_memory")
+                return False, f"Missing resources.requests.memory: {name}"
+
+            if _is_missing(lim_cpu):
+                count_denial(DENY_MISSING_LIMITS_CPU, "resources", "missing_limits_cpu")
+                return False, f"Missing resources.limits.cpu: {name}"
+
+            if _is_missing(lim_mem):
+                count_denial(DENY_MISSING_LIMITS_MEMORY, "resources", "missing_limits_memory")
+                return False, f"Missing resources.limits.memory: {name}"
+
+        for bounds in resource_policy.bounds:
+            resource = bounds.resource
+            parser = cpu_millicores if resource == "cpu" else memory_bytes
+            raw_request = requests.get(resource)
+            raw_limit = limits.get(resource)
+
+            try:
+                request = parser(raw_request) if not _is_missing(raw_request) else None
+                limit = parser(raw_limit) if not _is_missing(raw_limit) else None
+            except ValueError:
+                count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="invalid"), "resources", "resource_range")
+                return False, f"Invalid {resource} quantity: {name}"
+
+            if request is not None:
+                if bounds.min_request is not None and request < bounds.min_request:
+                    count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="min_request"), "resources", "resource_range")
+                    return False, (
+                        f"resources.requests.{resource} below minimum "
+                        f"{_format_quantity(resource, bounds.min_request)}: {name}"
+                    )
+
+                if bounds.max_request is not None and request > bounds.max_request:
+                    count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="max_request"), "resources", "resource_range")
+                    return False, (
+                        f"resources.requests.{resource} above maximum "
+                        f"{_format_quantity(resource, bounds.max_request)}: {name}"
+                    )
+
+            if limit is not None:
+                if bounds.min_limit is not None and limit < bounds.min_limit:
+                    count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="min_limit"), "resources", "resource_range")
+                    return False, (
+                        f"resources.limits.{resource} below minimum "
+                        f"{_format_quantity(resource, bounds.min_limit)}: {name}"
+                    )
+
+                if bounds.max_limit is not None and limit > bounds.max_limit:
+                    count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="max_limit"), "resources", "resource_range")
+                    return False, (
+                        f"resources.limits.{resource} above maximum "
+                        f"{_format_quantity(resource, bounds.max_limit)}: {name}"
+                    )
+
+            if bounds.max_ratio is not None and request and limit is not None:
+                if limit > request * bounds.max_ratio:
+                    count_denial(DENY_RESOURCE_RANGE.labels(resource=resource, check="ratio"), "resources", "resource_range")
+                    return False, (
+                        f"{resource} limit/request ratio above {bounds.max_ratio:g}: {name}"
+                    )
+
+    return True, "Resource policy passed"
 
-        if _is_missing(req_mem):
-            DENY_MISSING_REQUESTS_MEMORY.inc()
-            return False, f"Missing resources.requests.memory: {name}"
 
-        if _is_missing(lim_cpu):
-            DENY_MISSING_LIMITS_CPU.inc()
-            return False, f"Missing resources.limits.cpu: {name}"
-
-        if _is_missing(lim_mem):
-            DENY_MISSING_LIMITS_MEMORY.inc()
-            return False, f"Missing resources.limits.memory: {name}"
+# =====================================================
+# DECLARATIVE RULES
+# =====================================================
+def validate_rules(pod: dict, spec: dict, policy: dict, plan: Optional[RulePlan] = None) -> Tuple[bool, str, list[str]]:
+    """
+    Evaluates the policy 'rules' key (see rule_engine.compile_rules).
+    Pod rules see the whole pod; container rules see every container of spec.
+    plan is the compiled RulePlan from the snapshot, if any.
+    """
+    try:
+        if plan is None:
+            plan = compile_rules(policy)
+    except (ValueError, KeyError, TypeError, re.error) as e:
+        count_denial(DENY_INVALID_RULES, "rules", "invalid_rules")
+        return False, f"Invalid policy rules: {e}", []
 
-    return True, "Resource policy passed"
\ No newline at end of file
+    return evaluate_rules(plan, pod, _all_containers(spec))
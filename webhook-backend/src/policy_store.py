@@ -0,0 +1,411 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import yaml
+from kubernetes import client as k8s_client
+from kubernetes import watch as k8s_watch
+
+from prometheus_client import Counter, Gauge
+
+from audit_logger import save_audit_log
+from image_policy import ImagePolicyIndex, compile_image_policy
+from resource_policy import ResourcePolicy, compile_resource_policy
+from mutation import MutationPlan, compile_mutation_plan
+from rule_engine import RulePlan, compile_rules
+from scoping import ScopeIndex, merge_policy
+from policies import FAIL_SAFE_POLICY
+
+logger = logging.getLogger("admission-webhook.policy")
+
+# =====================================================
+# CONFIG
+# =====================================================
+POLICY_WATCH_TIMEOUT = int(os.getenv("POLICY_WATCH_TIMEOUT", "300"))
+POLICY_WATCH_MAX_BACKOFF = float(os.getenv("POLICY_WATCH_MAX_BACKOFF", "30"))
+
+SCOPES_KEY = "scopes.yaml"
+
+# Environment + scope combinations compiled per snapshot; beyond this the
+# effective policy is still compiled per request, just not kept.
+SCOPED_POLICY_CACHE_SIZE = int(os.getenv("SCOPED_POLICY_CACHE_SIZE", "1024"))
+
+# =====================================================
+# PROMETHEUS METRICS (POLICY RELOAD)
+# =====================================================
+POLICY_RELOADS = Counter(
+    "admission_policy_reloads_total",
+    "Policy ConfigMap reload attempts",
+    ["result"]
+)
+
+POLICY_VALIDATION_FAILURES = Counter(
+    "admission_policy_validation_failures_total",
+    "Policy versions rejected by schema validation"
+)
+
+POLICY_WATCH_ERRORS = Counter(
+    "admission_policy_watch_errors_total",
+    "Policy ConfigMap watch errors (reconnected with backoff)"
+)
+
+POLICY_ACTIVE_VERSION = Gauge(
+    "admission_policy_active_version_info",
+    "Active policy version (value is always 1)",
+    ["version", "resource_version"]
+)
+
+POLICY_LAST_RELOAD = Gauge(
+    "admission_policy_last_reload_timestamp_seconds",
+    "Unix time the active policy version was published"
+)
+
+
+# =====================================================
+# SCHEMA VALIDATION
+# =====================================================
+class PolicyValidationError(ValueError):
+    pass
+
+
+POLICY_SCHEMA = {
+    "allowLatestTag": bool,
+    "blockPrivileged": bool,
+    "blockRootUser": bool,
+    "warnRootUser": bool,
+    "warnHostPath": bool,
+    "requireResources": bool,
+    "imagePolicy": dict,
+    "resourcePolicy": dict,
+    "defaults": dict,
+    "rules": list,
+}
+
+
+class CompiledPolicy(NamedTuple):
+    """
+    An effective policy with its compiled sections. A section is None when
+    it failed to compile; the request path then compiles it again and
+    denies with the error (only possible for merged scope overrides).
+    """
+    policy: dict
+    image: Optional[ImagePolicyIndex]
+    resources: Optional[ResourcePolicy]
+    mutation: Optional[MutationPlan]
+    rules: Optional[RulePlan]
+
+
+_COMPILERS = (
+    ("image", compile_image_policy),
+    ("resources", compile_resource_policy),
+    ("mutation", compile_mutation_plan),
+    ("rules", compile_rules),
+)
+
+
+def compile_policy(policy: dict, strict: bool = True) -> CompiledPolicy:
+    """
+    Compiles every section of a policy. strict=True raises the first
+    compile error; otherwise failed sections are left as None.
+    """
+    sections = {}
+    for name, compile_section in _COMPILERS:
+        try:
+            sections[name] = compile_section(policy)
+        except Exception:
+            if strict:
+                raise
+            sections[name] = None
+    return CompiledPolicy(policy=policy, **sections)
+
+
+def validate_policy(policy, where: str) -> CompiledPolicy:
+    """
+    Checks a (possibly partial) environment policy against POLICY_SCHEMA
+    and compiles its image, resource, defaults and rules sections.
+    Raises PolicyValidationError.
+    """
+    if policy is None:
+        policy = {}
+
+    if not isinstance(policy, dict):
+        raise PolicyValidationError(f"{where}: policy must be a mapping")
+
+    for key, value in policy.items():
+        expected = POLICY_SCHEMA.get(key)
+        if expected is None:
+            raise PolicyValidationError(f"{where}: unknown policy key '{key}'")
+        if not isinstance(value, expected):
+            raise PolicyValidationError(f"{where}: '{key}' must be {expected.__name__}")
+
+    try:
+        return compile_policy(policy)
+    except Exception as e:
+        raise PolicyValidationError(f"{where}: {e}") from e
+
+
+# =====================================================
+# POLICY SNAPSHOT
+# =====================================================
+class PolicySnapshot(NamedTuple):
+    """
+    One published policy version. environments maps each environment to
+    its CompiledPolicy; compiled caches (environment, scope orders) ->
+    CompiledPolicy for scoped requests, so compiled state is swapped
+    together with the policy and requests never recompile it.
+    reads_pod_labels is True if a scope selector or a pod rule reads the
+    pod labels, so a label-only UPDATE has to be re-evaluated.
+    """
+    version: str
+    resource_version: str
+    environments: dict
+    scopes: ScopeIndex
+    loaded_at: float
+    compiled: dict
+    reads_pod_labels: bool
+
+
+def policy_version(data: dict) -> str:
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    return digest[:12]
+
+
+def build_snapshot(data: dict, resource_version: str = "") -> PolicySnapshot:
+    """
+    Parses and validates every '<environment>.yaml' key and 'scopes.yaml'.
+    Either the whole ConfigMap is valid or PolicyValidationError is raised;
+    a snapshot is never partially applied.
+    """
+    environments = {}
+
+    for key, raw in data.items():
+        if not key.endswith(".yaml") or key == SCOPES_KEY:
+            continue
+        try:
+            parsed = yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise PolicyValidationError(f"{key}: invalid YAML: {e}") from e
+        environments[key[:-len(".yaml")]] = validate_policy(parsed, key)
+
+    try:
+        raw_scopes = yaml.safe_load(data.get(SCOPES_KEY) or "") or []
+        if not isinstance(raw_scopes, list):
+            raise PolicyValidationError(f"{SCOPES_KEY}: must be a list")
+        scopes = ScopeIndex(raw_scopes)
+    except PolicyValidationError:
+        raise
+    except Exception as e:
+        raise PolicyValidationError(f"{SCOPES_KEY}: {e}") from e
+
+    compiled = list(environments.values())
+    for scope in scopes.all():
+        compiled.append(validate_policy(scope.overrides, f"{SCOPES_KEY} ({scope.name})"))
+
+    return PolicySnapshot(
+        version=policy_version(data),
+        resource_version=resource_version,
+        environments=environments,
+        scopes=scopes,
+        loaded_at=time.time(),
+        compiled={},
+        reads_pod_labels=scopes.reads_pod_labels or any(c.rules.reads_labels for c in compiled)
+    )
+
+
+FAIL_SAFE_SNAPSHOT = PolicySnapshot(
+    version="fail-safe",
+    resource_version="",
+    environments={},
+    scopes=ScopeIndex([]),
+    loaded_at=0.0,
+    compiled={},
+    reads_pod_labels=False
+)
+
+FAIL_SAFE_COMPILED = compile_policy(FAIL_SAFE_POLICY)
+
+
+# =====================================================
+# POLICY STORE
+# =====================================================
+class PolicyStore:
+    """
+    Holds the active PolicySnapshot and keeps it in sync with the policy
+    ConfigMap through a background watch.
+
+    - new versions are validated first; invalid ones are rejected and the
+      last-known-good snapshot stays active
+    - a valid version is published by replacing a single reference, so a
+      request always sees one complete snapshot
+    - without any valid version the fail-safe policy is used
+    """
+
+    def __init__(self, core_v1: k8s_client.CoreV1Api, configmap_name: str, configmap_namespace: str):
+        self.core_v1 = core_v1
+        self.configmap_name = configmap_name
+        self.configmap_namespace = configmap_namespace
+        self.snapshot = FAIL_SAFE_SNAPSHOT
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------------------------------
+    # Read path
+    # -------------------------------------------------
+    def compiled_for(self, environment: str, namespace_labels: dict, pod_labels: dict) -> Tuple[CompiledPolicy, list[str]]:
+        """
+        Effective compiled policy for a request: the environment policy with
+        the overrides of every matching scope, lowest priority first.
+        Returns the compiled policy and the names of the applied scopes.
+        """
+        snapshot = self.snapshot
+
+        base = snapshot.environments.get(environment)
+        if base is None:
+            return FAIL_SAFE_COMPILED, []
+
+        scopes = snapshot.scopes.select(namespace_labels, pod_labels)
+        if not scopes:
+            return base, []
+
+        key = (environment, tuple(scope.order for scope in scopes))
+        compiled = snapshot.compiled.get(key)
+        if compiled is None:
+            policy = base.policy
+            for scope in scopes:
+                policy = merge_policy(policy, scope.overrides)
+            compiled = compile_policy(policy, strict=False)
+            if len(snapshot.compiled) < SCOPED_POLICY_CACHE_SIZE:
+                snapshot.compiled[key] = compiled
+
+        return compiled, [scope.name for scope in scopes]
+
+    def policy_for(self, environment: str, namespace_labels: dict, pod_labels: dict) -> Tuple[dict, list[str]]:
+        """Like compiled_for, returning the effective policy mapping."""
+        compiled, scopes = self.compiled_for(environment, namespace_labels, pod_labels)
+        return compiled.policy, scopes
+
+    # -------------------------------------------------
+    # Reload path
+    # -------------------------------------------------
+    def apply(self, data: Optional[dict], resource_version: str = "") -> bool:
+        """
+        Validates and publishes a ConfigMap version.
+        Returns True if the active snapshot changed.
+        """
+        data = data or {}
+        version = policy_version(data)
+        current = self.snapshot
+
+        if version == current.version:
+            POLICY_RELOADS.labels(result="unchanged").inc()
+            return False
+
+        try:
+            snapshot = build_snapshot(data, resource_version)
+        except PolicyValidationError as e:
+            POLICY_RELOADS.labels(result="rejected").inc()
+            POLICY_VALIDATION_FAILURES.inc()
+            logger.error(
+                "Policy version %s rejected, keeping %s: %s",
+                version, current.version, e
+            )
+            self._audit("policy_rejected", version, str(e))
+            return False
+
+        self.snapshot = snapshot
+
+        POLICY_RELOADS.labels(result="applied").inc()
+        POLICY_ACTIVE_VERSION.clear()
+        POLICY_ACTIVE_VERSION.labels(version=snapshot.version, resource_version=resource_version).set(1)
+        POLICY_LAST_RELOAD.set(snapshot.loaded_at)
+        logger.info(
+            "Policy version %s applied (previous %s, resourceVersion %s)",
+            snapshot.version, current.version, resource_version
+        )
+        self._audit("policy_reload", snapshot.version, f"Policy version {snapshot.version} applied (previous {current.version})")
+        return True
+
+    def _audit(self, decision: str, version: str, reason: str) -> None:
+        save_audit_log(
+            namespace=self.configmap_namespace,
+            pod_name=self.configmap_name,
+            image="-",
+            decision=decision,
+            policy=version,
+            reason=reason,
+            environment="-"
+        )
+
+    def load(self) -> None:
+        """
+        Reads the ConfigMap once. Used at startup before serving requests.
+        """
+        try:
+            cm = self.core_v1.read_namespaced_config_map(
+                name=self.configmap_name,
+                namespace=self.configmap_namespace
+            )
+        except Exception as e:
+            POLICY_WATCH_ERRORS.inc()
+            logger.error("Policy ConfigMap could not be read, using %s: %s", self.snapshot.version, e)
+            return
+
+        self.apply(cm.data, cm.metadata.resource_version or "")
+
+    def _watch_loop(self) -> None:
+        backoff = 1.0
+
+        while not self._stop.is_set():
+            try:
+                cm = self.core_v1.read_namespaced_config_map(
+                    name=self.configmap_name,
+                    namespace=self.configmap_namespace
+                )
+                self.apply(cm.data, cm.metadata.resource_version or "")
+
+                watcher = k8s_watch.Watch()
+                for event in watcher.stream(
+                    self.core_v1.list_namespaced_config_map,
+                    namespace=self.configmap_namespace,
+                    field_selector=f"metadata.name={self.configmap_name}",
+                    resource_version=cm.metadata.resource_version,
+                    timeout_seconds=POLICY_WATCH_TIMEOUT,
+                    # The server closes the watch after timeout_seconds;
+                    # the read timeout must not cut it short.
+                    _request_timeout=POLICY_WATCH_TIMEOUT + 30
+                ):
+                    if self._stop.is_set():
+                        watcher.stop()
+                        break
+
+                    obj = event["object"]
+                    if event["type"] in ("ADDED", "MODIFIED"):
+                        self.apply(obj.data, obj.metadata.resource_version or "")
+                    elif event["type"] == "DELETED":
+                        POLICY_RELOADS.labels(result="rejected").inc()
+                        logger.error("Policy ConfigMap deleted, keeping %s", self.snapshot.version)
+                        self._audit("policy_rejected", "-", "Policy ConfigMap deleted; last-known-good policy kept")
+
+                backoff = 1.0
+
+            except Exception as e:
+                POLICY_WATCH_ERRORS.inc()
+                logger.warning("Policy ConfigMap watch failed, retrying in %.0fs: %s", backoff, e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, POLICY_WATCH_MAX_BACKOFF)
+
+    def start(self) -> None:
+        """
+        Loads the current policy synchronously, then keeps it updated
+        from a daemon watch thread.
+        """
+        self.load()
+        self._thread = threading.Thread(target=self._watch_loop, name="policy-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter as StackCounter
+
+from prometheus_client import Counter
+
+# =====================================================
+# CONFIG
+# =====================================================
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+PROFILER_MIN_INTERVAL = 0.001
+PROFILER_DEFAULT_INTERVAL = 0.01
+
+# =====================================================
+# PROMETHEUS METRICS (PROFILER)
+# =====================================================
+PROFILE_RUNS = Counter(
+    "admission_profiler_runs_total",
+    "Sampling profiler runs",
+    ["result"]
+)
+
+# Only one profile may run at a time; concurrent requests are rejected
+# instead of stacking samplers on a live admission worker.
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(code, cache: dict) -> str:
+    label = cache.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        cache[code] = label
+    return label
+
+
+def _collapse(frame, thread_name: str, cache: dict) -> str:
+    """
+    Builds one collapsed stack line (root first, leaf last),
+    the input format of flamegraph.pl / speedscope.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code, cache))
+        frame = frame.f_back
+    labels.append(f"thread:{thread_name}")
+    labels.reverse()
+    return ";".join(labels)
+
+
+def sample_profile(
+    seconds: float,
+    interval: float = PROFILER_DEFAULT_INTERVAL,
+    trace_allocations: bool = False,
+    top_allocations: int = 25
+) -> dict:
+    """
+    Samples the stacks of every Python thread for a bounded duration.
+    - seconds  -> capped at PROFILER_MAX_SECONDS
+    - interval -> seconds between samples, at least 1ms
+    - trace_allocations -> also returns tracemalloc top allocations
+
+    The sampler runs on its own thread and never pauses the event loop;
+    its own CPU time is reported as the profiling overhead.
+    Raises ProfilerBusy if another profile is already running.
+    """
+    seconds = max(0.0, min(seconds, PROFILER_MAX_SECONDS))
+    interval = max(interval, PROFILER_MIN_INTERVAL)
+
+    if not _profile_lock.acquire(blocking=False):
+        PROFILE_RUNS.labels(result="busy").inc()
+        raise ProfilerBusy("A profile is already running")
+
+    started_tracemalloc = False
+
+    try:
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracemalloc = True
+
+        stacks = StackCounter()
+        result = {}
+        caller_ident = threading.get_ident()
+
+        def run() -> None:
+            own_ident = threading.get_ident()
+            skip = {own_ident, caller_ident}
+            cache = {}
+            names = {t.ident: t.name for t in threading.enumerate()}
+            samples = 0
+
+            cpu_start = time.thread_time()
+            wall_start = time.perf_counter()
+            deadline = wall_start + seconds
+
+            while True:
+                for ident, frame in sys._current_frames().items():
+                    if ident in skip:
+                        continue
+                    name = names.get(ident)
+                    if name is None:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                        name = names.get(ident, str(ident))
+                    stacks[_collapse(frame, name, cache)] += 1
+                samples += 1
+
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                time.sleep(min(interval, deadline - now))
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            result.update({
+                "duration_seconds": round(wall, 4),
+                "samples": samples,
+                "sampler_cpu_seconds": round(cpu, 6),
+                "overhead_percent": round(cpu / wall * 100, 3) if wall else 0.0,
+            })
+
+        sampler = threading.Thread(target=run, name="profile-sampler", daemon=True)
+        sampler.start()
+        sampler.join()
+
+        result["interval_seconds"] = interval
+        result["collapsed"] = "\n".join(
+            f"{stack} {count}" for stack, count in stacks.most_common()
+        )
+
+        if trace_allocations:
+            snapshot = tracemalloc.take_snapshot()
+            result["allocations"] = [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:top_allocations]
+            ]
+
+        PROFILE_RUNS.labels(result="ok").inc()
+        return result
+
+    finally:
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _profile_lock.release()
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# =====================================================
+# CONFIG
+# =====================================================
+QUANTITY_CACHE_SIZE = int(os.getenv("QUANTITY_CACHE_SIZE", "4096"))
+RESOURCE_POLICY_CACHE_SIZE = 16
+
+# =====================================================
+# KUBERNETES QUANTITY PARSING
+# =====================================================
+# quantity := [sign] number [suffix | exponent]
+_QUANTITY = re.compile(
+    r"([+-]?)([0-9]+(?:\.[0-9]*)?|\.[0-9]+)"
+    r"(?:(Ki|Mi|Gi|Ti|Pi|Ei|n|u|m|k|M|G|T|P|E)|[eE]([+-]?[0-9]+))?"
+)
+
+# suffix -> (numerator, denominator) multiplier
+_SUFFIXES = {
+    None: (1, 1),
+    "n": (1, 10 ** 9),
+    "u": (1, 10 ** 6),
+    "m": (1, 10 ** 3),
+    "k": (10 ** 3, 1),
+    "M": (10 ** 6, 1),
+    "G": (10 ** 9, 1),
+    "T": (10 ** 12, 1),
+    "P": (10 ** 15, 1),
+    "E": (10 ** 18, 1),
+    "Ki": (2 ** 10, 1),
+    "Mi": (2 ** 20, 1),
+    "Gi": (2 ** 30, 1),
+    "Ti": (2 ** 40, 1),
+    "Pi": (2 ** 50, 1),
+    "Ei": (2 ** 60, 1),
+}
+
+
+def _parse_quantity(value) -> tuple[int, int]:
+    """
+    Parses a quantity into an exact (numerator, denominator) pair in base
+    units (cores or bytes). Only integer arithmetic is used.
+    Raises ValueError for malformed or negative quantities.
+    """
+    text = str(value).strip()
+    match = _QUANTITY.fullmatch(text)
+    if not match:
+        raise ValueError(f"invalid quantity: {value!r}")
+
+    sign, number, suffix, exponent = match.groups()
+    if sign == "-":
+        raise ValueError(f"negative quantity: {value!r}")
+
+    whole, _, fraction = number.partition(".")
+    numerator = int((whole or "0") + fraction)
+    denominator = 10 ** len(fraction)
+
+    if exponent is not None:
+        power = int(exponent)
+        if power >= 0:
+            numerator *= 10 ** power
+        else:
+            denominator *= 10 ** -power
+    else:
+        mul, div = _SUFFIXES[suffix]
+        numerator *= mul
+        denominator *= div
+
+    return numerator, denominator
+
+
+def _ceil_div(numerator: int, denominator: int) -> int:
+    return -(-numerator // denominator)
+
+
+@lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def cpu_millicores(value) -> int:
+    """
+    '100m' -> 100, '1.5' -> 1500, '2e3' -> 2000000.
+    Rounded up, as the apiserver does for sub-millicore values.
+    """
+    numerator, denominator = _parse_quantity(value)
+    return _ceil_div(numerator * 1000, denominator)
+
+
+@lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def memory_bytes(value) -> int:
+    """
+    '128Mi' -> 134217728, '1.5Gi' -> 1610612736, '1G' -> 1000000000.
+    """
+    numerator, denominator = _parse_quantity(value)
+    return _ceil_div(numerator, denominator)
+
+
+_PARSERS = {
+    "cpu": cpu_millicores,
+    "memory": memory_bytes,
+}
+
+
+# =====================================================
+# COMPILED RESOURCE POLICY
+# =====================================================
+class ResourceBounds(NamedTuple):
+    resource: str
+    min_request: Optional[int]
+    max_request: Optional[int]
+    min_limit: Optional[int]
+    max_limit: Optional[int]
+    max_ratio: Optional[float]
+
+
+class ResourcePolicy(NamedTuple):
+    require_resources: bool
+    bounds: tuple
+
+
+def _bound(parser, raw: dict, key: str) -> Optional[int]:
+    value = raw.get(key)
+    return parser(value) if value is not None else None
+
+
+def _compile(policy: dict) -> ResourcePolicy:
+    raw_policy = policy.get("resourcePolicy", {}) or {}
+    bounds = []
+
+    for resource, parser in _PARSERS.items():
+        raw = raw_policy.get(resource)
+        if not raw:
+            continue
+
+        ratio = raw.get("maxLimitRequestRatio")
+        bounds.append(ResourceBounds(
+            resource=resource,
+            min_request=_bound(parser, raw, "minRequest"),
+            max_request=_bound(parser, raw, "maxRequest"),
+            min_limit=_bound(parser, raw, "minLimit"),
+            max_limit=_bound(parser, raw, "maxLimit"),
+            max_ratio=float(ratio) if ratio is not None else None
+        ))
+
+    return ResourcePolicy(
+        require_resources=bool(policy.get("requireResources", True)),
+        bounds=tuple(bounds)
+    )
+
+
+_policy_cache: dict = {}
+
+
+def compile_resource_policy(policy: dict) -> ResourcePolicy:
+    """
+    Compiles requireResources and resourcePolicy bounds into canonical
+    integers (millicores / bytes). Reused while those keys are unchanged.
+
+    resourcePolicy.<cpu|memory> keys:
+    - minRequest, maxRequest, minLimit, maxLimit -> quantities
+    - maxLimitRequestRatio                       -> number (limit / request)
+
+    Raises ValueError for malformed quantities.
+    """
+    key = json.dumps(
+        [policy.get("requireResources", True), policy.get("resourcePolicy")],
+        sort_keys=True,
+        default=str
+    )
+
+    compiled = _policy_cache.get(key)
+    if compiled is None:
+        compiled = _compile(policy)
+        if len(_policy_cache) >= RESOURCE_POLICY_CACHE_SIZE:
+            _policy_cache.clear()
+        _policy_cache[key] = compiled
+
+    return compiled
@@ -0,0 +1,505 @@
+import re
+import json
+from bisect import bisect_left, bisect_right
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from prometheus_client import Counter
+
+from explain import current_explain
+
+# =====================================================
+# CONFIG
+# =====================================================
+RULE_PLAN_CACHE_SIZE = 16
+
+_SCOPES = ("pod", "container")
+_ACTIONS = ("deny", "warn")
+
+# Sentinel for fields that are not present in the object.
+_MISSING = object()
+
+# =====================================================
+# PROMETHEUS METRICS (DECLARATIVE RULES)
+# =====================================================
+RULE_MATCHES = Counter(
+    "admission_rule_matches_total",
+    "Declarative policy rules that fired, by rule id",
+    ["rule", "action"]
+)
+
+# =====================================================
+# FIELD PATHS
+# =====================================================
+def _compile_path(raw) -> tuple:
+    """
+    'spec.hostNetwork' -> ('spec', 'hostNetwork').
+    A list form is used for keys containing dots:
+    ['metadata', 'labels', 'app.kubernetes.io/name'].
+    """
+    if isinstance(raw, str):
+        parts = tuple(raw.split("."))
+    elif isinstance(raw, list):
+        parts = tuple(str(part) for part in raw)
+    else:
+        raise ValueError(f"field must be a string or a list: {raw!r}")
+
+    if not parts or any(part == "" for part in parts):
+        raise ValueError(f"invalid field path: {raw!r}")
+    return parts
+
+
+def _extract(obj, path: tuple):
+    for key in path:
+        if not isinstance(obj, dict):
+            return _MISSING
+        obj = obj.get(key, _MISSING)
+        if obj is _MISSING:
+            return _MISSING
+    return obj
+
+
+# =====================================================
+# OPERATORS
+# =====================================================
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _op_equals(expected):
+    return lambda value: value is not _MISSING and value == expected
+
+
+def _op_not_equals(expected):
+    return lambda value: value is _MISSING or value != expected
+
+
+def _op_in(expected):
+    values = list(expected)
+    return lambda value: value is not _MISSING and value in values
+
+
+def _op_not_in(expected):
+    values = list(expected)
+    return lambda value: value is _MISSING or value not in values
+
+
+def _op_exists(_):
+    return lambda value: value is not _MISSING and value is not None
+
+
+def _op_absent(_):
+    return lambda value: value is _MISSING or value is None
+
+
+def _op_contains(expected):
+    return lambda value: isinstance(value, list) and expected in value
+
+
+def _op_matches(expected):
+    pattern = re.compile(str(expected))
+    return lambda value: isinstance(value, str) and pattern.fullmatch(value) is not None
+
+
+def _op_compare(compare):
+    def build(expected):
+        if _number(expected) is None:
+            raise ValueError(f"numeric operator requires a number: {expected!r}")
+
+        def test(value):
+            number = _number(value)
+            return number is not None and compare(number, expected)
+        return test
+    return build
+
+
+_OPERATORS = {
+    "equals": _op_equals,
+    "notEquals": _op_not_equals,
+    "in": _op_in,
+    "notIn": _op_not_in,
+    "exists": _op_exists,
+    "absent": _op_absent,
+    "contains": _op_contains,
+    "matches": _op_matches,
+    "greaterThan": _op_compare(lambda a, b: a > b),
+    "lessThan": _op_compare(lambda a, b: a < b),
+}
+
+_LIST_OPERATORS = ("in", "notIn")
+_VALUELESS_OPERATORS = ("exists", "absent")
+
+
+# =====================================================
+# COMPILED RULES
+# =====================================================
+class CompiledRule(NamedTuple):
+    id: str
+    action: str
+    message: str
+    order: int
+    # (slot, test) pairs; every condition must hold for the rule to fire
+    conditions: tuple
+
+
+class ScopePlan(NamedTuple):
+    """
+    Rules of one scope. Field paths shared between rules are extracted
+    once per object into numbered slots. Rules are grouped by their first
+    condition so most of them are skipped without being evaluated:
+    - equals / in on a constant -> looked up by the field value
+    - contains on a constant    -> looked up by each list element
+    - matches                   -> one combined regex per field decides
+                                   whether any of the patterns can match
+                                   (patterns with inline flags keep their own)
+    - greaterThan / lessThan    -> thresholds sorted per field, the rules
+                                   that can fire are found by bisection
+    - anything else             -> checked linearly
+    """
+    paths: tuple
+    by_value: dict
+    by_element: dict
+    by_pattern: tuple
+    by_threshold: tuple
+    linear: tuple
+
+    def fired(self, obj: dict) -> list[CompiledRule]:
+        values = [_extract(obj, path) for path in self.paths]
+
+        candidates = list(self.linear)
+
+        for slot, index in self.by_value.items():
+            try:
+                candidates.extend(index.get(values[slot], ()))
+            except TypeError:
+                # Unhashable value (list / mapping): cannot equal a constant.
+                continue
+
+        for slot, index in self.by_element.items():
+            value = values[slot]
+            if isinstance(value, list):
+                for item in value:
+                    try:
+                        candidates.extend(index.get(item, ()))
+                    except TypeError:
+                        continue
+
+        for slot, combined, rules in self.by_pattern:
+            value = values[slot]
+            if isinstance(value, str) and combined.fullmatch(value) is not None:
+                candidates.extend(rules)
+
+        for slot, op, thresholds, rules in self.by_threshold:
+            number = _number(values[slot])
+            if number is None:
+                continue
+            if op == "lessThan":
+                candidates.extend(rules[bisect_right(thresholds, number):])
+            else:
+                candidates.extend(rules[:bisect_left(thresholds, number)])
+
+        if len(candidates) > 1:
+            # A contains rule can be reached through several list elements.
+            candidates = sorted(set(candidates), key=lambda rule: rule.order)
+
+        matched = []
+        for rule in candidates:
+            for slot, test in rule.conditions:
+                if not test(values[slot]):
+                    break
+            else:
+                matched.append(rule)
+        return matched
+
+
+_LABELS_PATH = ("metadata", "labels")
+
+
+class RulePlan(NamedTuple):
+    pod: ScopePlan
+    container: ScopePlan
+    rule_ids: tuple
+
+    @property
+    def empty(self) -> bool:
+        return not self.rule_ids
+
+    @property
+    def reads_labels(self) -> bool:
+        """True if a pod rule reads metadata, metadata.labels or a label."""
+        return any(path[:2] == _LABELS_PATH[:len(path)] for path in self.pod.paths)
+
+
+def _hashable(values: list) -> bool:
+    try:
+        for value in values:
+            hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _group(condition: dict) -> Tuple[Optional[str], list]:
+    """
+    How a rule is grouped by its first condition: ('value', constants),
+    ('element', [constant]), ('pattern', [regex]), ('threshold', [number])
+    or (None, []).
+    """
+    op = condition.get("op")
+    if op == "equals" and _hashable([condition.get("value")]):
+        return "value", [condition.get("value")]
+    if op == "in" and _hashable(condition.get("values") or []):
+        return "value", list(condition.get("values"))
+    if op == "contains" and _hashable([condition.get("value")]):
+        return "element", [condition.get("value")]
+    if op in ("greaterThan", "lessThan"):
+        return "threshold", [condition.get("value")]
+    if op == "matches" and re.compile(str(condition.get("value"))).groups == 0:
+        # Patterns with groups are left out so back-references stay valid.
+        return "pattern", [str(condition.get("value"))]
+    return None, []
+
+
+_DEFAULT_FLAGS = re.compile("").flags
+
+
+def _combine_patterns(slot: int, entries: list) -> list:
+    """
+    (slot, regex, rules) entries for the patterns of one field. Patterns
+    without inline flags share one alternation; a pattern with global
+    flags such as (?i) cannot be nested in one, so it keeps its own regex.
+    """
+    plain = []
+    result = []
+    for pattern, rule in entries:
+        if re.compile(pattern).flags == _DEFAULT_FLAGS:
+            plain.append((pattern, rule))
+        else:
+            result.append((slot, re.compile(pattern), (rule,)))
+
+    if plain:
+        try:
+            combined = re.compile("|".join(f"(?:{pattern})" for pattern, _ in plain))
+            result.append((slot, combined, tuple(rule for _, rule in plain)))
+        except re.error:
+            result.extend((slot, re.compile(pattern), (rule,)) for pattern, rule in plain)
+    return result
+
+
+def _compile_scope(raw_rules: list) -> ScopePlan:
+    slots = {}
+    by_value = {}
+    by_element = {}
+    patterns = {}
+    thresholds = {}
+    linear = []
+
+    for order, raw in raw_rules:
+        conditions = []
+        for condition in raw["match"]:
+            path = _compile_path(condition.get("field"))
+            slot = slots.setdefault(path, len(slots))
+
+            op = condition.get("op")
+            build: Optional[Callable] = _OPERATORS.get(op)
+            if build is None:
+                raise ValueError(f"rule {raw['id']}: unsupported operator: {op}")
+
+            if op in _LIST_OPERATORS:
+                expected = condition.get("values")
+                if not isinstance(expected, list) or not expected:
+                    raise ValueError(f"rule {raw['id']}: operator {op} requires values")
+            elif op in _VALUELESS_OPERATORS:
+                expected = None
+            else:
+                if "value" not in condition:
+                    raise ValueError(f"rule {raw['id']}: operator {op} requires a value")
+                expected = condition["value"]
+
+            try:
+                conditions.append((slot, build(expected)))
+            except (ValueError, re.error) as e:
+                raise ValueError(f"rule {raw['id']}: {e}") from e
+
+        rule = CompiledRule(
+            id=raw["id"],
+            action=raw.get("action", "deny"),
+            message=str(raw.get("message") or "Policy rule violated"),
+            order=order,
+            conditions=tuple(conditions)
+        )
+
+        group, keys = _group(raw["match"][0])
+        first_slot = rule.conditions[0][0]
+
+        if group == "value":
+            index = by_value.setdefault(first_slot, {})
+        elif group == "element":
+            index = by_element.setdefault(first_slot, {})
+        elif group == "pattern":
+            patterns.setdefault(first_slot, []).append((keys[0], rule))
+            continue
+        elif group == "threshold":
+            thresholds.setdefault((first_slot, raw["match"][0]["op"]), []).append((keys[0], rule))
+            continue
+        else:
+            linear.append(rule)
+            continue
+
+        for key in dict.fromkeys(keys):
+            index.setdefault(key, []).append(rule)
+
+    for entries in thresholds.values():
+        entries.sort(key=lambda entry: entry[0])
+
+    def freeze(index: dict) -> dict:
+        return {slot: {key: tuple(rules) for key, rules in by_key.items()} for slot, by_key in index.items()}
+
+    return ScopePlan(
+        paths=tuple(slots),
+        by_value=freeze(by_value),
+        by_element=freeze(by_element),
+        by_pattern=tuple(
+            entry for slot, entries in patterns.items() for entry in _combine_patterns(slot, entries)
+        ),
+        by_threshold=tuple(
+            (slot, op, tuple(t for t, _ in entries), tuple(rule for _, rule in entries))
+            for (slot, op), entries in thresholds.items()
+        ),
+        linear=tuple(linear)
+    )
+
+
+def _compile(raw_rules) -> RulePlan:
+    if raw_rules is None:
+        raw_rules = []
+    if not isinstance(raw_rules, list):
+        raise ValueError("rules must be a list")
+
+    seen = set()
+    by_scope = {scope: [] for scope in _SCOPES}
+
+    for order, raw in enumerate(raw_rules):
+        if not isinstance(raw, dict):
+            raise ValueError(f"rule #{order} must be a mapping")
+
+        rule_id = raw.get("id")
+        if not isinstance(rule_id, str) or not rule_id:
+            raise ValueError(f"rule #{order}: id is required")
+        if rule_id in seen:
+            raise ValueError(f"duplicate rule id: {rule_id}")
+        seen.add(rule_id)
+
+        scope = raw.get("scope", "container")
+        if scope not in _SCOPES:
+            raise ValueError(f"rule {rule_id}: unsupported scope: {scope}")
+
+        if raw.get("action", "deny") not in _ACTIONS:
+            raise ValueError(f"rule {rule_id}: unsupported action: {raw.get('action')}")
+
+        match = raw.get("match")
+        if not isinstance(match, list) or not match or not all(isinstance(c, dict) for c in match):
+            raise ValueError(f"rule {rule_id}: match must be a non-empty list of conditions")
+
+        by_scope[scope].append((order, raw))
+
+    return RulePlan(
+        pod=_compile_scope(by_scope["pod"]),
+        container=_compile_scope(by_scope["container"]),
+        rule_ids=tuple(raw["id"] for raw in raw_rules)
+    )
+
+
+_plan_cache: dict = {}
+
+# id(rules list) -> (rules list, plan). Policy snapshots hand out the same
+# list object on every request, so the JSON key is only built on a miss.
+_identity_cache: dict = {}
+
+
+def compile_rules(policy: dict) -> RulePlan:
+    """
+    Compiles the policy 'rules' key, reused while it is unchanged
+    (once per policy version).
+
+        rules:
+          - id: no-host-network
+            scope: pod                  # pod | container (default)
+            action: deny                # deny (default) | warn
+            message: hostNetwork not allowed
+            match:                      # all conditions must hold
+              - {field: spec.hostNetwork, op: equals, value: true}
+
+    Container rules are evaluated for every container; their fields are
+    relative to the container. Operators: equals, notEquals, in, notIn,
+    exists, absent, contains, matches, greaterThan, lessThan.
+
+    Raises ValueError for malformed rules.
+    """
+    raw_rules = policy.get("rules")
+
+    cached = _identity_cache.get(id(raw_rules))
+    if cached is not None and cached[0] is raw_rules:
+        return cached[1]
+
+    key = json.dumps(raw_rules, sort_keys=True, default=str)
+
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = _compile(raw_rules)
+        if len(_plan_cache) >= RULE_PLAN_CACHE_SIZE:
+            _plan_cache.clear()
+        _plan_cache[key] = plan
+
+        # Per-rule series exist (at zero) as soon as a rule is loaded.
+        for raw in raw_rules or []:
+            RULE_MATCHES.labels(rule=raw["id"], action=raw.get("action", "deny"))
+
+    if len(_identity_cache) >= RULE_PLAN_CACHE_SIZE:
+        _identity_cache.clear()
+    _identity_cache[id(raw_rules)] = (raw_rules, plan)
+
+    return plan
+
+
+# =====================================================
+# EVALUATION
+# =====================================================
+def _rule_fired(rule: CompiledRule, explain, target: str) -> None:
+    if explain is not None:
+        explain.add("rule", rule=rule.id, action=rule.action, target=target)
+        if explain.replay:
+            return
+    RULE_MATCHES.labels(rule=rule.id, action=rule.action).inc()
+
+
+def evaluate_rules(plan: RulePlan, pod: dict, containers: list[dict]) -> Tuple[bool, str, list[str]]:
+    """
+    Evaluates pod rules against the pod, then container rules against each
+    container. Stops at the first deny; warn rules are collected.
+    """
+    warnings = []
+
+    if plan.empty:
+        return True, "Rule policy passed", warnings
+
+    explain = current_explain.get()
+
+    if plan.pod.paths:
+        for rule in plan.pod.fired(pod):
+            _rule_fired(rule, explain, "pod")
+            if rule.action == "deny":
+                return False, f"{rule.message} (rule {rule.id})", warnings
+            warnings.append(f"{rule.message} (rule {rule.id})")
+
+    if plan.container.paths:
+        for c in containers:
+            name = c.get("name", "<noname>")
+            for rule in plan.container.fired(c):
+                _rule_fired(rule, explain, name)
+                if rule.action == "deny":
+                    return False, f"{rule.message}: {name} (rule {rule.id})", warnings
+                warnings.append(f"{rule.message}: {name} (rule {rule.id})")
+
+    return True, "Rule policy passed", warnings
@@ -0,0 +1,183 @@
+from typing import NamedTuple, Optional
+
+# =====================================================
+# LABEL SELECTORS
+# =====================================================
+_OPERATORS = ("In", "NotIn", "Exists", "DoesNotExist")
+
+
+class Requirement(NamedTuple):
+    key: str
+    operator: str
+    values: frozenset
+
+
+class LabelSelector:
+    """
+    Compiled Kubernetes label selector (matchLabels + matchExpressions).
+    An empty selector matches everything.
+    """
+    __slots__ = ("requirements",)
+
+    def __init__(self, raw: Optional[dict]):
+        raw = raw or {}
+        requirements = [
+            Requirement(str(key), "In", frozenset([str(value)]))
+            for key, value in (raw.get("matchLabels", {}) or {}).items()
+        ]
+
+        for expr in raw.get("matchExpressions", []) or []:
+            operator = expr.get("operator")
+            if operator not in _OPERATORS:
+                raise ValueError(f"unsupported selector operator: {operator}")
+            values = frozenset(str(v) for v in expr.get("values", []) or [])
+            if operator in ("In", "NotIn") and not values:
+                raise ValueError(f"operator {operator} requires values: {expr.get('key')}")
+            requirements.append(Requirement(str(expr["key"]), operator, values))
+
+        self.requirements = tuple(requirements)
+
+    def matches(self, labels: dict) -> bool:
+        for req in self.requirements:
+            present = req.key in labels
+            if req.operator == "In":
+                if not present or labels[req.key] not in req.values:
+                    return False
+            elif req.operator == "NotIn":
+                if present and labels[req.key] in req.values:
+                    return False
+            elif req.operator == "Exists":
+                if not present:
+                    return False
+            elif present:
+                return False
+        return True
+
+    def anchor(self) -> Optional[Requirement]:
+        """
+        The requirement used to index the selector: the In requirement with
+        the fewest values, else an Exists requirement, else None.
+        """
+        best = None
+        for req in self.requirements:
+            if req.operator == "In" and (best is None or best.operator != "In" or len(req.values) < len(best.values)):
+                best = req
+            elif req.operator == "Exists" and best is None:
+                best = req
+        return best
+
+
+# =====================================================
+# SCOPED RULE SETS
+# =====================================================
+class Scope(NamedTuple):
+    name: str
+    priority: int
+    order: int
+    namespace_selector: LabelSelector
+    pod_selector: LabelSelector
+    overrides: dict
+
+
+class ScopeIndex:
+    """
+    Scoped policy overrides compiled from the ConfigMap 'scopes.yaml' key:
+
+        - name: payments-strict
+          priority: 10
+          namespaceSelector: {matchLabels: {team: payments}}
+          podSelector:
+            matchExpressions:
+              - {key: tier, operator: In, values: [frontend]}
+          policy:
+            allowLatestTag: false
+
+    Each scope is indexed once under a single anchor requirement in an
+    inverted index keyed by (target, label key, label value), or by
+    (target, label key) for Exists. Selecting scopes for a pod walks the
+    pod and namespace labels, so only scopes sharing a label are verified
+    instead of testing every selector. Scopes with no positive requirement
+    are always verified.
+    """
+
+    def __init__(self, raw_scopes: list):
+        self.by_value = {}
+        self.by_key = {}
+        self.unanchored = []
+        self.scopes = []
+
+        for order, raw in enumerate(raw_scopes or []):
+            scope = Scope(
+                name=str(raw.get("name", f"scope-{order}")),
+                priority=int(raw.get("priority", 0)),
+                order=order,
+                namespace_selector=LabelSelector(raw.get("namespaceSelector")),
+                pod_selector=LabelSelector(raw.get("podSelector")),
+                overrides=raw.get("policy", {}) or {}
+            )
+            if not isinstance(scope.overrides, dict):
+                raise ValueError(f"scope policy must be a mapping: {scope.name}")
+            self._insert(scope)
+            self.scopes.append(scope)
+
+    def _insert(self, scope: Scope) -> None:
+        for target, selector in (("pod", scope.pod_selector), ("namespace", scope.namespace_selector)):
+            anchor = selector.anchor()
+            if anchor is None:
+                continue
+            if anchor.operator == "In":
+                for value in anchor.values:
+                    self.by_value.setdefault((target, anchor.key, value), []).append(scope)
+            else:
+                self.by_key.setdefault((target, anchor.key), []).append(scope)
+            return
+
+        self.unanchored.append(scope)
+
+    def all(self) -> list[Scope]:
+        return list(self.scopes)
+
+    @property
+    def reads_pod_labels(self) -> bool:
+        """True if any scope selects on pod labels."""
+        return any(scope.pod_selector.requirements for scope in self.scopes)
+
+    def select(self, namespace_labels: dict, pod_labels: dict) -> list[Scope]:
+        """
+        Returns the matching scopes ordered by priority (lowest first),
+        then by their position in the ConfigMap.
+        """
+        if not self.scopes:
+            return []
+
+        candidates = {}
+        for target, labels in (("pod", pod_labels), ("namespace", namespace_labels)):
+            for key, value in labels.items():
+                for scope in self.by_value.get((target, key, value), ()):
+                    candidates[scope.order] = scope
+                for scope in self.by_key.get((target, key), ()):
+                    candidates[scope.order] = scope
+
+        for scope in self.unanchored:
+            candidates[scope.order] = scope
+
+        matched = [
+            scope for scope in candidates.values()
+            if scope.namespace_selector.matches(namespace_labels) and scope.pod_selector.matches(pod_labels)
+        ]
+        matched.sort(key=lambda scope: (scope.priority, scope.order))
+        return matched
+
+
+def merge_policy(base: dict, overrides: dict) -> dict:
+    """
+    Returns base updated with overrides; nested mappings are merged,
+    other values (including lists) are replaced.
+    """
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_policy(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
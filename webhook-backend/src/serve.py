@@ -0,0 +1,184 @@
+import os
+import sys
+import signal
+import logging
+import threading
+import multiprocessing
+import multiprocessing.connection
+
+import uvicorn
+
+from tls_reloader import create_reloader
+
+logger = logging.getLogger("admission-webhook.serve")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# combined -> one process serves admission and the UI/API on ADMISSION_PORT
+# split    -> admission and UI/API run in separate processes and listeners,
+#             each with its own event loop, threadpool and connection limit
+SERVE_MODE = os.getenv("SERVE_MODE", "combined").lower()
+
+TLS_KEYFILE = os.getenv("TLS_KEYFILE", "/tls/tls.key")
+TLS_CERTFILE = os.getenv("TLS_CERTFILE", "/tls/tls.crt")
+# The apiserver keeps webhook connections idle for up to 90s; uvicorn's 5s
+# default closes them, so nearly every admission request paid a handshake.
+KEEPALIVE_SECONDS = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+
+ROLES = {
+    "all": {
+        "target": "app",
+        "port": int(os.getenv("ADMISSION_PORT", "8443")),
+        "metrics_port": 9091,
+        "threads": int(os.getenv("ADMISSION_THREADS", "40")),
+        "max_connections": int(os.getenv("ADMISSION_MAX_CONNECTIONS", "0")),
+    },
+    "admission": {
+        "target": "admission_app",
+        "port": int(os.getenv("ADMISSION_PORT", "8443")),
+        "metrics_port": 9091,
+        "threads": int(os.getenv("ADMISSION_THREADS", "40")),
+        "max_connections": int(os.getenv("ADMISSION_MAX_CONNECTIONS", "0")),
+    },
+    "ui": {
+        "target": "ui_app",
+        "port": int(os.getenv("UI_PORT", "8444")),
+        "metrics_port": int(os.getenv("UI_METRICS_PORT", "9092")),
+        "threads": int(os.getenv("UI_THREADS", "8")),
+        "max_connections": int(os.getenv("UI_MAX_CONNECTIONS", "64")),
+    },
+}
+
+
+# =====================================================
+# GRACEFUL SHUTDOWN
+# =====================================================
+class GracefulServer(uvicorn.Server):
+    """
+    uvicorn stops listening on the first SIGTERM. Here the first signal only
+    turns readiness off (lifecycle.py); the listener closes after
+    SHUTDOWN_DELAY_SECONDS, then uvicorn drains in-flight requests for up to
+    SHUTDOWN_DRAIN_SECONDS. A second signal skips the delay.
+    Also polls the mounted TLS files for a new certificate (tls_reloader.py).
+    """
+
+    def __init__(self, config, tls=None):
+        super().__init__(config)
+        self.tls = tls
+
+    async def on_tick(self, counter: int) -> bool:
+        if self.tls is not None and counter % 10 == 0:
+            self.tls.reload_if_changed()
+        return await super().on_tick(counter)
+
+    def handle_exit(self, sig, frame):
+        # Imported here: the split supervisor never loads the app modules.
+        from lifecycle import lifecycle, SHUTDOWN_DELAY_SECONDS
+
+        if lifecycle.draining or self.should_exit:
+            return super().handle_exit(sig, frame)
+
+        if lifecycle.ready:
+            lifecycle.begin_shutdown()
+            timer = threading.Timer(SHUTDOWN_DELAY_SECONDS, self.stop_listening, args=(sig, frame))
+            timer.daemon = True
+            timer.start()
+            return
+
+        self.stop_listening(sig, frame)
+
+    def stop_listening(self, sig, frame):
+        from lifecycle import lifecycle
+
+        lifecycle.begin_drain()
+        super().handle_exit(sig, frame)
+
+
+# =====================================================
+# PROCESSES
+# =====================================================
+def serve(role: str) -> None:
+    """
+    Runs one role in the current process. The role is exported before
+    app is imported, since app starts its background work on import.
+    """
+    settings = ROLES[role]
+    os.environ["WEBHOOK_ROLE"] = role
+    os.environ["METRICS_PORT"] = str(settings["metrics_port"])
+    os.environ["WEBHOOK_THREADS"] = str(settings["threads"])
+
+    import app as webhook
+    from audit_logger import init_audit_writer
+    from lifecycle import SHUTDOWN_DRAIN_SECONDS
+
+    # The UI process writes its few audit rows synchronously; buffering and
+    # spill replay belong to the admission process alone.
+    if role != "ui":
+        init_audit_writer()
+
+    config = uvicorn.Config(
+        getattr(webhook, settings["target"]),
+        host="0.0.0.0",
+        port=settings["port"],
+        access_log=False,
+        # 0 -> no limit; over the limit uvicorn answers 503 immediately
+        limit_concurrency=settings["max_connections"] or None,
+        # In-flight requests still running after this are cancelled.
+        timeout_graceful_shutdown=int(SHUTDOWN_DRAIN_SECONDS),
+        timeout_keep_alive=KEEPALIVE_SECONDS,
+    )
+
+    # uvicorn would build a static SSLContext from file paths; the reloader's
+    # context is swapped in after load() so certificates can be rotated live.
+    tls = create_reloader(TLS_CERTFILE, TLS_KEYFILE)
+    config.load()
+    if tls is not None:
+        config.ssl = tls.context
+        config.http_protocol_class = tls.protocol_class(config.http_protocol_class)
+
+    GracefulServer(config, tls=tls).run()
+
+
+def serve_split() -> int:
+    """
+    Starts the admission and UI processes and supervises them. If either
+    exits, the other is stopped too and the container exits non-zero, so
+    the kubelet restarts the pod instead of running half a webhook.
+    """
+    processes = [
+        multiprocessing.Process(target=serve, args=(role,), name=f"webhook-{role}")
+        for role in ("admission", "ui")
+    ]
+    for process in processes:
+        process.start()
+
+    stopping = []
+
+    def stop(signum, frame):
+        if signum is not None:
+            stopping.append(signum)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    sentinels = {process.sentinel: process for process in processes}
+    exited = sentinels[multiprocessing.connection.wait(list(sentinels))[0]]
+    if not stopping:
+        logger.warning("%s exited with code %s, stopping the others", exited.name, exited.exitcode)
+
+    stop(None, None)
+    for process in processes:
+        process.join()
+
+    # A requested shutdown exits cleanly; a crashed role fails the container.
+    return 0 if stopping else (exited.exitcode or 1)
+
+
+if __name__ == "__main__":
+    if SERVE_MODE == "split":
+        sys.exit(serve_split())
+    serve("all")
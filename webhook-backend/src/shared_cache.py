@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from prometheus_client import Counter
+
+from explain import current_explain
+
+logger = logging.getLogger("admission-webhook.cache")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# none   -> near-cache only (per replica)
+# memory -> in-process key-value store (local stand-in for tests / dev)
+# redis  -> Redis-protocol store, e.g. a sidecar on 127.0.0.1:6379
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "none").lower()
+SHARED_CACHE_ADDR = os.getenv("SHARED_CACHE_ADDR", "127.0.0.1:6379")
+SHARED_CACHE_TIMEOUT = float(os.getenv("SHARED_CACHE_TIMEOUT", "0.05"))
+SHARED_CACHE_TTL = int(os.getenv("SHARED_CACHE_TTL", "30"))
+
+NEAR_CACHE_TTL = float(os.getenv("NEAR_CACHE_TTL", "5"))
+NEAR_CACHE_SIZE = int(os.getenv("NEAR_CACHE_SIZE", "4096"))
+
+# Bumped when the layout of a cached value changes, so replicas running
+# different versions never read each other's entries.
+CACHE_SCHEMA_VERSION = "v1"
+CACHE_KEY_PREFIX = "admission"
+
+# =====================================================
+# PROMETHEUS METRICS (CACHE)
+# =====================================================
+CACHE_REQUESTS = Counter(
+    "admission_cache_requests_total",
+    "Lookup cache reads by kind and the tier that answered",
+    ["kind", "tier"]
+)
+
+CACHE_ERRORS = Counter(
+    "admission_cache_errors_total",
+    "Shared cache backend errors (lookups fall through to the apiserver)",
+    ["backend"]
+)
+
+
+# =====================================================
+# SHARED BACKENDS
+# =====================================================
+class CacheBackend:
+    """
+    Shared key-value tier. Implementations raise on transport errors;
+    TieredCache counts them and falls through to the loader.
+    """
+    name = "none"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process stand-in for a shared store. Shared by every TieredCache
+    in the process, so several caches behave like replicas of one store.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Minimal Redis-protocol (RESP) client for GET / SET EX, enough for a
+    Redis, KeyDB or Dragonfly sidecar. One connection guarded by a lock;
+    it is reopened after any error.
+    """
+    name = "redis"
+
+    def __init__(self, addr: str = SHARED_CACHE_ADDR, timeout: float = SHARED_CACHE_TIMEOUT):
+        host, _, port = addr.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port or 6379))
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    def _close(self) -> None:
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by cache server")
+
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RuntimeError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        raise RuntimeError(f"unexpected RESP reply: {line[:32]!r}")
+
+    def _call(self, *args):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall(self._encode(*args))
+                return self._read_reply()
+            except (OSError, ConnectionError, ValueError):
+                self._close()
+                raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._call("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._call("SET", key, value, "EX", ttl)
+
+
+_shared_memory_backend = MemoryBackend()
+
+
+def build_backend(name: str = SHARED_CACHE_BACKEND) -> CacheBackend:
+    if name == "redis":
+        return RedisBackend()
+    if name == "memory":
+        return _shared_memory_backend
+    return CacheBackend()
+
+
+# =====================================================
+# NEAR-CACHE
+# =====================================================
+class NearCache:
+    """
+    Small per-process LRU with a TTL, consulted before the shared tier.
+    """
+
+    def __init__(self, size: int = NEAR_CACHE_SIZE, ttl: float = NEAR_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+
+# =====================================================
+# READ-THROUGH TIERED CACHE
+# =====================================================
+class TieredCache:
+    """
+    Read-through lookup cache: near-cache -> shared tier -> loader.
+
+    Keys are '<prefix>:<schema version>:<kind>:<key>'. Values are stored as
+    JSON; a loader result is written to both tiers. Shared-tier failures are
+    counted and never fail the lookup. Loader exceptions are not cached.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, near: Optional[NearCache] = None):
+        self.backend = backend if backend is not None else build_backend()
+        self.near = near if near is not None else NearCache()
+
+    @staticmethod
+    def key(kind: str, key: str) -> str:
+        return f"{CACHE_KEY_PREFIX}:{CACHE_SCHEMA_VERSION}:{kind}:{key}"
+
+    def _shared_get(self, full_key: str, counted: bool = True):
+        if self.backend.name == "none":
+            return None
+        try:
+            raw = self.backend.get(full_key)
+        except Exception as e:
+            if counted:
+                CACHE_ERRORS.labels(backend=self.backend.name).inc()
+            logger.debug("Shared cache read failed for %s: %s", full_key, e)
+            return None
+        if raw is None:
+            return None
+        try:
+            return (json.loads(raw),)
+        except ValueError:
+            return None
+
+    def _shared_set(self, full_key: str, value, ttl: int, counted: bool = True) -> None:
+        if self.backend.name == "none":
+            return
+        try:
+            self.backend.set(full_key, json.dumps(value, separators=(",", ":")).encode("utf-8"), ttl)
+        except Exception as e:
+            if counted:
+                CACHE_ERRORS.labels(backend=self.backend.name).inc()
+            logger.debug("Shared cache write failed for %s: %s", full_key, e)
+
+    def get_or_load(self, kind: str, key: str, loader: Callable[[], object], ttl: int = SHARED_CACHE_TTL):
+        full_key = self.key(kind, key)
+        explain = current_explain.get()
+        # Replays (/debug/explain) must not move the cache hit ratios.
+        counted = explain is None or not explain.replay
+
+        entry = self.near.get(full_key)
+        if entry is not None:
+            if counted:
+                CACHE_REQUESTS.labels(kind=kind, tier="near").inc()
+            if explain is not None:
+                explain.add("cache", cache=kind, key=key, tier="near")
+            return entry[0]
+
+        shared = self._shared_get(full_key, counted)
+        if shared is not None:
+            if counted:
+                CACHE_REQUESTS.labels(kind=kind, tier="shared").inc()
+            if explain is not None:
+                explain.add("cache", cache=kind, key=key, tier="shared", backend=self.backend.name)
+            self.near.set(full_key, shared[0])
+            return shared[0]
+
+        if counted:
+            CACHE_REQUESTS.labels(kind=kind, tier="miss").inc()
+        if explain is not None:
+            explain.add("cache", cache=kind, key=key, tier="miss")
+        value = loader()
+        self.near.set(full_key, value)
+        self._shared_set(full_key, value, ttl, counted)
+        return value
@@ -0,0 +1,401 @@
+import os
+import json
+import math
+import time
+import base64
+import hashlib
+import functools
+import threading
+import urllib.request
+from array import array
+from collections import deque
+from typing import Iterable, Optional
+
+from prometheus_client import Counter
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Window layout: SKETCH_BUCKETS buckets of SKETCH_BUCKET_SECONDS each
+# (default: one hour in one-minute buckets). Memory is fixed by these and
+# the sketch sizes below, not by traffic or history.
+SKETCH_BUCKET_SECONDS = int(os.getenv("SKETCH_BUCKET_SECONDS", "60"))
+SKETCH_BUCKETS = int(os.getenv("SKETCH_BUCKETS", "60"))
+
+# Count-Min: overestimate <= e/width * total with probability 1 - e^-depth.
+SKETCH_CMS_WIDTH = int(os.getenv("SKETCH_CMS_WIDTH", "1024"))
+SKETCH_CMS_DEPTH = int(os.getenv("SKETCH_CMS_DEPTH", "4"))
+# Heavy-hitter candidates tracked per dimension and bucket.
+SKETCH_TOPK = int(os.getenv("SKETCH_TOPK", "50"))
+# HyperLogLog precision: 2^p registers, standard error 1.04 / sqrt(2^p).
+SKETCH_HLL_PRECISION = int(os.getenv("SKETCH_HLL_PRECISION", "12"))
+# Decisions waiting for the background thread that feeds the sketches;
+# beyond this they are dropped (and counted) instead of blocking a request.
+SKETCH_QUEUE_SIZE = int(os.getenv("SKETCH_QUEUE_SIZE", "10000"))
+# How long the background thread sleeps once the queue is empty.
+SKETCH_DRAIN_INTERVAL = float(os.getenv("SKETCH_DRAIN_INTERVAL", "0.1"))
+
+# Top-K dimensions count denials; distinct dimensions count every request.
+TOP_DIMENSIONS = ("policy", "namespace", "image", "pod")
+DISTINCT_DIMENSIONS = ("namespaces", "pods", "images", "denied_pods")
+
+# =====================================================
+# PROMETHEUS METRICS (SKETCHES)
+# =====================================================
+SKETCH_EVENTS_DROPPED = Counter(
+    "admission_sketch_events_dropped_total",
+    "Admission decisions not recorded in the sketches because the queue was full"
+)
+
+# Namespaces, images and retried pods repeat, so most keys are hashed (and
+# their Count-Min cells computed) once instead of on every decision.
+@functools.lru_cache(maxsize=4096)
+def _hash(key: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+@functools.lru_cache(maxsize=4096)
+def _cms_cells(hashes: tuple[int, int], width: int, depth: int) -> tuple[int, ...]:
+    h1, h2 = hashes
+    return tuple(row * width + (h1 + row * h2) % width for row in range(depth))
+
+
+def _encode(data) -> str:
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+# =====================================================
+# COUNT-MIN SKETCH + HEAVY HITTERS
+# =====================================================
+class TopK:
+    """
+    Count-Min sketch with a bounded candidate set of heavy hitters.
+
+    - add() is O(depth); the candidate minimum is only rescanned when a
+      new key displaces it
+    - counts are upper bounds (Count-Min never underestimates)
+    - merge() adds the tables and re-ranks the union of candidates
+    """
+
+    __slots__ = ("width", "depth", "capacity", "table", "candidates", "total", "_min_key", "_min_count")
+
+    def __init__(self, width: int = SKETCH_CMS_WIDTH, depth: int = SKETCH_CMS_DEPTH, capacity: int = SKETCH_TOPK):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.table = array("I", bytes(4 * width * depth))
+        self.candidates = {}
+        self.total = 0
+        self._min_key = None
+        self._min_count = 0
+
+    def _cells(self, hashes: tuple[int, int]) -> tuple[int, ...]:
+        return _cms_cells(hashes, self.width, self.depth)
+
+    def add(self, key: str, hashes: tuple[int, int], count: int = 1) -> None:
+        table = self.table
+        estimate = None
+        for cell in self._cells(hashes):
+            value = table[cell] + count
+            table[cell] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self.total += count
+
+        candidates = self.candidates
+        if key in candidates:
+            candidates[key] = estimate
+            if key == self._min_key:
+                self._rescan_min()
+        elif len(candidates) < self.capacity:
+            candidates[key] = estimate
+            if self._min_key is None or estimate < self._min_count:
+                self._min_key, self._min_count = key, estimate
+        elif estimate > self._min_count:
+            del candidates[self._min_key]
+            candidates[key] = estimate
+            self._rescan_min()
+
+    def _rescan_min(self) -> None:
+        if self.candidates:
+            self._min_key = min(self.candidates, key=self.candidates.get)
+            self._min_count = self.candidates[self._min_key]
+        else:
+            self._min_key, self._min_count = None, 0
+
+    def estimate(self, key: str) -> int:
+        table = self.table
+        return min(table[cell] for cell in self._cells(_hash(key)))
+
+    def merge(self, other: "TopK") -> None:
+        self.merge_all([other])
+
+    def merge_all(self, others: list["TopK"]) -> None:
+        """Adds several sketches in one column-wise pass, then re-ranks once."""
+        tables = [self.table] + [other.table for other in others]
+        self.table = array("I", map(sum, zip(*tables)))
+        self.total += sum(other.total for other in others)
+        union = set(self.candidates).union(*(other.candidates for other in others))
+        ranked = sorted(((self.estimate(key), key) for key in union), reverse=True)[:self.capacity]
+        self.candidates = {key: count for count, key in ranked}
+        self._rescan_min()
+
+    def copy(self) -> "TopK":
+        sketch = TopK.__new__(TopK)
+        sketch.width, sketch.depth, sketch.capacity = self.width, self.depth, self.capacity
+        sketch.table = array("I", self.table)
+        sketch.candidates = dict(self.candidates)
+        sketch.total = self.total
+        sketch._min_key, sketch._min_count = self._min_key, self._min_count
+        return sketch
+
+    def top(self, k: int) -> list[dict]:
+        ranked = sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [{"key": key, "count": count} for key, count in ranked]
+
+    def to_dict(self) -> dict:
+        return {"table": _encode(self.table), "candidates": self.candidates, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TopK":
+        sketch = cls()
+        table = array("I")
+        table.frombytes(base64.b64decode(data["table"]))
+        if len(table) != len(sketch.table):
+            raise ValueError("Count-Min sketch size mismatch")
+        sketch.table = table
+        sketch.candidates = dict(data["candidates"])
+        sketch.total = data["total"]
+        sketch._rescan_min()
+        return sketch
+
+
+# =====================================================
+# HYPERLOGLOG
+# =====================================================
+class HyperLogLog:
+    """Distinct counter in 2^p one-byte registers; merge is a register-wise max."""
+
+    __slots__ = ("p", "registers")
+
+    def __init__(self, p: int = SKETCH_HLL_PRECISION):
+        self.p = p
+        self.registers = bytearray(1 << p)
+
+    def add(self, hashes: tuple[int, int]) -> None:
+        h = hashes[0]
+        p = self.p
+        index = h >> (64 - p)
+        remainder = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.merge_all([other])
+
+    def merge_all(self, others: list["HyperLogLog"]) -> None:
+        registers = [self.registers] + [other.registers for other in others]
+        self.registers = bytearray(map(max, zip(*registers)))
+
+    def copy(self) -> "HyperLogLog":
+        sketch = HyperLogLog.__new__(HyperLogLog)
+        sketch.p = self.p
+        sketch.registers = bytearray(self.registers)
+        return sketch
+
+    def to_dict(self) -> str:
+        return _encode(self.registers)
+
+    @classmethod
+    def from_dict(cls, data: str) -> "HyperLogLog":
+        sketch = cls()
+        registers = bytearray(base64.b64decode(data))
+        if len(registers) != len(sketch.registers):
+            raise ValueError("HyperLogLog precision mismatch")
+        sketch.registers = registers
+        return sketch
+
+
+# =====================================================
+# TIME-BUCKETED WINDOWS
+# =====================================================
+class SketchBucket:
+    """All sketches for one time bucket (or a merge of several)."""
+
+    __slots__ = ("start", "top", "distinct")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.top = {dimension: TopK() for dimension in TOP_DIMENSIONS}
+        self.distinct = {dimension: HyperLogLog() for dimension in DISTINCT_DIMENSIONS}
+
+    def merge(self, other: "SketchBucket") -> None:
+        self.merge_all([other])
+
+    def merge_all(self, others: list["SketchBucket"]) -> None:
+        if not others:
+            return
+        for dimension, sketch in self.top.items():
+            sketch.merge_all([other.top[dimension] for other in others])
+        for dimension, sketch in self.distinct.items():
+            sketch.merge_all([other.distinct[dimension] for other in others])
+
+    def copy(self) -> "SketchBucket":
+        bucket = SketchBucket.__new__(SketchBucket)
+        bucket.start = self.start
+        bucket.top = {dimension: sketch.copy() for dimension, sketch in self.top.items()}
+        bucket.distinct = {dimension: sketch.copy() for dimension, sketch in self.distinct.items()}
+        return bucket
+
+    def summary(self, k: int) -> dict:
+        return {
+            "top": {dimension: sketch.top(k) for dimension, sketch in self.top.items()},
+            "denied": self.top["policy"].total,
+            "distinct": {dimension: sketch.count() for dimension, sketch in self.distinct.items()},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start,
+            "top": {dimension: sketch.to_dict() for dimension, sketch in self.top.items()},
+            "distinct": {dimension: sketch.to_dict() for dimension, sketch in self.distinct.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SketchBucket":
+        bucket = cls(data["start"])
+        bucket.top = {dimension: TopK.from_dict(data["top"][dimension]) for dimension in TOP_DIMENSIONS}
+        bucket.distinct = {dimension: HyperLogLog.from_dict(data["distinct"][dimension]) for dimension in DISTINCT_DIMENSIONS}
+        return bucket
+
+
+class WindowedSketches:
+    """
+    Ring of SKETCH_BUCKETS time buckets fed from the admission path.
+
+    - record() only appends the decision to a deque; a background thread
+      started by start() hashes it and updates the sketches (add()), so
+      the request does not pay for the hashing
+    - window(seconds) merges the buckets inside the window into one
+      SketchBucket, whose serialized form merges across replicas
+    """
+
+    def __init__(self, bucket_seconds: int = SKETCH_BUCKET_SECONDS, buckets: int = SKETCH_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.ring: list[Optional[SketchBucket]] = [None] * buckets
+        self._lock = threading.Lock()
+        self.pending: deque = deque()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="admission-sketches", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            if not self.flush():
+                time.sleep(SKETCH_DRAIN_INTERVAL)
+
+    def flush(self) -> int:
+        """Adds the queued decisions on the calling thread; returns how many."""
+        count = 0
+        while True:
+            try:
+                event = self.pending.popleft()
+            except IndexError:
+                return count
+            self.add(*event)
+            count += 1
+
+    def _bucket(self, now: float) -> SketchBucket:
+        start = int(now // self.bucket_seconds) * self.bucket_seconds
+        index = (start // self.bucket_seconds) % len(self.ring)
+        bucket = self.ring[index]
+        if bucket is None or bucket.start != start:
+            bucket = SketchBucket(start)
+            self.ring[index] = bucket
+        return bucket
+
+    def record(
+        self,
+        namespace: str,
+        pod_name: str,
+        images: Iterable[str],
+        decision: str,
+        policy: str,
+        now: Optional[float] = None
+    ) -> None:
+        """Queues one decision for add(); dropped when SKETCH_QUEUE_SIZE are waiting."""
+        if len(self.pending) >= SKETCH_QUEUE_SIZE:
+            SKETCH_EVENTS_DROPPED.inc()
+            return
+        # deque.append is atomic, so the request threads need no lock here.
+        self.pending.append((namespace, pod_name, images, decision, policy, time.time() if now is None else now))
+
+    def add(
+        self,
+        namespace: str,
+        pod_name: str,
+        images: Iterable[str],
+        decision: str,
+        policy: str,
+        now: Optional[float] = None
+    ) -> None:
+        """Hashes outside the lock; the locked part is a few array writes."""
+        pod = f"{namespace}/{pod_name}"
+        images = [image for image in images if image]
+        pod_hashes = _hash(pod)
+        namespace_hashes = _hash(namespace)
+        image_hashes = [(image, _hash(image)) for image in images]
+        denied = decision == "deny"
+        policy_hashes = _hash(policy) if denied else None
+
+        with self._lock:
+            bucket = self._bucket(time.time() if now is None else now)
+            distinct = bucket.distinct
+            distinct["namespaces"].add(namespace_hashes)
+            distinct["pods"].add(pod_hashes)
+            for _, hashes in image_hashes:
+                distinct["images"].add(hashes)
+
+            if denied:
+                top = bucket.top
+                distinct["denied_pods"].add(pod_hashes)
+                top["policy"].add(policy, policy_hashes)
+                top["namespace"].add(namespace, namespace_hashes)
+                top["pod"].add(pod, pod_hashes)
+                for image, hashes in image_hashes:
+                    top["image"].add(image, hashes)
+
+    def window(self, seconds: int, now: Optional[float] = None) -> SketchBucket:
+        now = time.time() if now is None else now
+        oldest = now - seconds
+        merged = SketchBucket(int(oldest))
+        with self._lock:
+            buckets = [
+                bucket for bucket in self.ring
+                if bucket is not None and bucket.start + self.bucket_seconds > oldest and bucket.start <= now
+            ]
+            # Array copies under the lock; the merge itself runs outside it.
+            copies = [bucket.copy() for bucket in buckets]
+        merged.merge_all(copies)
+        return merged
+
+
+def fetch_window(url: str, seconds: int, timeout: float = 2.0) -> SketchBucket:
+    """Reads a serialized window from another process or replica (/sketches)."""
+    with urllib.request.urlopen(f"{url}?window={seconds}", timeout=timeout) as response:
+        return SketchBucket.from_dict(json.loads(response.read()))
@@ -0,0 +1,181 @@
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+from typing import NamedTuple, Optional
+
+from starlette.responses import JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger("admission-webhook.static")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# Smaller files are served uncompressed; the headers would outweigh the gain.
+COMPRESS_MIN_SIZE = 512
+
+# Next.js content-hashed build output never changes under the same URL.
+IMMUTABLE_PREFIX = "/_next/static/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Misses under these prefixes are 404s: a missing chunk must not be answered
+# with index.html (parsed as JS/CSS), nor an unknown API route with 200 HTML.
+NO_FALLBACK_PREFIXES = ("/_next/", "/api/")
+
+_CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".json": "application/json",
+    ".txt": "text/plain; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".ico": "image/x-icon",
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".map": "application/json",
+}
+
+_COMPRESSIBLE = ("text/", "application/json", "application/javascript", "image/svg+xml", "image/x-icon")
+
+
+class Asset(NamedTuple):
+    content_type: str
+    etag: str
+    cache_control: str
+    identity: bytes
+    gzip: Optional[bytes]
+    br: Optional[bytes]
+
+
+def _content_type(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return _CONTENT_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _build_asset(url: str, data: bytes) -> Asset:
+    content_type = _content_type(url)
+
+    gzip_data = br_data = None
+    if len(data) >= COMPRESS_MIN_SIZE and content_type.startswith(_COMPRESSIBLE):
+        # mtime=0 keeps the gzip bytes (and replica ETags) reproducible.
+        candidate = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(candidate) < len(data):
+            gzip_data = candidate
+        if brotli is not None:
+            candidate = brotli.compress(data, quality=11)
+            if len(candidate) < len(data):
+                br_data = candidate
+
+    return Asset(
+        content_type=content_type,
+        etag='"' + hashlib.sha256(data).hexdigest()[:32] + '"',
+        cache_control=IMMUTABLE_CACHE_CONTROL if url.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE_CONTROL,
+        identity=data,
+        gzip=gzip_data,
+        br=br_data
+    )
+
+
+# =====================================================
+# IN-MEMORY STATIC ASSETS
+# =====================================================
+class StaticAssets:
+    """
+    ASGI app serving the exported UI bundle from memory.
+
+    - every file is read once at startup, with gzip (and brotli, when the
+      module is installed) variants and a strong content ETag
+    - URL -> asset resolution is a dict lookup over a precomputed route map:
+      '/' -> index.html, '/pods' and '/pods/' -> pods.html or pods/index.html
+    - unknown navigation paths fall back to index.html (client-side
+      routing); misses under NO_FALLBACK_PREFIXES resolve to None (404)
+    - /_next/static/ assets are immutable; everything else revalidates
+    """
+
+    def __init__(self, directory: str):
+        self.routes = {}
+        total = 0
+
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full = os.path.join(root, name)
+                url = "/" + os.path.relpath(full, directory).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    asset = _build_asset(url, f.read())
+                total += len(asset.identity)
+                self._add_routes(url, asset)
+
+        self.fallback = self.routes.get("/")
+        logger.info("Loaded %d static routes (%d bytes) into memory", len(self.routes), total)
+
+    def _add_routes(self, url: str, asset: Asset) -> None:
+        self.routes[url] = asset
+        if not url.endswith(".html"):
+            return
+
+        page = url[:-len(".html")]
+        if page.endswith("/index"):
+            page = page[:-len("index")]
+            self.routes.setdefault(page or "/", asset)
+            if page != "/":
+                self.routes.setdefault(page.rstrip("/"), asset)
+        else:
+            # An explicit pages/index.html wins over a sibling pages.html.
+            self.routes.setdefault(page, asset)
+            self.routes.setdefault(page + "/", asset)
+
+    def resolve(self, path: str) -> Optional[Asset]:
+        asset = self.routes.get(path)
+        if asset is not None:
+            return asset
+        if path == "/api" or path.startswith(NO_FALLBACK_PREFIXES):
+            return None
+        return self.fallback
+
+    @staticmethod
+    def response(asset: Asset, headers: dict) -> Response:
+        response_headers = {
+            "ETag": asset.etag,
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match == "*" or asset.etag in if_none_match):
+            return Response(status_code=304, headers=response_headers)
+
+        accept = headers.get("accept-encoding", "")
+        body = asset.identity
+        if asset.br is not None and "br" in accept:
+            body = asset.br
+            response_headers["Content-Encoding"] = "br"
+        elif asset.gzip is not None and "gzip" in accept:
+            body = asset.gzip
+            response_headers["Content-Encoding"] = "gzip"
+
+        return Response(content=body, media_type=asset.content_type, headers=response_headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["method"] not in ("GET", "HEAD"):
+            response = JSONResponse(status_code=405, content={"detail": "Method Not Allowed"})
+        else:
+            asset = self.resolve(scope["path"])
+            if asset is None:
+                response = JSONResponse(status_code=404, content={"detail": "Not Found"})
+            else:
+                headers = {
+                    key.decode("latin-1"): value.decode("latin-1")
+                    for key, value in scope["headers"]
+                    if key in (b"accept-encoding", b"if-none-match")
+                }
+                response = self.response(asset, headers)
+
+        await response(scope, receive, send)
@@ -0,0 +1,166 @@
+import os
+import ssl
+import time
+import logging
+import weakref
+import tempfile
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("admission-webhook.tls")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# The mounted secret is checked every TLS_RELOAD_INTERVAL seconds; a changed
+# certificate/key pair is loaded into the live context, so new handshakes use
+# it while open connections keep theirs.
+TLS_RELOAD_INTERVAL = float(os.getenv("TLS_RELOAD_INTERVAL", "10"))
+
+# =====================================================
+# PROMETHEUS METRICS (TLS)
+# =====================================================
+TLS_HANDSHAKES = Counter(
+    "admission_tls_handshakes_total",
+    "Completed TLS handshakes by mode (full, resumed)",
+    ["mode"]
+)
+
+TLS_HANDSHAKE_DURATION = Histogram(
+    "admission_tls_handshake_duration_seconds",
+    "Time from ClientHello until the handshake completed",
+    ["mode"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+TLS_RELOADS = Counter(
+    "admission_tls_certificate_reloads_total",
+    "Certificate reload attempts after the mounted files changed",
+    ["result"]
+)
+
+TLS_LOADED_AT = Gauge(
+    "admission_tls_certificate_loaded_timestamp_seconds",
+    "Unix time the serving certificate was last loaded"
+)
+
+
+def _fingerprint(*paths: str) -> tuple:
+    """
+    Secret volumes are updated by swapping a symlink, so the resolved file's
+    inode and mtime change even when the size does not.
+    """
+    result = []
+    for path in paths:
+        st = os.stat(path)
+        result.append((st.st_ino, st.st_mtime_ns, st.st_size))
+    return tuple(result)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_private(path: str, data: bytes) -> str:
+    # load_cert_chain only takes paths; the copy is readable by the owner only.
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+class CertificateReloader:
+    """
+    Owns the listener's SSLContext. uvicorn gets this context instead of
+    building its own; reload_if_changed() runs on the event loop (the
+    handshakes run there too), so the context is never changed mid-handshake.
+    """
+
+    def __init__(self, certfile: str, keyfile: str):
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.context = self._new_context()
+        self.context.load_cert_chain(certfile, keyfile)
+        self.fingerprint = _fingerprint(certfile, keyfile)
+        self.next_check = time.monotonic() + TLS_RELOAD_INTERVAL
+        TLS_LOADED_AT.set_to_current_time()
+
+        # ClientHello time per connection, read back when the handshake ends.
+        self._hello_at: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.context.sni_callback = self._client_hello
+
+    @staticmethod
+    def _new_context() -> ssl.SSLContext:
+        # OpenSSL defaults; session tickets are already issued, and the
+        # handshake metrics show how often clients resume with them.
+        return ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+
+    def _client_hello(self, ssl_object, server_name, ctx) -> None:
+        # Called for every ClientHello, with or without SNI.
+        self._hello_at[ssl_object] = time.perf_counter()
+
+    def handshake_done(self, ssl_object) -> None:
+        mode = "resumed" if ssl_object.session_reused else "full"
+        TLS_HANDSHAKES.labels(mode=mode).inc()
+        started = self._hello_at.pop(ssl_object, None)
+        if started is not None:
+            TLS_HANDSHAKE_DURATION.labels(mode=mode).observe(time.perf_counter() - started)
+
+    def reload_if_changed(self) -> bool:
+        now = time.monotonic()
+        if now < self.next_check:
+            return False
+        self.next_check = now + TLS_RELOAD_INTERVAL
+
+        try:
+            fingerprint = _fingerprint(self.certfile, self.keyfile)
+        except OSError as e:
+            logger.warning("TLS files could not be read, keeping the current certificate: %s", e)
+            return False
+        if fingerprint == self.fingerprint:
+            return False
+
+        # The pair is read once; the scratch context validates exactly the
+        # bytes the live context then loads, so a rotation landing between
+        # the two loads cannot install an unchecked or mismatched pair.
+        try:
+            certificate, key = _read(self.certfile), _read(self.keyfile)
+            with tempfile.TemporaryDirectory(prefix="tls-reload-") as directory:
+                certfile = _write_private(os.path.join(directory, "tls.crt"), certificate)
+                keyfile = _write_private(os.path.join(directory, "tls.key"), key)
+                self._new_context().load_cert_chain(certfile, keyfile)
+                self.context.load_cert_chain(certfile, keyfile)
+        except (OSError, ssl.SSLError) as e:
+            TLS_RELOADS.labels(result="error").inc()
+            logger.error("TLS certificate reload failed, keeping the current certificate: %s", e)
+            return False
+
+        self.fingerprint = fingerprint
+        TLS_RELOADS.labels(result="success").inc()
+        TLS_LOADED_AT.set_to_current_time()
+        logger.info("TLS certificate reloaded from %s", self.certfile)
+        return True
+
+    def protocol_class(self, base: type) -> type:
+        """
+        Wraps uvicorn's HTTP protocol: connection_made runs once the TLS
+        handshake has completed, which is where it is counted.
+        """
+        reloader = self
+
+        class TLSMeteredProtocol(base):
+            def connection_made(self, transport):
+                ssl_object = transport.get_extra_info("ssl_object")
+                if ssl_object is not None:
+                    reloader.handshake_done(ssl_object)
+                super().connection_made(transport)
+
+        return TLSMeteredProtocol
+
+
+def create_reloader(certfile: str, keyfile: str) -> Optional[CertificateReloader]:
+    if not (certfile and keyfile):
+        return None
+    return CertificateReloader(certfile, keyfile)
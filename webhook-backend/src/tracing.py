@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import queue
+import logging
+import secrets
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+
+from explain import current_explain
+
+logger = logging.getLogger("admission-webhook")
+
+# =====================================================
+# CONFIG
+# =====================================================
+# TRACE_EXPORTER:
+# - none -> only stage histograms are recorded (default)
+# - file -> spans are appended to TRACE_FILE_PATH as OTLP/JSON lines
+# - otlp -> spans are posted to an OTLP/HTTP collector (TRACE_OTLP_ENDPOINT)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "/tmp/webhook-spans.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "pod-security-webhook")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "512"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "1.0"))
+
+# =====================================================
+# PROMETHEUS METRICS (PIPELINE STAGES)
+# =====================================================
+STAGE_LATENCY = Histogram(
+    "admission_stage_duration_seconds",
+    "Admission pipeline stage latency",
+    ["stage", "outcome"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+SPANS_DROPPED = Counter(
+    "admission_trace_spans_dropped_total",
+    "Spans dropped because the export queue was full or the export failed"
+)
+
+# Histogram children are cached per (stage, outcome) so the hot path
+# skips the label lookup and its lock.
+_stage_children: dict = {}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("admission_current_span", default=None)
+
+
+# =====================================================
+# SPANS
+# =====================================================
+class Span:
+    """
+    Minimal OpenTelemetry-compatible span.
+    Serialized in the OTLP/JSON span format so the output can be read by
+    an OpenTelemetry collector or any tool that understands OTLP.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = {}
+        self.error = False
+
+    def to_otlp(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": 2,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2 if self.error else 1}
+        }
+
+
+class Stage:
+    """
+    Handle yielded by stage(). The caller sets outcome
+    (for example pass / deny / warn) before the block exits.
+    Attributes go to the span and, when explaining, to the explain trace.
+    """
+    __slots__ = ("outcome", "span", "attributes")
+
+    def __init__(self, span: Optional[Span], attributes: Optional[dict] = None):
+        self.outcome = "ok"
+        self.span = span
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.span is not None:
+            self.span.attributes[key] = value
+        if self.attributes is not None:
+            self.attributes[key] = value
+
+
+# =====================================================
+# SPAN EXPORTER
+# =====================================================
+class SpanExporter:
+    """
+    Batches finished spans on a background thread so exporting never
+    blocks the admission request.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.queue = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self.thread.start()
+
+    def submit(self, span: Span) -> None:
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + TRACE_FLUSH_INTERVAL
+
+            while len(batch) < TRACE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._export(batch)
+            except Exception as e:
+                SPANS_DROPPED.inc(len(batch))
+                logger.debug("Span export failed: %s", e)
+
+    def _export(self, batch: list[Span]) -> None:
+        payload = json.dumps({
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}
+                    ]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "admission-webhook"},
+                    "spans": [span.to_otlp() for span in batch]
+                }]
+            }]
+        })
+
+        if self.mode == "file":
+            with open(TRACE_FILE_PATH, "a", encoding="utf-8") as f:
+                f.write(payload + "\n")
+            return
+
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=payload.encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=2):
+            pass
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def init_tracing(mode: str = TRACE_EXPORTER) -> None:
+    """
+    Enables span export.
+    - none -> spans disabled, only stage histograms are recorded
+    - file / otlp -> spans exported on a background thread
+    """
+    global _exporter
+
+    if mode not in ("file", "otlp"):
+        _exporter = None
+        return
+
+    _exporter = SpanExporter(mode)
+
+
+# =====================================================
+# INSTRUMENTATION
+# =====================================================
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Opens a span without recording a stage histogram.
+    Used for the root admission span. Yields None when tracing is disabled.
+    """
+    if _exporter is None:
+        yield None
+        return
+
+    current = Span(name, _current_span.get())
+    current.attributes.update(attributes)
+    token = _current_span.set(current)
+
+    try:
+        yield current
+    except Exception:
+        current.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        _exporter.submit(current)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the active span, None when tracing is disabled."""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times one admission pipeline stage.
+    The duration is observed in admission_stage_duration_seconds labelled by
+    stage and outcome; a child span is also exported when tracing is enabled,
+    and a stage event is added to the active explain trace.
+    Exceptions are recorded with outcome=error and re-raised.
+    """
+    current = None
+    token = None
+
+    if _exporter is not None:
+        current = Span(name, _current_span.get())
+        token = _current_span.set(current)
+
+    explain = current_explain.get()
+    handle = Stage(current, {} if explain is not None else None)
+    start = time.perf_counter()
+
+    try:
+        yield handle
+    except Exception:
+        handle.outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+
+        if explain is not None:
+            explain.add_timed("stage", start, stage=name, outcome=handle.outcome, **handle.attributes)
+
+        # Replayed requests (/debug/explain) stay out of the stage histograms.
+        if explain is None or not explain.replay:
+            key = (name, handle.outcome)
+            child = _stage_children.get(key)
+            if child is None:
+                child = STAGE_LATENCY.labels(stage=name, outcome=handle.outcome)
+                _stage_children[key] = child
+            child.observe(elapsed)
+
+        if current is not None:
+            _current_span.reset(token)
+            current.end_ns = time.time_ns()
+            current.error = handle.outcome == "error"
+            current.attributes["outcome"] = handle.outcome
+            _exporter.submit(current)
+
+
+init_tracing()
@@ -0,0 +1,194 @@
+"""
+Synthetic AdmissionReview generator for load tests and fuzzing.
+
+Pods are built by pod_operations.build_test_pod from randomly drawn UI form
+bodies, so the generated traffic has the same variants the UI can create
+(privileged, root, hostPath, PVC by storage class, resources, vault
+annotations, ...). Nothing is sent to the cluster.
+
+Usage:
+    python src/traffic_generator.py --count 100000 --seed 42 --profile realistic --out reviews.jsonl
+
+The same seed, profile and count always produce the same output.
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from bisect import bisect_right
+from typing import Iterator, Optional
+
+from pod_operations import build_test_pod
+
+# =====================================================
+# PROFILES
+# =====================================================
+# Form field -> {value: weight}. A missing or None value leaves the field
+# out of the form body, as the UI does for unchecked options.
+PROFILES = {
+    # Every variant equally likely: broad coverage for fuzzing.
+    "uniform": {
+        "namespace": {"test": 1, "dev": 1, "prod": 1, "default": 1},
+        "image": {"unprivileged": 1, "latest": 1, "alpine": 1, "nginx": 1, "registry.example.com/app:1.4.2": 1},
+        "privileged": {True: 1, False: 1, None: 1},
+        "allowPrivilegeEscalation": {True: 1, False: 1, None: 1},
+        "runAsNonRoot": {True: 1, False: 1},
+        "runAsRoot": {True: 1, False: 1},
+        "vaultAnnotations": {True: 1, False: 1},
+        "volumeType": {"hostPath": 1, "emptyDir": 1, "pvc": 1, None: 1},
+        "pvcName": {"standard-pvc": 1, "longhorn-pvc": 1},
+        "useNativeSecret": {True: 1, False: 1},
+        "includeResources": {True: 1, False: 1},
+    },
+    # Mostly compliant workloads with a tail of violations, closer to what
+    # a production webhook sees.
+    "realistic": {
+        "namespace": {"prod": 5, "test": 3, "dev": 2},
+        "image": {"unprivileged": 6, "alpine": 2, "registry.example.com/app:1.4.2": 6, "latest": 1, "nginx": 1},
+        "privileged": {None: 18, False: 1, True: 1},
+        "allowPrivilegeEscalation": {False: 8, None: 11, True: 1},
+        "runAsNonRoot": {True: 9, False: 1},
+        "runAsRoot": {False: 19, True: 1},
+        "vaultAnnotations": {True: 3, False: 7},
+        "volumeType": {None: 10, "emptyDir": 5, "pvc": 4, "hostPath": 1},
+        "pvcName": {"longhorn-pvc": 4, "standard-pvc": 1},
+        "useNativeSecret": {False: 9, True: 1},
+        "includeResources": {True: 9, False: 1},
+    },
+}
+
+
+def _compile_profile(profile: dict) -> list[tuple[str, list, list, float]]:
+    # Cumulative weights once per generator; a draw is then one bisect.
+    compiled = []
+    for field, weights in profile.items():
+        values = list(weights)
+        cumulative = []
+        total = 0
+        for value in values:
+            total += weights[value]
+            cumulative.append(total)
+        compiled.append((field, values, cumulative, total))
+    return compiled
+
+
+# =====================================================
+# GENERATOR
+# =====================================================
+class TrafficGenerator:
+    """
+    Produces AdmissionReview payloads from weighted form-field choices.
+
+    - seed          -> reproducible sequence (uids included)
+    - profile       -> name in PROFILES or a {field: {value: weight}} dict
+    - update_ratio  -> share of UPDATE requests (oldObject = the same pod
+                       with a different image)
+    - claims        -> 'namespace/claimName' -> storageClass for every
+                       generated PVC, for fake apiservers that answer the
+                       webhook's PVC lookups
+    """
+
+    def __init__(self, seed: Optional[int] = None, profile="realistic", update_ratio: float = 0.0):
+        self.rng = random.Random(seed)
+        self.profile = _compile_profile(PROFILES[profile] if isinstance(profile, str) else profile)
+        self.update_ratio = update_ratio
+        self.claims = {}
+        self.count = 0
+
+    def form(self) -> dict:
+        """Draws one UI form body."""
+        draw = self.rng.random
+        body = {}
+        for field, values, cumulative, total in self.profile:
+            value = values[bisect_right(cumulative, draw() * total)]
+            if value is not None:
+                body[field] = value
+        return body
+
+    def review(self) -> dict:
+        """Builds the next AdmissionReview."""
+        index = self.count
+        self.count += 1
+
+        body = self.form()
+        pod, pvc = build_test_pod(body, f"synthetic-{index}")
+        namespace = pod["metadata"]["namespace"]
+        if pvc is not None:
+            self.claims[f"{namespace}/{pvc['metadata']['name']}"] = pvc["spec"]["storageClassName"]
+
+        request = {
+            "uid": str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+            "kind": {"group": "", "version": "v1", "kind": "Pod"},
+            "resource": {"group": "", "version": "v1", "resource": "pods"},
+            "namespace": namespace,
+            "name": pod["metadata"]["name"],
+            "operation": "CREATE",
+            "object": pod,
+            "oldObject": None,
+        }
+
+        if self.update_ratio and self.rng.random() < self.update_ratio:
+            old = json.loads(json.dumps(pod))
+            old["spec"]["containers"][0]["image"] = "nginx:1.24"
+            request["operation"] = "UPDATE"
+            request["oldObject"] = old
+
+        return {
+            "apiVersion": "admission.k8s.io/v1",
+            "kind": "AdmissionReview",
+            "request": request,
+        }
+
+    def generate(self, count: int) -> Iterator[dict]:
+        for _ in range(count):
+            yield self.review()
+
+
+def write_jsonl(reviews, path: str) -> int:
+    """Writes one AdmissionReview per line ('-' -> stdout); returns the line count."""
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+    written = 0
+    try:
+        for review in reviews:
+            out.write(json.dumps(review, separators=(",", ":")))
+            out.write("\n")
+            written += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return written
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic AdmissionReview traffic as JSONL.")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--update-ratio", type=float, default=0.0)
+    parser.add_argument("--out", default="-", help="output file, '-' for stdout")
+    parser.add_argument("--claims", help="also write the PVC storage classes as JSON")
+    args = parser.parse_args()
+
+    generator = TrafficGenerator(seed=args.seed, profile=args.profile, update_ratio=args.update_ratio)
+    start = time.perf_counter()
+    written = write_jsonl(generator.generate(args.count), args.out)
+    elapsed = time.perf_counter() - start
+
+    if args.claims:
+        with open(args.claims, "w", encoding="utf-8") as f:
+            json.dump(generator.claims, f, indent=2, sort_keys=True)
+
+    print(f"{written} reviews in {elapsed:.2f}s ({written / elapsed:.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
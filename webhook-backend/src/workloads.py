@@ -0,0 +1,123 @@
+from typing import Optional
+
+# =====================================================
+# POD-BEARING WORKLOAD KINDS
+# =====================================================
+# Path from the workload object to its pod template.
+WORKLOAD_TEMPLATE_PATHS = {
+    "Deployment": ("spec", "template"),
+    "StatefulSet": ("spec", "template"),
+    "DaemonSet": ("spec", "template"),
+    "Job": ("spec", "template"),
+    "CronJob": ("spec", "jobTemplate", "spec", "template"),
+}
+
+
+def template_spec_pointer(kind: str) -> Optional[str]:
+    """
+    JSON Pointer to the pod spec inside an object of the given kind,
+    or None for kinds without a pod spec.
+    """
+    if kind == "Pod":
+        return "/spec"
+
+    path = WORKLOAD_TEMPLATE_PATHS.get(kind)
+    if path is None:
+        return None
+
+    return "/" + "/".join(path + ("spec",))
+
+
+def _get_path(obj: dict, path: tuple) -> dict:
+    for key in path:
+        obj = (obj or {}).get(key) or {}
+    return obj
+
+
+def pod_from_object(kind: str, obj: dict, namespace: str) -> Optional[dict]:
+    """
+    Returns the pod (or pod template) the rules are evaluated against.
+    - Pod                -> the object itself
+    - workload kinds     -> the pod template, with the workload name and
+                            the request namespace in its metadata
+    - anything else      -> None
+    """
+    if kind == "Pod":
+        return obj
+
+    path = WORKLOAD_TEMPLATE_PATHS.get(kind)
+    if path is None:
+        return None
+
+    template = _get_path(obj, path)
+    template_meta = template.get("metadata", {}) or {}
+    meta = obj.get("metadata", {}) or {}
+
+    return {
+        "metadata": {
+            "name": f"{kind.lower()}/{meta.get('name', 'unknown')}",
+            "namespace": meta.get("namespace") or namespace,
+            "labels": template_meta.get("labels", {}) or {},
+            "annotations": template_meta.get("annotations", {}) or {},
+        },
+        "spec": template.get("spec", {}) or {},
+    }
+
+
+# =====================================================
+# UPDATE DIFF
+# =====================================================
+_CONTAINER_LISTS = ("containers", "initContainers", "ephemeralContainers")
+
+
+def _changed_entries(old_items: list, new_items: list) -> list:
+    """
+    Entries of new_items (matched by name) that are new or differ from old_items.
+    """
+    old_by_name = {item.get("name"): item for item in old_items or []}
+    return [item for item in new_items or [] if old_by_name.get(item.get("name")) != item]
+
+
+def _pod_level(spec: dict) -> dict:
+    """Pod spec without the lists that are diffed entry by entry."""
+    return {key: value for key, value in spec.items() if key not in _CONTAINER_LISTS and key != "volumes"}
+
+
+def changed_pod(old_pod: dict, new_pod: dict, labels_matter: bool = False) -> Optional[dict]:
+    """
+    Reduces an UPDATE to the parts the rules need to re-evaluate.
+    - returns None when the spec is unchanged (label / annotation /
+      replica patches); a label change counts only with labels_matter,
+      i.e. when a scope selector or a pod rule reads the pod labels
+    - returns new_pod whole when a pod-level spec field (hostNetwork,
+      securityContext, ...) or, with labels_matter, a label changed
+    - otherwise returns new_pod with only the changed containers and volumes
+    """
+    old_spec = old_pod.get("spec", {}) or {}
+    new_spec = new_pod.get("spec", {}) or {}
+    old_meta = old_pod.get("metadata", {}) or {}
+    new_meta = new_pod.get("metadata", {}) or {}
+
+    if _pod_level(old_spec) != _pod_level(new_spec) or (
+        labels_matter and (old_meta.get("labels") or {}) != (new_meta.get("labels") or {})
+    ):
+        return new_pod
+
+    reduced = {"securityContext": new_spec.get("securityContext", {}) or {}}
+    changed = False
+
+    for key in _CONTAINER_LISTS:
+        items = _changed_entries(old_spec.get(key), new_spec.get(key))
+        if items:
+            reduced[key] = items
+            changed = True
+
+    volumes = _changed_entries(old_spec.get("volumes"), new_spec.get("volumes"))
+    if volumes:
+        reduced["volumes"] = volumes
+        changed = True
+
+    if not changed:
+        return None
+
+    return {"metadata": new_meta, "spec": reduced}
@@ -53,6 +53,9 @@ export function LogViewer({ refreshTrigger }: { refreshTrigger?: number }) {
       .replace(/(?:\\u001b|\\x1b)?\[92mALLOW(?:\\u001b|\\x1b)?\[0m/g, '<span style="color: var(--log-success); font-weight: bold;">ALLOW</span>')
       // Kaçmamış haliyle gelen ALLOW
       .replace(/\[92mALLOW\[0m/g, '<span style="color: var(--log-success); font-weight: bold;">ALLOW</span>')
+      // Yapılandırılmış (JSON) log satırlarındaki kararlar
+      .replace(/"decision": "DENY"/g, '"decision": <span style="color: var(--log-error); font-weight: bold;">"DENY"</span>')
+      .replace(/"decision": "ALLOW"/g, '"decision": <span style="color: var(--log-success); font-weight: bold;">"ALLOW"</span>')
       
       // Standart Kelimeler
       .replace(/INFO:/g, '<span style="color: var(--log-info);">INFO:</span>')
@@ -69,6 +72,21 @@ export function LogViewer({ refreshTrigger }: { refreshTrigger?: number }) {
     let currentEvent: any = null;
 
     lines.forEach(line => {
+      // Yapılandırılmış JSON log satırı: olduğu gibi ekle
+      if (line.trim().startsWith('{')) {
+        try {
+          const parsed = JSON.parse(line);
+          if (currentEvent && Object.keys(currentEvent).length > 0) {
+            groupedEvents.push(currentEvent);
+            currentEvent = null;
+          }
+          groupedEvents.push(parsed);
+          return;
+        } catch {
+          // JSON değilse aşağıdaki metin ayrıştırmasına devam et
+        }
+      }
+
       const cleanLine = line.replace(/\x1b\[[0-9;]*m/g, '').replace(/\[91m/g, '').replace(/\[92m/g, '').replace(/\[0m/g, '');
       
       if (!currentEvent) currentEvent = {};
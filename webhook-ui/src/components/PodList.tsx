@@ -101,12 +101,26 @@ export function PodList({ refreshTrigger }: { refreshTrigger: number }) {
     
     setLoading(true);
     try {
-      const promises = Array.from(selectedPods).map(id => {
-        const [ns, name] = id.split('/');
-        return fetch(`/api/pods?name=${name}&namespace=${ns}`, { method: 'DELETE' });
+      const pods = Array.from(selectedPods).map(id => {
+        const [namespace, name] = id.split('/');
+        return { name, namespace };
       });
-      
-      await Promise.all(promises);
+
+      // Tek istekte toplu silme; sunucu sınırlı paralellikle siler ve
+      // her pod için bir NDJSON satırı, en sonda da özet satırı döner
+      const res = await fetch('/api/pods/bulk-delete', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ pods })
+      });
+      const lines = (await res.text()).trim().split('\n').filter(Boolean);
+      const summary = lines.length ? JSON.parse(lines[lines.length - 1]) : null;
+      if (!res.ok || !summary?.summary) {
+        throw new Error("Toplu silme başarısız oldu.");
+      }
+      if (summary.failed > 0) {
+        alert(`${summary.failed} pod silinemedi.`);
+      }
       
       // İşlem bitince seçim modunu kapat ve tabloyu yenile
       setSelectionMode(false);